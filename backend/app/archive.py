@@ -0,0 +1,211 @@
+"""
+Data Archive
+------------
+Whole-database export/import as one NDJSON stream, table by table:
+
+    {"format": "financialize-archive", "version": 1, "schema_version": SCHEMA_VERSION, ...}
+    {"table": "persons", "columns": ["id", "name", "age", "color"]}
+    [1, "Alex", 34, "#818cf8"]
+    ...
+    {"end": true, "rows": 12345}
+
+Optionally gzip- or zstd-compressed (zstd needs the `zstandard` package).
+Export reads each table through a streaming cursor and yields compressed
+chunks as it goes; import reads line by line from a spooled upload, so both
+run in flat memory regardless of database size.
+"""
+
+import gzip
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import BinaryIO, Dict, Iterator, List
+
+from . import models  # noqa: F401 -- registers tables on Base
+from .database import Base, SCHEMA_VERSION, engine
+from .rollups import rebuild_rollups
+
+FORMAT = "financialize-archive"
+VERSION = 1
+COMPRESSIONS = ("none", "gzip", "zstd")
+BATCH_SIZE = 5000
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+class ArchiveError(ValueError):
+    """The uploaded archive is malformed or incompatible."""
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ArchiveError("zstd compression needs the 'zstandard' package (pip install zstandard)")
+    return zstandard
+
+
+# Derived from balance_entries: rebuilt after import instead of archived
+DERIVED_TABLES = ("balance_rollups",)
+
+
+def _tables():
+    # Parents before children, so foreign keys resolve during import
+    return [t for t in Base.metadata.sorted_tables if t.name not in DERIVED_TABLES]
+
+
+_encode = json.JSONEncoder(separators=(",", ":")).encode
+
+
+def _line(obj) -> bytes:
+    return _encode(obj).encode("utf-8") + b"\n"
+
+
+def _rows(batch) -> bytes:
+    # One join per batch: per-row dumps()/encode() calls dominate export time
+    return ("\n".join([_encode(tuple(row)) for row in batch]) + "\n").encode("utf-8")
+
+
+def _compressor(compression: str):
+    if compression == "gzip":
+        return zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    if compression == "zstd":
+        return _zstandard().ZstdCompressor(level=3).compressobj()
+    return None
+
+
+def export_stream(compression: str = "none") -> Iterator[bytes]:
+    """Yield the archive in chunks of roughly BATCH_SIZE rows."""
+    compressor = _compressor(compression)
+
+    def emit(chunk: bytes) -> bytes:
+        return compressor.compress(chunk) if compressor else chunk
+
+    tables = _tables()
+    yield emit(_line({
+        "format": FORMAT,
+        "version": VERSION,
+        "schema_version": SCHEMA_VERSION,
+        "exported_at": datetime.now().isoformat(timespec="seconds"),
+        "tables": [t.name for t in tables],
+    }))
+
+    total = 0
+    with engine.connect() as conn:
+        for table in tables:
+            columns = [c.name for c in table.columns]
+            yield emit(_line({"table": table.name, "columns": columns}))
+            result = conn.execution_options(stream_results=True, yield_per=BATCH_SIZE).execute(
+                table.select().order_by(*table.primary_key.columns)
+            )
+            for batch in result.partitions():
+                total += len(batch)
+                yield emit(_rows(batch))
+
+    yield emit(_line({"end": True, "rows": total}))
+    if compressor:
+        yield compressor.flush()
+
+
+def _open_text(raw: BinaryIO) -> Iterator[str]:
+    """Line reader over the upload, sniffing gzip/zstd by magic bytes."""
+    head = raw.read(4)
+    raw.seek(0)
+    errors = (EOFError, OSError, UnicodeDecodeError, zlib.error)
+    if head.startswith(_GZIP_MAGIC):
+        raw = gzip.GzipFile(fileobj=raw, mode="rb")
+    elif head == _ZSTD_MAGIC:
+        zstandard = _zstandard()
+        raw = zstandard.ZstdDecompressor().stream_reader(raw)
+        errors += (zstandard.ZstdError,)
+    try:
+        yield from io.TextIOWrapper(raw, encoding="utf-8")
+    except errors as e:
+        raise ArchiveError(f"Archive is corrupt or truncated: {e}")
+
+
+def import_archive(raw: BinaryIO) -> Dict[str, int]:
+    """
+    Replace all data with the archive's contents in one transaction.
+    Secondary indexes are dropped during the load and rebuilt once at the
+    end; rows are inserted in executemany batches.
+    """
+    lines = _open_text(raw)
+    try:
+        header = json.loads(next(lines))
+    except ArchiveError:
+        raise
+    except (StopIteration, ValueError):
+        raise ArchiveError("Not a Financialize archive")
+    if not isinstance(header, dict) or header.get("format") != FORMAT:
+        raise ArchiveError("Not a Financialize archive")
+    if header.get("version", 0) > VERSION or header.get("schema_version", 0) > SCHEMA_VERSION:
+        raise ArchiveError("Archive was written by a newer version of Financialize")
+
+    tables = {t.name: t for t in _tables()}
+    counts: Dict[str, int] = {}
+    finished = False
+
+    with engine.begin() as conn:
+        # 1. Clear children first, then drop secondary indexes for the load
+        for table in reversed(list(tables.values())):
+            conn.execute(table.delete())
+        indexes = [index for table in tables.values() for index in table.indexes]
+        for index in indexes:
+            index.drop(conn, checkfirst=True)
+
+        # 2. Stream rows table by table in batches
+        table = None
+        names: List[str] = []
+        keep: List[int] = []
+        batch: List[Dict] = []
+
+        def flush():
+            if batch:
+                conn.execute(table.insert(), batch)
+                counts[table.name] = counts.get(table.name, 0) + len(batch)
+                batch.clear()
+
+        for line_no, line in enumerate(lines, start=2):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                raise ArchiveError(f"Line {line_no}: invalid JSON")
+
+            if isinstance(record, list):
+                if table is None:
+                    raise ArchiveError(f"Line {line_no}: row before any table header")
+                if len(record) != len(names):
+                    raise ArchiveError(f"Line {line_no}: expected {len(names)} values")
+                batch.append({names[i]: record[i] for i in keep})
+                if len(batch) >= BATCH_SIZE:
+                    flush()
+            elif isinstance(record, dict) and "table" in record:
+                if table is not None:
+                    flush()
+                table = tables.get(record["table"])
+                if table is None:
+                    raise ArchiveError(f"Line {line_no}: unknown table {record['table']!r}")
+                # Columns are matched by name, so older archives still load
+                names = record.get("columns") or []
+                keep = [i for i, name in enumerate(names) if name in table.columns]
+            elif isinstance(record, dict) and record.get("end"):
+                finished = True
+                break
+            else:
+                raise ArchiveError(f"Line {line_no}: unexpected record")
+
+        if table is not None:
+            flush()
+        if not finished:
+            raise ArchiveError("Archive is truncated (no end marker)")
+
+        # 3. Rebuild indexes once over the loaded data, then the rollup tiers
+        for index in indexes:
+            index.create(conn)
+        rebuild_rollups(conn)
+
+    return counts
@@ -0,0 +1,133 @@
+"""
+Plan vs. Reality Backtest
+-------------------------
+Replays saved scenarios (UserScenario.data, the frontend's state snapshot)
+against the tracker's net-worth timeline. The per-account timeline comes
+from the in-memory series store (goals reuse it); the converted net-worth
+series is cached here, and tracker and FX writes call
+``invalidate_networth_timeline``.
+"""
+
+import json
+import threading
+from datetime import date
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from . import models
+from .fx import get_fx_table, to_day_numbers
+from .logic import BacktestPlan, calculate_backtest
+from .schemas import BacktestRequest, BacktestResponse, ProjectionRequest
+from .timeseries import AccountTimeline, get_series_store
+
+_timeline: Optional[Tuple[np.ndarray, np.ndarray]] = None
+_generation = 0
+_lock = threading.Lock()
+
+
+def get_account_timeline(db: Session) -> AccountTimeline:
+    """Per-account balance matrix from the series store, shared by backtests and goals."""
+    return get_series_store(db).timeline("raw")
+
+
+def get_networth_timeline(db: Session) -> Tuple[np.ndarray, np.ndarray]:
+    """(day numbers, net worth) for every tracker date, from the shared account timeline."""
+    timeline = _timeline
+    if timeline is not None:
+        return timeline
+
+    generation = _generation
+    accounts = get_account_timeline(db)
+    if len(accounts.days):
+        meta = {aid: (kind, cur) for aid, kind, cur in db.query(models.Account.id, models.Account.type, models.Account.currency)}
+        ids = accounts.account_ids.tolist()
+        matrix = accounts.matrix
+        currencies = [meta.get(aid, (None, None))[1] for aid in ids]
+        if any(currencies):
+            matrix = get_fx_table(db).convert_columns(matrix, currencies, accounts.days)
+        sign = np.array([-1.0 if meta.get(aid, (None, None))[0] == 'Liability' else 1.0 for aid in ids])
+        timeline = (accounts.days, matrix @ sign)
+    else:
+        timeline = (np.array([], dtype=np.int64), np.array([]))
+
+    with _lock:
+        _store(timeline, generation)
+    return timeline
+
+
+def _store(timeline, generation: int):
+    global _timeline
+    if generation == _generation:
+        _timeline = timeline
+
+
+def invalidate_networth_timeline():
+    """Drop the cached net-worth timeline after balance entries, accounts or FX rates change."""
+    global _timeline, _generation
+    with _lock:
+        _generation += 1
+        _timeline = None
+
+
+def scenario_plan(scenario: models.UserScenario, steps_per_year: int, fallback_start: Optional[str]) -> BacktestPlan:
+    """Turn a saved snapshot into a ProjectionRequest plus its start day."""
+    try:
+        snapshot = json.loads(scenario.data or "")
+    except ValueError:
+        snapshot = None
+    if not isinstance(snapshot, dict):
+        return BacktestPlan(scenario.id, scenario.name, None, None, "Scenario has no saved plan data.")
+
+    params = snapshot.get("simulationParams") or {}
+    try:
+        request = ProjectionRequest(
+            current_savings=params.get("currentSavings", 0.0),
+            incomes=[{"name": i.get("name", ""), "amount": i.get("amount", 0.0)} for i in snapshot.get("incomes") or []],
+            # 'savings' is the remainder line in the UI, not money spent
+            expenses=[
+                {"name": e.get("name", ""), "percentage": e.get("percentage", 0.0)}
+                for e in snapshot.get("expenses") or [] if e.get("id") != "savings"
+            ],
+            events=[
+                {**e, "is_recurring": e.get("is_recurring", e.get("isRecurring", False))}
+                for e in snapshot.get("events") or []
+            ],
+            years=params.get("years", 10),
+            annual_raise=params.get("annualRaise", 2.0),
+            market_return=params.get("marketReturn", 7.0),
+            inflation=params.get("inflation", 2.5),
+            current_age=params.get("currentAge", 30),
+            currency=snapshot.get("currency") or "$",
+            steps_per_year=steps_per_year,
+        )
+    except (ValueError, TypeError, AttributeError):
+        return BacktestPlan(scenario.id, scenario.name, None, None, "Saved plan data could not be read.")
+
+    # Legacy scenarios have no created_at: use the newest entry in their own
+    # snapshot (when the plan was saved), else the start of the tracker history
+    start = scenario.created_at
+    if not start:
+        saved_dates = [h.get("date") for h in snapshot.get("history") or [] if isinstance(h, dict) and h.get("date")]
+        start = max(saved_dates) if saved_dates else fallback_start
+    if not start:
+        return BacktestPlan(scenario.id, scenario.name, request, None, "No start date for this plan.")
+    try:
+        start_day = int(to_day_numbers([start])[0])
+    except ValueError:
+        return BacktestPlan(scenario.id, scenario.name, request, None, f"Invalid start date {start!r}.")
+    return BacktestPlan(scenario.id, scenario.name, request, start_day)
+
+
+def run_backtest(request: BacktestRequest, db: Session) -> BacktestResponse:
+    days, actual = get_networth_timeline(db)
+
+    query = db.query(models.UserScenario)
+    if request.scenario_ids is not None:
+        query = query.filter(models.UserScenario.id.in_(request.scenario_ids))
+    scenarios = query.order_by(models.UserScenario.id).all()
+
+    fallback_start = str(np.datetime64(int(days[0]), 'D')) if len(days) else date.today().isoformat()
+    plans: List[BacktestPlan] = [scenario_plan(s, request.steps_per_year, fallback_start) for s in scenarios]
+    return calculate_backtest(plans, days, actual, request.start_from)
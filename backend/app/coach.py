@@ -0,0 +1,157 @@
+"""
+Coach engine
+------------
+Nudges are small rules registered with ``@coach_rule``. Every request builds a
+single ``CoachContext`` (one baseline projection, savings figures, lazily-loaded
+tracker balances) that all rules share, so adding rules does not add
+projections.
+
+Rules that need "what if I saved $X more per month?" answers declare the
+deltas up front. Projections are linear in contributions, so all declared
+deltas are answered together from one unit-contribution projection.
+"""
+
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from . import models
+from .fx import get_fx_table
+from .logic import project_contribution_stream, run_projection
+from .schemas import ProjectionRequest
+from .timeseries import get_series_store
+
+
+class CoachContext:
+    """Everything a rule may need, computed once per request."""
+
+    def __init__(self, request: ProjectionRequest, db: Optional[Session] = None):
+        self.request = request
+        self.db = db
+
+        # 1. Baselines (Monthly)
+        self.total_income = sum(i.amount for i in request.incomes)
+        self.expense_rate = sum(e.percentage for e in request.expenses) / 100.0
+        self.monthly_expense = self.total_income * self.expense_rate
+        self.monthly_savings = self.total_income * (1 - self.expense_rate)
+        self.savings_rate = (self.monthly_savings / self.total_income * 100) if self.total_income > 0 else 0
+
+        # 2. Baseline projection arrays (no per-year models: rules read the arrays)
+        self.projection = run_projection(request)
+        self.net_worth = self.projection.net_worth
+        self.what_if_deltas = np.zeros(0)
+        self.what_if_gains = np.zeros((0, len(self.net_worth)))
+
+    @cached_property
+    def tracker_balances(self) -> Dict[str, float]:
+        """Latest balance per account, in the main currency, summed per account type (empty without a DB session)."""
+        if self.db is None:
+            return {}
+        store = get_series_store(self.db)
+        fx = get_fx_table(self.db)
+        totals: Dict[str, float] = {}
+        for account_id, acc_type, currency in self.db.query(models.Account.id, models.Account.type, models.Account.currency):
+            latest = store.latest(account_id)
+            if latest is None:
+                continue
+            date, amount = latest
+            totals[acc_type] = totals.get(acc_type, 0.0) + fx.convert(amount, currency, date)
+        return totals
+
+    def evaluate_what_ifs(self, deltas: List[float]):
+        """
+        Answer every extra-monthly-savings delta with one projection.
+        A flat $1/month stream (monthly compounding, matching how the coach
+        has always framed small savings) is projected once and scaled.
+        """
+        self.what_if_deltas = np.array(sorted(set(deltas)), dtype=float)
+        if not self.what_if_deltas.size:
+            return
+        unit_nw = project_contribution_stream(self.request)
+        self.what_if_gains = self.what_if_deltas[:, None] * unit_nw[None, :]
+
+    def what_if_gain(self, delta: float) -> float:
+        """Extra final net worth from saving `delta` more per month."""
+        idx = int(np.searchsorted(self.what_if_deltas, delta))
+        return float(self.what_if_gains[idx, -1])
+
+
+@dataclass(frozen=True)
+class CoachRule:
+    name: str
+    func: Callable[[CoachContext], Optional[dict]]
+    what_if: Tuple[float, ...] = ()
+
+
+_RULES: List[CoachRule] = []
+
+
+def coach_rule(name: Optional[str] = None, what_if: Tuple[float, ...] = ()):
+    """Register a nudge rule. Rules run in registration order."""
+    def decorator(fn: Callable[[CoachContext], Optional[dict]]):
+        _RULES.append(CoachRule(name=name or fn.__name__, func=fn, what_if=tuple(what_if)))
+        return fn
+    return decorator
+
+
+def run_coach(request: ProjectionRequest, db: Optional[Session] = None) -> List[dict]:
+    """Build the shared context once and run every registered rule against it."""
+    if sum(i.amount for i in request.incomes) <= 0:
+        return []
+
+    ctx = CoachContext(request, db)
+    ctx.evaluate_what_ifs([d for rule in _RULES for d in rule.what_if])
+
+    nudges = []
+    for rule in _RULES:
+        nudge = rule.func(ctx)
+        if nudge:
+            nudges.append(nudge)
+    return nudges
+
+
+# --- Rules ---
+
+@coach_rule(what_if=(50,))
+def power_of_50(ctx: CoachContext) -> Optional[dict]:
+    extra_50_val = ctx.what_if_gain(50)
+    return {
+        "title": "The Power of $50",
+        "message": f"If you save just $50 more per month, you could have an extra ${round(extra_50_val):,} in {ctx.request.years} years.",
+        "icon": "🚀"
+    }
+
+
+@coach_rule()
+def savings_rate_check(ctx: CoachContext) -> Optional[dict]:
+    if ctx.savings_rate < 20:
+        return {
+            "title": "Savings Boost",
+            "message": f"Your savings rate is {round(ctx.savings_rate)}%. Experts recommend aiming for 20%.",
+            "icon": "⚠️"
+        }
+    if ctx.savings_rate > 50:
+        return {
+            "title": "Super Saver",
+            "message": "You are saving over 50% of your income! You are on the fast track to FIRE.",
+            "icon": "🔥"
+        }
+    return None
+
+
+@coach_rule()
+def emergency_fund(ctx: CoachContext) -> Optional[dict]:
+    balances = ctx.tracker_balances
+    if not balances or ctx.monthly_expense <= 0:
+        return None
+    months_covered = balances.get("Cash", 0.0) / ctx.monthly_expense
+    if months_covered >= 3:
+        return None
+    return {
+        "title": "Emergency Fund",
+        "message": f"Your cash covers about {months_covered:.1f} months of expenses. Aim for at least 3.",
+        "icon": "🛟"
+    }
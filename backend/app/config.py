@@ -0,0 +1,42 @@
+"""
+Runtime configuration, read once from environment variables at startup.
+"""
+
+import os
+
+
+def _flag(name: str, default: bool = False) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Request/SQL/span instrumentation exposed at /api/metrics and as Server-Timing
+METRICS_ENABLED = _flag("FINANCIALIZE_METRICS")
+
+# On-demand profiling via ?profile=sample|cprofile or an X-Profile header
+PROFILING_ENABLED = _flag("FINANCIALIZE_PROFILING")
+# Statements slower than this inside a profiled request get EXPLAIN QUERY PLAN
+SLOW_SQL_MS = float(os.environ.get("FINANCIALIZE_SLOW_SQL_MS", "25"))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.environ.get("FINANCIALIZE_PROFILE_INTERVAL_MS", "1"))
+
+# Budget for shared (1 + rate) ** n tables used by projections and forecasts
+FACTOR_CACHE_MB = float(os.environ.get("FINANCIALIZE_FACTOR_CACHE_MB", "8"))
+
+# Live projection websocket: window for coalescing bursts of slider deltas
+LIVE_DEBOUNCE_MS = float(os.environ.get("FINANCIALIZE_LIVE_DEBOUNCE_MS", "25"))
+
+# Online database snapshots (backups/ next to the database). 0 disables the schedule.
+SNAPSHOT_INTERVAL_HOURS = float(os.environ.get("FINANCIALIZE_SNAPSHOT_INTERVAL_HOURS", "24"))
+SNAPSHOT_KEEP = int(os.environ.get("FINANCIALIZE_SNAPSHOT_KEEP", "7"))
+# Pages copied per backup step, and the pause between steps that lets writers in
+SNAPSHOT_STEP_PAGES = int(os.environ.get("FINANCIALIZE_SNAPSHOT_STEP_PAGES", "256"))
+SNAPSHOT_STEP_PAUSE_MS = float(os.environ.get("FINANCIALIZE_SNAPSHOT_STEP_PAUSE_MS", "2"))
+
+# Server processes sharing one database (the launcher's --server mode sets this
+# for its workers). Above 1, each worker drops its in-memory caches whenever
+# another connection commits, and the launcher runs the snapshot schedule.
+WORKERS = max(1, int(os.environ.get("FINANCIALIZE_WORKERS", "1")))
+# How long a connection waits for another process's write lock before failing
+SQLITE_BUSY_TIMEOUT_S = float(os.environ.get("FINANCIALIZE_SQLITE_BUSY_TIMEOUT_S", "30"))
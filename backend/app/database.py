@@ -1,10 +1,15 @@
 
 import sys
 import os
-from sqlalchemy import create_engine
+import sqlite3
+import threading
+from typing import Callable, Iterable
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+from .config import SQLITE_BUSY_TIMEOUT_S
+
 
 def _get_data_dir() -> str:
     """Return a writable directory for the SQLite database.
@@ -21,13 +26,180 @@ DB_PATH = os.path.join(DATA_DIR, "financialize.db")
 SQLITE_URL = f"sqlite:///{DB_PATH}"
 
 engine = create_engine(
-    SQLITE_URL, connect_args={"check_same_thread": False}
+    SQLITE_URL, connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_S}
 )
+
+
+@event.listens_for(engine, "connect")
+def _enable_foreign_keys(dbapi_connection, _record):
+    # SQLite leaves FK enforcement (and ON DELETE actions) off per connection
+    dbapi_connection.execute("PRAGMA foreign_keys = ON")
+
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+# Bump whenever models or the migrations below change. Stored in SQLite's
+# PRAGMA user_version so up-to-date databases skip all schema checks.
+SCHEMA_VERSION = 6
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def _migrate(conn):
+    """Lightweight migration: add missing columns to existing tables."""
+    inspector = inspect(conn)
+    if "scenarios" in inspector.get_table_names():
+        columns = [col["name"] for col in inspector.get_columns("scenarios")]
+        if "data" not in columns:
+            conn.execute(text("ALTER TABLE scenarios ADD COLUMN data TEXT"))
+        if "created_at" not in columns:
+            conn.execute(text("ALTER TABLE scenarios ADD COLUMN created_at TEXT"))
+    if "accounts" in inspector.get_table_names():
+        acc_cols = [col["name"] for col in inspector.get_columns("accounts")]
+        for col_name, col_type in [("subtype", "TEXT"), ("description", "TEXT"), ("target_balance", "REAL"), ("currency", "TEXT"), ("person_id", "INTEGER"), ("interest_rate", "REAL"), ("minimum_payment", "REAL")]:
+            if col_name not in acc_cols:
+                conn.execute(text(f"ALTER TABLE accounts ADD COLUMN {col_name} {col_type}"))
+    _rebuild_foreign_keys(conn)
+    from .rollups import rebuild_rollups
+    rebuild_rollups(conn)
+
+
+def _rebuild_foreign_keys(conn):
+    """
+    SQLite can't alter constraints: tables created before ON DELETE actions
+    existed are rebuilt from the model (rename, create, copy, drop).
+    Runs with foreign_keys OFF and legacy_alter_table ON so renames don't
+    rewrite references in other tables.
+    """
+    inspector = inspect(conn)
+    existing = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing or not table.foreign_keys:
+            continue
+        if all(fk.get("options", {}).get("ondelete") for fk in inspector.get_foreign_keys(table.name)):
+            continue
+        old = f"{table.name}__old"
+        for index in inspector.get_indexes(table.name):
+            conn.execute(text(f'DROP INDEX "{index["name"]}"'))
+        conn.execute(text(f'ALTER TABLE "{table.name}" RENAME TO "{old}"'))
+        table.create(conn)
+        old_columns = {col["name"] for col in inspector.get_columns(old)}
+        columns = ", ".join(f'"{c.name}"' for c in table.columns if c.name in old_columns)
+        conn.execute(text(f'INSERT INTO "{table.name}" ({columns}) SELECT {columns} FROM "{old}"'))
+        conn.execute(text(f'DROP TABLE "{old}"'))
+
+
+def ensure_schema():
+    """
+    Create tables and run migrations once per process, and only when the
+    stored schema version is behind. Cheap after the first call.
+    """
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        from . import models  # noqa: F401 -- registers tables on Base
+        with engine.connect() as conn:
+            version = conn.execute(text("PRAGMA user_version")).scalar()
+            if version != SCHEMA_VERSION:
+                # These pragmas only take effect outside a transaction
+                conn.execute(text("PRAGMA foreign_keys = OFF"))
+                conn.execute(text("PRAGMA legacy_alter_table = ON"))
+                try:
+                    Base.metadata.create_all(bind=conn)
+                    _migrate(conn)
+                    conn.execute(text(f"PRAGMA user_version = {SCHEMA_VERSION}"))
+                    conn.commit()
+                finally:
+                    conn.rollback()
+                    conn.execute(text("PRAGMA legacy_alter_table = OFF"))
+                    conn.execute(text("PRAGMA foreign_keys = ON"))
+        _schema_ready = True
+
+
+def recreate_tables(tables):
+    """
+    Empty tables by dropping and recreating them, then VACUUM to hand the
+    space back. Much faster than DELETE, which SQLite can't truncate when
+    foreign keys are enforced.
+    """
+    with engine.begin() as conn:
+        Base.metadata.drop_all(bind=conn, tables=tables)
+        Base.metadata.create_all(bind=conn, tables=tables)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM"))
+
+
+def schema_ready() -> bool:
+    return _schema_ready
+
+
+def enable_wal() -> str:
+    """
+    Switch the database to write-ahead logging (stored in the file, so once is
+    enough). Readers stop blocking the writer and vice versa, which several
+    server processes sharing the file need. Returns the journal mode in effect.
+    """
+    with engine.connect() as conn:
+        return conn.exec_driver_sql("PRAGMA journal_mode = WAL").scalar()
+
+
+def reset_schema_state():
+    """Forget the schema check, e.g. after the database file was replaced by a restore."""
+    global _schema_ready
+    with _schema_lock:
+        _schema_ready = False
+
+
+class _ExternalWrites:
+    """
+    PRAGMA data_version on a private, otherwise idle connection changes
+    whenever any other connection commits, from this process or another.
+    """
+    __slots__ = ("conn", "version", "invalidators", "lock")
+
+    def __init__(self, invalidators: Iterable[Callable[[], None]]):
+        self.conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None, timeout=SQLITE_BUSY_TIMEOUT_S)
+        self.version = self._read()
+        self.invalidators = tuple(invalidators)
+        self.lock = threading.Lock()
+
+    def _read(self) -> int:
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def sync(self):
+        with self.lock:
+            version = self._read()
+            if version == self.version:
+                return
+            self.version = version
+        for invalidate in self.invalidators:
+            invalidate()
+
+
+_external_writes = None
+
+
+def watch_external_writes(invalidators: Iterable[Callable[[], None]]):
+    """
+    Call `invalidators` before a request whenever the database changed since
+    the last one. With several server workers each keeps its own in-memory
+    caches of the same file; this drops them after another worker's write
+    (and after this worker's own, which is the price of not tracking which).
+    """
+    global _external_writes
+    _external_writes = _ExternalWrites(invalidators)
+
+
 def get_db():
+    ensure_schema()
+    if _external_writes is not None:
+        _external_writes.sync()
     db = SessionLocal()
     try:
         yield db
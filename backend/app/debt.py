@@ -0,0 +1,239 @@
+"""
+Debt Payoff
+-----------
+Monthly amortization of every liability under several payoff strategies at
+once. Balances live in one (strategies × debts) matrix kept in each
+strategy's priority order, so a month is a handful of array operations no
+matter how many debts or strategies are compared.
+
+- avalanche: minimums everywhere, the rest to the highest rate first
+- snowball:  minimums everywhere, the rest to the smallest balance first
+- minimum:   minimums only (the baseline; extra payments are not used)
+
+Avalanche and snowball keep paying the same monthly outlay (minimums +
+extra), so a paid-off debt's minimum rolls over to the next one. The money
+no longer needed for debt is the freed cash flow, which becomes projection
+events.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from . import models
+from .fx import get_fx_table
+from .logic import run_projection
+from .schemas import (
+    DebtInput, DebtPayoffRequest, DebtPayoffResponse, DebtResult, DebtStrategyResult, LifeEvent,
+)
+from .timeseries import get_series_store
+
+PAID_OFF = 0.005  # Half a cent
+DEFAULT_MINIMUM_PCT = 1.0  # Default minimum: interest + 1% of the balance
+DEFAULT_MINIMUM_FLOOR = 25.0
+
+
+def default_minimum(balance: float, interest_rate: float) -> float:
+    """Typical card-style minimum: this month's interest plus 1% of the balance."""
+    minimum = balance * (interest_rate / 1200 + DEFAULT_MINIMUM_PCT / 100)
+    return min(balance, max(minimum, DEFAULT_MINIMUM_FLOOR))
+
+
+def load_liabilities(db: Session) -> List[DebtInput]:
+    """Liability accounts with their latest balance, converted to the main currency."""
+    accounts = db.query(models.Account).filter(models.Account.type == "Liability").all()
+    fx = get_fx_table(db)
+    store = get_series_store(db)
+    debts = []
+    for account in accounts:
+        latest = store.latest(account.id)
+        if latest is None or not latest[1]:
+            continue
+        date, amount = latest
+        owed = abs(amount)
+        converted = abs(fx.convert(owed, account.currency, date))
+        scale = converted / owed
+        debts.append(DebtInput(
+            name=account.name,
+            balance=converted,
+            interest_rate=account.interest_rate or 0.0,
+            minimum_payment=account.minimum_payment * scale if account.minimum_payment is not None else None,
+            account_id=account.id,
+        ))
+    return debts
+
+
+def _priority(strategy: str, balances: np.ndarray, rates: np.ndarray) -> np.ndarray:
+    if strategy == "avalanche":
+        return np.lexsort((balances, -rates))  # Highest rate, ties to the smaller balance
+    if strategy == "snowball":
+        return np.lexsort((-rates, balances))  # Smallest balance, ties to the higher rate
+    return np.arange(len(balances))
+
+
+def amortize(
+    balances: np.ndarray,
+    rates: np.ndarray,
+    minimums: np.ndarray,
+    extra: float,
+    lump_sums: np.ndarray,
+    strategies: List[str],
+    months: int,
+) -> Dict[str, np.ndarray]:
+    """
+    Simulate `months` of payments for every strategy at once.
+    Returns per-debt (strategies × debts, original debt order) interest,
+    payments and payoff month (-1 = not paid), plus freed cash per month
+    (strategies × months).
+    """
+    n_debts = len(balances)
+    n_strategies = len(strategies)
+    outlay = float(minimums.sum()) + extra
+
+    # 1. Each strategy's debts in its own priority order
+    order = np.stack([_priority(s, balances, rates) for s in strategies])
+    balance = balances[order].astype(float)
+    monthly_rate = (rates / 1200.0)[order]
+    minimum = minimums[order]
+    rolls_over = np.array([s != "minimum" for s in strategies])
+
+    interest = np.zeros((n_strategies, n_debts))
+    paid = np.zeros((n_strategies, n_debts))
+    payoff = np.where(balance <= PAID_OFF, 0, -1)
+    freed = np.zeros((n_strategies, months))
+
+    # 2. Month by month: accrue, pay minimums, spread what's left by priority
+    for month in range(months):
+        if not (balance > PAID_OFF).any():
+            freed[:, month:] = outlay
+            freed[:, month:] += lump_sums[month:]
+            break
+        accrued = balance * monthly_rate
+        balance += accrued
+        interest += accrued
+
+        payment = np.minimum(minimum, balance)
+        balance -= payment
+        budget = np.where(rolls_over, outlay + lump_sums[month] - payment.sum(axis=1), 0.0)
+        owed_before = np.cumsum(balance, axis=1) - balance
+        allocated = np.clip(budget[:, None] - owed_before, 0.0, balance)
+        balance -= allocated
+        payment += allocated
+        paid += payment
+        freed[:, month] = outlay + lump_sums[month] - payment.sum(axis=1)
+
+        cleared = (balance <= PAID_OFF) & (payoff < 0)
+        payoff[cleared] = month + 1
+        balance[balance <= PAID_OFF] = 0.0
+
+    # 3. Back to the caller's debt order
+    restore = np.argsort(order, axis=1)
+    rows = np.arange(n_strategies)[:, None]
+    return {
+        "interest": interest[rows, restore],
+        "paid": paid[rows, restore],
+        "payoff": payoff[rows, restore],
+        "freed": freed,
+    }
+
+
+def freed_events(yearly: np.ndarray, strategy: str) -> List[LifeEvent]:
+    """Runs of equal yearly amounts become one recurring event."""
+    events = []
+    year = 0
+    while year < len(yearly):
+        amount = float(yearly[year])
+        end = year + 1
+        while end < len(yearly) and abs(yearly[end] - amount) < 0.01:
+            end += 1
+        if abs(amount) >= 0.01:
+            events.append(LifeEvent(
+                name=f"Freed debt payments ({strategy})",
+                year=year + 1,
+                amount=round(amount, 2),
+                is_recurring=end - year > 1,
+                duration=end - year,
+            ))
+        year = end
+    return events
+
+
+def calculate_debt_payoff(request: DebtPayoffRequest, debts: List[DebtInput]) -> DebtPayoffResponse:
+    strategies = list(dict.fromkeys(request.strategies))
+    if not debts:
+        return DebtPayoffResponse(monthly_outlay=0.0, strategies=[], message="No debts to pay off.")
+
+    # 1. Horizon covers the projection too, so freed cash reaches its last year
+    years = max(request.max_years, request.projection.years if request.projection else 0)
+    months = years * 12
+    balances = np.array([d.balance for d in debts])
+    rates = np.array([d.interest_rate for d in debts])
+    minimums = np.array([
+        d.minimum_payment if d.minimum_payment is not None else default_minimum(d.balance, d.interest_rate)
+        for d in debts
+    ])
+    lump_sums = np.zeros(months)
+    for lump in request.lump_sums:
+        if lump.month <= months:
+            lump_sums[lump.month - 1] += lump.amount
+
+    # 2. All strategies in one pass
+    result = amortize(balances, rates, minimums, request.extra_payment, lump_sums, strategies, months)
+    yearly_freed = result["freed"].reshape(len(strategies), years, 12).sum(axis=2)
+
+    # 3. Per-strategy summaries (+ projections with the freed cash invested)
+    summaries = []
+    projections = {}
+    for i, strategy in enumerate(strategies):
+        payoff = result["payoff"][i]
+        events = freed_events(yearly_freed[i], strategy)
+        summary = DebtStrategyResult(
+            strategy=strategy,
+            months_to_debt_free=int(payoff.max()) if (payoff >= 0).all() else None,
+            total_interest=round(float(result["interest"][i].sum()), 2),
+            total_paid=round(float(result["paid"][i].sum()), 2),
+            debts=[
+                DebtResult(
+                    name=debt.name,
+                    account_id=debt.account_id,
+                    payoff_month=int(payoff[j]) if payoff[j] >= 0 else None,
+                    interest_paid=round(float(result["interest"][i, j]), 2),
+                    total_paid=round(float(result["paid"][i, j]), 2),
+                )
+                for j, debt in enumerate(debts)
+            ],
+            freed_cash_flow=[round(float(v), 2) + 0.0 for v in yearly_freed[i]],
+            events=events,
+        )
+        if request.projection is not None:
+            plan = request.projection.model_copy(update={"events": request.projection.events + events})
+            projections[strategy] = run_projection(plan)
+            summary.final_net_worth = projections[strategy].final_net_worth
+        summaries.append(summary)
+
+    # 4. Recommend the cheapest strategy that actually finishes, then the fastest
+    finishing = [s for s in summaries if s.months_to_debt_free is not None]
+    best: Optional[DebtStrategyResult] = min(
+        finishing, key=lambda s: (s.total_interest, s.months_to_debt_free), default=None
+    )
+    baseline = next((s for s in summaries if s.strategy == "minimum"), None)
+    interest_saved = None
+    if best is not None and baseline is not None and baseline.months_to_debt_free is not None:
+        interest_saved = round(baseline.total_interest - best.total_interest, 2)
+
+    if best is None:
+        message = f"No strategy pays off these debts within {years} years; raise the payments."
+    else:
+        message = (
+            f"{best.strategy.capitalize()} is debt-free in {best.months_to_debt_free} months "
+            f"with {best.total_interest:,.0f} in interest."
+        )
+    return DebtPayoffResponse(
+        monthly_outlay=round(float(minimums.sum()) + request.extra_payment, 2),
+        strategies=summaries,
+        recommended=best.strategy if best else None,
+        interest_saved=interest_saved,
+        projection=projections[best.strategy].rows() if best and best.strategy in projections else None,
+        message=message,
+    )
@@ -0,0 +1,109 @@
+"""
+Growth Factor Tables
+--------------------
+Projections, milestones, forecast buying power and reverse planning all need
+``(1 + rate) ** arange(n)``. Slider-driven traffic reuses a handful of rates,
+so the arrays are computed once and shared across requests from a bounded
+LRU cache (FINANCIALIZE_FACTOR_CACHE_MB). Cached arrays are read-only;
+callers must copy before mutating.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from . import config
+
+MAX_BYTES = int(config.FACTOR_CACHE_MB * 1024 * 1024)
+
+
+class FactorCache:
+    """LRU of read-only factor arrays keyed by (rate, horizon), bounded by bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._arrays: "OrderedDict[Tuple[float, int], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, rate: float, n: int) -> np.ndarray:
+        key = (float(rate), int(n))
+        with self._lock:
+            arr = self._arrays.get(key)
+            if arr is not None:
+                self._arrays.move_to_end(key)
+                self.hits += 1
+                return arr
+            self.misses += 1
+
+        # Computed outside the lock; a concurrent miss just computes it twice
+        arr = (1 + key[0]) ** np.arange(key[1])
+        arr.setflags(write=False)
+        if arr.nbytes > self.max_bytes:
+            return arr
+
+        with self._lock:
+            if key not in self._arrays:
+                self._arrays[key] = arr
+                self.nbytes += arr.nbytes
+                while self.nbytes > self.max_bytes:
+                    _, evicted = self._arrays.popitem(last=False)
+                    self.nbytes -= evicted.nbytes
+                    self.evictions += 1
+        return arr
+
+    def clear(self):
+        with self._lock:
+            self._arrays.clear()
+            self.nbytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._arrays),
+                "bytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_cache = FactorCache(MAX_BYTES)
+
+
+def growth_factors(rate: float, n: int) -> np.ndarray:
+    """Read-only ``(1 + rate) ** [0, 1, ..., n-1]``; divide by it to discount."""
+    return _cache.get(rate, n)
+
+
+def cache_stats() -> Dict[str, int]:
+    return _cache.stats()
+
+
+def clear_cache():
+    _cache.clear()
+
+
+def render_prometheus() -> List[str]:
+    stats = _cache.stats()
+    return [
+        "# HELP financialize_factor_cache_lookups_total Growth factor table lookups.",
+        "# TYPE financialize_factor_cache_lookups_total counter",
+        f'financialize_factor_cache_lookups_total{{result="hit"}} {stats["hits"]}',
+        f'financialize_factor_cache_lookups_total{{result="miss"}} {stats["misses"]}',
+        "# HELP financialize_factor_cache_evictions_total Tables evicted to stay within budget.",
+        "# TYPE financialize_factor_cache_evictions_total counter",
+        f"financialize_factor_cache_evictions_total {stats['evictions']}",
+        "# HELP financialize_factor_cache_bytes Memory held by cached tables.",
+        "# TYPE financialize_factor_cache_bytes gauge",
+        f"financialize_factor_cache_bytes {stats['bytes']}",
+        "# HELP financialize_factor_cache_entries Cached tables.",
+        "# TYPE financialize_factor_cache_entries gauge",
+        f"financialize_factor_cache_entries {stats['entries']}",
+    ]
@@ -0,0 +1,103 @@
+"""
+FX rate table
+-------------
+Rates are stored locally (imported from CSV, never fetched) as
+"units of main currency per 1 unit of `currency`" on a given date, matching
+the client's exchange-rate setting. Conversion is as-of: the latest rate on or
+before the date, or the earliest rate for dates before the table starts.
+Currencies without rates are left unconverted.
+
+The table is loaded from the DB once into per-currency sorted NumPy arrays and
+shared across requests until rates change.
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from . import models
+
+
+def to_day_numbers(dates) -> np.ndarray:
+    """ISO 'YYYY-MM-DD' strings -> int days since epoch (parsed in C, not per-row strptime)."""
+    return np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+
+
+class FxTable:
+    def __init__(self, rows: Iterable[Tuple[str, str, float]]):
+        """rows: (currency, date, rate)"""
+        by_currency: Dict[str, List[Tuple[str, float]]] = {}
+        for currency, date, rate in rows:
+            by_currency.setdefault(currency.upper(), []).append((date, rate))
+        self._days: Dict[str, np.ndarray] = {}
+        self._rates: Dict[str, np.ndarray] = {}
+        for currency, points in by_currency.items():
+            points.sort()
+            self._days[currency] = to_day_numbers([d for d, _ in points])
+            self._rates[currency] = np.array([r for _, r in points], dtype=float)
+        self._memo: Dict[Tuple[str, str], float] = {}
+
+    @property
+    def currencies(self) -> List[str]:
+        return sorted(self._days)
+
+    def has(self, currency: Optional[str]) -> bool:
+        return bool(currency) and currency.upper() in self._days
+
+    def rates_on(self, currency: Optional[str], days: np.ndarray) -> np.ndarray:
+        """As-of rates for many day numbers at once (one searchsorted)."""
+        if not self.has(currency):
+            return np.ones(len(days))
+        key = currency.upper()
+        idx = np.searchsorted(self._days[key], days, side="right") - 1
+        return self._rates[key][np.maximum(idx, 0)]
+
+    def rate_on(self, currency: Optional[str], date: str) -> float:
+        """Scalar as-of rate, memoized per (currency, date)."""
+        if not self.has(currency):
+            return 1.0
+        key = (currency.upper(), date)
+        rate = self._memo.get(key)
+        if rate is None:
+            rate = float(self.rates_on(currency, to_day_numbers([date]))[0])
+            self._memo[key] = rate
+        return rate
+
+    def convert(self, amount: float, currency: Optional[str], date: str) -> float:
+        return amount * self.rate_on(currency, date)
+
+    def convert_columns(self, matrix: np.ndarray, column_currencies: List[Optional[str]], days: np.ndarray) -> np.ndarray:
+        """Convert a (dates x accounts) balance matrix; one rate lookup per currency, not per cell."""
+        converted = matrix.copy()
+        for currency in set(column_currencies):
+            if not self.has(currency):
+                continue
+            cols = [i for i, c in enumerate(column_currencies) if c == currency]
+            converted[:, cols] *= self.rates_on(currency, days)[:, None]
+        return converted
+
+
+_table: Optional[FxTable] = None
+_lock = threading.Lock()
+
+
+def get_fx_table(db: Session) -> FxTable:
+    """Shared in-memory rate table, loaded on first use."""
+    global _table
+    table = _table
+    if table is None:
+        with _lock:
+            if _table is None:
+                rows = db.query(models.FxRate.currency, models.FxRate.date, models.FxRate.rate).all()
+                _table = FxTable(rows)
+            table = _table
+    return table
+
+
+def invalidate_fx_table():
+    """Drop the cached table after rates change."""
+    global _table
+    with _lock:
+        _table = None
@@ -1,40 +1,36 @@
-
 import math
-from datetime import datetime
+from dataclasses import dataclass
+from statistics import NormalDist
 
 import numpy as np
-import pandas as pd
-from typing import List, Dict
+from typing import List, Dict, NamedTuple, Optional, Tuple
 from .schemas import (
-    ProjectionRequest, YearProjection, Milestone,
+    ProjectionRequest, YearProjection, Milestone, MilestoneRule,
     FIRERequest, FIREResponse,
-    ForecastRequest, ForecastResponse,
+    WithdrawalRequest, WithdrawalResponse, WithdrawalPercentile,
+    ForecastRequest, ForecastResponse, ForecastInterval,
+    GroupedForecastRequest, GroupedForecastResponse, GroupForecast,
+    BacktestYear, ScenarioBacktest, BacktestResponse,
+    GoalProgress, GoalsResponse,
 )
+from .factors import growth_factors
+from .fx import FxTable, to_day_numbers
+from .metrics import span
 
-def calculate_projections(request: ProjectionRequest) -> List[YearProjection]:
+def _project_annual(request: ProjectionRequest, initial_monthly_savings: float):
+    """Legacy annual engine: one compounding step per year, contributions at year end."""
     years = request.years
     
-    # 1. Calculate Baselines (Monthly)
-    total_monthly_income = sum(i.amount for i in request.incomes)
-    
-    # Calculate Expenses based on percentages
-    total_monthly_expense_rate = sum(e.percentage for e in request.expenses) / 100.0
-    initial_monthly_expense = total_monthly_income * total_monthly_expense_rate
-    initial_monthly_savings = total_monthly_income - initial_monthly_expense
-    
     # 2. Vector Setup (Annual)
     n_periods = years + 1
-    year_arr = np.arange(n_periods)
     
     # Rates (Scalar)
     raise_rate = request.annual_raise / 100.0
     return_rate = request.market_return / 100.0
-    inflation_rate = request.inflation / 100.0
     
     # 3. Growth Logic
-    # Annual Income grows by raise_rate
-    annual_income_arr = (total_monthly_income * 12) * ((1 + raise_rate) ** year_arr)
-    annual_contribution_arr = (initial_monthly_savings * 12) * ((1 + raise_rate) ** year_arr)
+    # Annual contribution grows by raise_rate
+    annual_contribution_arr = (initial_monthly_savings * 12) * growth_factors(raise_rate, n_periods)
     
     # 4. Investment Growth (Iterative for Principal + Interest + Events)
     net_worth_arr = np.zeros(n_periods)
@@ -83,110 +79,299 @@ def calculate_projections(request: ProjectionRequest) -> List[YearProjection]:
         
         net_worth_arr[i] = end_bal
         
-    # 5. Inflation Adjustment
-    buying_power_arr = net_worth_arr / ((1 + inflation_rate) ** year_arr)
+    return net_worth_arr, annual_contribution_arr, interest_earned_arr, events_value_arr
+
+
+def _event_step_index(event_year: np.ndarray, month, steps_per_year: int) -> np.ndarray:
+    """Map (year, month) to the 1-based step at which an event lands.
+
+    Without a month the event lands on the last step of its year, matching
+    the annual engine's end-of-year semantics.
+    """
+    if month is None:
+        offset = steps_per_year
+    else:
+        offset = max(1, math.ceil(month * steps_per_year / 12))
+    return (event_year - 1) * steps_per_year + offset
+
+
+def _stepped_balances(request: ProjectionRequest, initial_monthly_savings: float):
+    """Per-step (contributions, events, balances) for the sub-annual engine."""
+    years = request.years
+    steps = request.steps_per_year
+    n_steps = years * steps
     
-    # 6. Milestone Calculation
-    milestones = []
+    raise_rate = request.annual_raise / 100.0
+    step_rate = request.market_return / 100.0 / steps
     
-    # Flags to ensure we only capture the *first* time we cross a threshold
-    crossed_zero = False
-    crossed_100k = False
-    crossed_1m = False
+    # 1. Per-step contributions. Raises still land once a year, so every
+    # step of year y (1-based) contributes the year-y monthly savings.
+    step_arr = np.arange(1, n_steps + 1)
+    step_year_arr = (step_arr - 1) // steps + 1
+    contribution_steps = (initial_monthly_savings * 12 / steps) * growth_factors(raise_rate, years + 1)[step_year_arr]
     
-    cur = getattr(request, 'currency', '$')
+    # 2. Per-step events (scatter-add so overlapping events accumulate)
+    event_steps = np.zeros(n_steps + 1)
+    for event in request.events:
+        if event.is_recurring:
+            event_years = np.arange(event.year, event.year + event.duration)
+        else:
+            event_years = np.array([event.year])
+        event_years = event_years[(event_years >= 1) & (event_years <= years)]
+        if event_years.size:
+            idx = _event_step_index(event_years, event.month, steps)
+            np.add.at(event_steps, idx, event.amount)
+    event_steps = event_steps[1:]
     
-    # Calculate approx Coast FIRE & FI thresholds (Simplified logic)
-    # FI Number is usually 25x annual spend. But we don't know annual spend here directly?
-    # We can infer spend = Income - Savings.
-    spending_rate = 1.0 - total_monthly_expense_rate # Wait, expense_rate is EXPENSES.
-    # Actually: initial_monthly_expense is the spend.
-    current_annual_spend = initial_monthly_expense * 12
-    # Adjust spend for inflation? Yes.
+    # 3. Closed-form recurrence B[t] = B[t-1] * g + x[t]
+    #    => B[t] = g^t * (B0 + sum_{k<=t} x[k] / g^k)
+    growth_pow = growth_factors(step_rate, n_steps + 1)[1:]
+    flows = contribution_steps + event_steps
+    balance_steps = growth_pow * (request.current_savings + np.cumsum(flows / growth_pow))
+    return contribution_steps, event_steps, balance_steps
+
+
+def _project_stepped(request: ProjectionRequest, initial_monthly_savings: float):
+    """
+    Sub-annual engine: compounds, contributes and applies events every step
+    (12 steps/year = monthly), fully vectorized over years * steps_per_year
+    periods, then downsampled to one row per year.
+    """
+    years = request.years
+    steps = request.steps_per_year
+    contribution_steps, event_steps, balance_steps = _stepped_balances(request, initial_monthly_savings)
     
-    fi_number_current = current_annual_spend * 25 # Rule of 25
+    # 4. Downsample to yearly rows (row 0 is the starting balance)
+    net_worth_arr = np.empty(years + 1)
+    net_worth_arr[0] = request.current_savings
+    net_worth_arr[1:] = balance_steps[steps - 1::steps]
     
-    crossed_fi = False
-    crossed_coast = False
+    annual_contribution_arr = np.zeros(years + 1)
+    events_value_arr = np.zeros(years + 1)
+    if years > 0:
+        annual_contribution_arr[1:] = contribution_steps.reshape(years, steps).sum(axis=1)
+        events_value_arr[1:] = event_steps.reshape(years, steps).sum(axis=1)
+    # Year 0 mirrors the annual engine: the run-rate contribution, nothing earned yet
+    annual_contribution_arr[0] = initial_monthly_savings * 12
     
-    for i in range(n_periods):
-        nw = net_worth_arr[i]
-        
-        # Debt Free
-        if nw >= 0 and not crossed_zero and current_balance < 0:
-            crossed_zero = True
-            milestones.append(Milestone(name="Debt Free", year=i, net_worth=nw, message="You are back to zero!"))
-            
-        # 100k (The Hardest Milestone)
-        if nw >= 100000 and not crossed_100k:
-            crossed_100k = True
-            milestones.append(Milestone(name=f"{cur}100k Club", year=i, net_worth=nw, message="The hardest 100k is done."))
-
-        # 1M
-        if nw >= 1000000 and not crossed_1m:
-            crossed_1m = True
-            milestones.append(Milestone(name=f"{cur}1M Club", year=i, net_worth=nw, message="Two comma club."))
-            
-        # FI (Financial Independence)
-        # We need to compare against the inflated FI number for that year
-        future_annual_spend = current_annual_spend * ((1 + inflation_rate) ** i)
-        future_fi_number = future_annual_spend * 25
-        
-        if nw >= future_fi_number and not crossed_fi and i > 0:
-            crossed_fi = True
-            milestones.append(Milestone(name="Financial Independence", year=i, net_worth=nw, message="Passive income covers expenses."))
-
-        # Coast FIRE
-        # Complex to calc iteratively without sub-loops. Skip for MVP or add if user insists.
-        # User requested it: "Coast FIRE (Investment returns > Contribution)"
-        # Definition: Investment Returns > Contribution ? 
-        # Or "Assets > Coast Number"? 
-        # User definition: "Investment returns > Contribution".
-        # Let's check that.
-        if interest_earned_arr[i] > annual_contribution_arr[i] and annual_contribution_arr[i] > 0 and not crossed_coast:
-            crossed_coast = True
-            milestones.append(Milestone(name="Money Machine", year=i, net_worth=nw, message="Investment returns now exceed your contributions."))
-    
-    # 7. Format Output
-    projections = []
-    current_age = request.current_age
+    interest_earned_arr = np.zeros(years + 1)
+    interest_earned_arr[1:] = np.diff(net_worth_arr) - annual_contribution_arr[1:] - events_value_arr[1:]
     
-    for i in range(n_periods):
-        projections.append(YearProjection(
-            year=i,
-            age=current_age + i,
-            net_worth=round(float(net_worth_arr[i]), 2),
-            contribution=round(float(annual_contribution_arr[i]), 2),
-            interest_earned=round(float(interest_earned_arr[i]), 2),
-            buying_power=round(float(buying_power_arr[i]), 2),
-            events_value=round(float(events_value_arr[i]), 2)
-        ))
+    return net_worth_arr, annual_contribution_arr, interest_earned_arr, events_value_arr
+
+
+def project_contribution_stream(request: ProjectionRequest, monthly_amount: float = 1.0, steps_per_year: int = 12) -> np.ndarray:
+    """Yearly balances of a flat monthly contribution alone (no savings, raises or events)."""
+    stream_request = request.model_copy(update={
+        "current_savings": 0.0,
+        "events": [],
+        "annual_raise": 0.0,
+        "steps_per_year": steps_per_year,
+    })
+    return _project_stepped(stream_request, monthly_amount)[0]
+
+def project_balance_path(request: ProjectionRequest) -> np.ndarray:
+    """Nominal balance at every compounding step, row 0 = start (years * steps_per_year + 1)."""
+    total_monthly_income = sum(i.amount for i in request.incomes)
+    initial_monthly_savings = total_monthly_income - total_monthly_income * sum(e.percentage for e in request.expenses) / 100.0
+    if request.steps_per_year == 1:
+        return _project_annual(request, initial_monthly_savings)[0]
+    balance_steps = _stepped_balances(request, initial_monthly_savings)[2]
+    return np.concatenate(([request.current_savings], balance_steps))
+
+MILESTONE_METRICS = ("net_worth", "buying_power", "contribution", "interest_earned", "events_value")
+
+DEFAULT_MILESTONE_RULES = [
+    MilestoneRule(name="Debt Free", message="You are back to zero!", from_below=True),
+    MilestoneRule(name="{currency}100k Club", message="The hardest 100k is done.", threshold=100_000),
+    MilestoneRule(name="{currency}1M Club", message="Two comma club.", threshold=1_000_000),
+    # FI: net worth covers 25x (inflated) annual spend
+    MilestoneRule(name="Financial Independence", message="Passive income covers expenses.",
+                  spend_multiple=25, inflation_adjusted=True, min_year=1),
+    # Coast FIRE, as users defined it: investment returns > contribution
+    MilestoneRule(name="Money Machine", message="Investment returns now exceed your contributions.",
+                  metric="interest_earned", compare_to="contribution", strict=True),
+]
+
+def find_milestone_years(
+    series: Dict[str, np.ndarray],
+    rules: List[MilestoneRule],
+    annual_spend,
+    inflation_rate: float,
+) -> np.ndarray:
+    """
+    First year each rule is met, or -1 if never.
+
+    `series` maps MILESTONE_METRICS to arrays shaped (periods,) or
+    (scenarios, periods); `annual_spend` is a scalar or one per scenario.
+    Returns (rules,) or (scenarios, rules). All rules are evaluated in one
+    (scenarios, rules, periods) mask, so cost barely grows with rule count.
+    """
+    # 1. Stack metrics and gather one row per rule
+    stacked = np.stack([np.asarray(series[m], dtype=float) for m in MILESTONE_METRICS], axis=-2)
+    n_periods = stacked.shape[-1]
+    metric_idx = np.array([MILESTONE_METRICS.index(r.metric) for r in rules], dtype=int)
+    compare_idx = np.array([MILESTONE_METRICS.index(r.compare_to) if r.compare_to else 0 for r in rules], dtype=int)
+    has_compare = np.array([r.compare_to is not None for r in rules], dtype=bool)
+    values = stacked[..., metric_idx, :]
+
+    # 2. Threshold curves: fixed + spend multiple, optionally inflating
+    growth = growth_factors(inflation_rate, n_periods)
+    inflating = np.array([r.inflation_adjusted for r in rules], dtype=bool)[:, None]
+    factor = np.where(inflating, growth, 1.0)
+    fixed = np.array([r.threshold for r in rules])[:, None]
+    multiple = np.array([r.spend_multiple or 0.0 for r in rules])[:, None]
+    spend = np.asarray(annual_spend, dtype=float)[..., None, None]
+    thresholds = fixed * factor + multiple * (spend * factor)
+    compared = stacked[..., compare_idx, :]
+    thresholds = np.where(has_compare[:, None], compared, thresholds)
+
+    # 3. Boolean hit masks
+    strict = np.array([r.strict for r in rules], dtype=bool)[:, None]
+    hit = np.where(strict, values > thresholds, values >= thresholds)
+    hit &= np.where(has_compare[:, None], compared > 0, True)
+    from_below = np.array([r.from_below for r in rules], dtype=bool)
+    hit &= ~(from_below & hit[..., 0])[..., None]
+    hit &= np.arange(n_periods) >= np.array([r.min_year for r in rules])[:, None]
+
+    # 4. First crossing
+    return np.where(hit.any(axis=-1), hit.argmax(axis=-1), -1)
+
+PROJECTION_SERIES = ("net_worth", "contribution", "interest_earned", "buying_power", "events_value")
+
+
+@dataclass(frozen=True, slots=True)
+class ProjectionResult:
+    """
+    Projection engine output: one array per YearProjection series (index =
+    year) and the milestones hit, chronologically. Internal callers read the
+    arrays directly; rows are only built where a response leaves the app,
+    and FastAPI's response_model validates them there once.
+    """
+    start_age: int
+    net_worth: np.ndarray
+    contribution: np.ndarray
+    interest_earned: np.ndarray
+    buying_power: np.ndarray
+    events_value: np.ndarray
+    milestones: Tuple[Tuple[str, int, float, str], ...]  # (name, year, net_worth, message)
+
+    @property
+    def final_net_worth(self) -> float:
+        return round(float(self.net_worth[-1]), 2) if len(self.net_worth) else 0.0
+
+    @property
+    def final_buying_power(self) -> float:
+        return round(float(self.buying_power[-1]), 2) if len(self.buying_power) else 0.0
+
+    def columns(self) -> Dict[str, list]:
+        """JSON-ready columns keyed by YearProjection field, values rounded to cents."""
+        n_periods = len(self.net_worth)
+        columns = {"year": list(range(n_periods)), "age": list(range(self.start_age, self.start_age + n_periods))}
+        for name in PROJECTION_SERIES:
+            columns[name] = np.round(getattr(self, name), 2).tolist()
+        return columns
+
+    def rows(self) -> List[Dict]:
+        """YearProjection-shaped dicts."""
+        columns = self.columns()
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+    def milestone_dicts(self) -> List[Dict]:
+        return [
+            {"name": name, "year": year, "net_worth": net_worth, "message": message}
+            for name, year, net_worth, message in self.milestones
+        ]
+
+    def to_response(self) -> Dict:
+        """ProjectionResponse as plain data."""
+        return {
+            "data": self.rows(),
+            "final_net_worth": self.final_net_worth,
+            "final_buying_power": self.final_buying_power,
+            "milestones": self.milestone_dicts(),
+        }
+
+
+def run_projection(request: ProjectionRequest) -> ProjectionResult:
+    years = request.years
+    
+    # 1. Calculate Baselines (Monthly)
+    total_monthly_income = sum(i.amount for i in request.incomes)
+    
+    # Calculate Expenses based on percentages
+    total_monthly_expense_rate = sum(e.percentage for e in request.expenses) / 100.0
+    initial_monthly_expense = total_monthly_income * total_monthly_expense_rate
+    initial_monthly_savings = total_monthly_income - initial_monthly_expense
+    
+    n_periods = years + 1
+    inflation_rate = request.inflation / 100.0
+    
+    # 2-4. Growth engine (annual loop or vectorized sub-annual steps)
+    if request.steps_per_year > 1:
+        engine = _project_stepped
+    else:
+        engine = _project_annual
+    with span("projection"):
+        net_worth_arr, annual_contribution_arr, interest_earned_arr, events_value_arr = engine(
+            request, initial_monthly_savings
+        )
         
-    return projections, milestones
+    # 5. Inflation Adjustment
+    buying_power_arr = net_worth_arr / growth_factors(inflation_rate, n_periods)
+    
+    # 6. Milestone Calculation
+    with span("milestones"):
+        rules = request.milestone_rules if request.milestone_rules is not None else DEFAULT_MILESTONE_RULES
+        series = {
+            "net_worth": net_worth_arr,
+            "buying_power": buying_power_arr,
+            "contribution": annual_contribution_arr,
+            "interest_earned": interest_earned_arr,
+            "events_value": events_value_arr,
+        }
+        # FI spend is the initial expense, inflated per rule
+        hit_years = find_milestone_years(series, rules, initial_monthly_expense * 12, inflation_rate)
+
+        cur = getattr(request, 'currency', '$')
+        milestones = tuple(
+            (rules[r].name.replace("{currency}", cur), int(hit_years[r]), float(net_worth_arr[hit_years[r]]), rules[r].message)
+            # Chronological; rule order breaks ties
+            for r in sorted(np.flatnonzero(hit_years >= 0), key=lambda r: (hit_years[r], r))
+        )
+    
+    return ProjectionResult(
+        start_age=request.current_age,
+        net_worth=net_worth_arr,
+        contribution=annual_contribution_arr,
+        interest_earned=interest_earned_arr,
+        buying_power=buying_power_arr,
+        events_value=events_value_arr,
+        milestones=milestones,
+    )
 
-def _simulate_final_balance(
-    monthly_contribution: float,
+def calculate_projections(request: ProjectionRequest) -> Tuple[List[YearProjection], List[Milestone]]:
+    """run_projection as pydantic models, for callers that want them."""
+    result = run_projection(request)
+    with span("serialize"):
+        return [YearProjection(**row) for row in result.rows()], [Milestone(**m) for m in result.milestone_dicts()]
+
+def _final_balance_terms(
     current_savings: float,
     years: int,
     annual_raise: float,
     market_return: float,
-    inflation: float
-) -> float:
-    """Helper: Fast scalar loop to find final NOMINAL balance"""
-    n_periods = years + 1
-    raise_rate = annual_raise / 100.0
-    return_rate = market_return / 100.0
-    
-    net_worth = current_savings
-    current_monthly_contribution = monthly_contribution
-    
-    for i in range(1, n_periods):
-        interest = net_worth * return_rate
-        contribution = current_monthly_contribution * 12
-        net_worth = net_worth + interest + contribution
-        current_monthly_contribution *= (1 + raise_rate)
-        
-    return net_worth
+) -> tuple:
+    """
+    Final NOMINAL balance is linear in the monthly contribution m:
+    base + m * per_dollar, with end-of-year contributions raised yearly.
+    """
+    raise_factors = growth_factors(annual_raise / 100.0, years)
+    return_factors = growth_factors(market_return / 100.0, years + 1)
+    base = current_savings * return_factors[years]
+    # Year i's contribution (raised i-1 times) compounds for years - i years
+    per_dollar = 12 * float(raise_factors @ return_factors[:years][::-1])
+    return base, per_dollar
 
 def calculate_required_savings(
     current_savings: float,
@@ -205,12 +390,13 @@ def calculate_required_savings(
     iterations = 0
     max_iter = 100
     
-    if _simulate_final_balance(0, current_savings, years, annual_raise, market_return, inflation) >= target_net_worth:
+    base, per_dollar = _final_balance_terms(current_savings, years, annual_raise, market_return)
+    if base >= target_net_worth:
         return 0.0
         
     while high - low > epsilon and iterations < max_iter:
         mid = (low + high) / 2
-        final_bal = _simulate_final_balance(mid, current_savings, years, annual_raise, market_return, inflation)
+        final_bal = base + mid * per_dollar
         
         if final_bal < target_net_worth:
             low = mid
@@ -221,6 +407,26 @@ def calculate_required_savings(
     return round(high, 2)
 
 
+def _years_to_target(balance: float, annual_contribution: float, target: float, rate: float):
+    """
+    Solve B*(1+r)^n + C*((1+r)^n - 1)/r = target for n (end-of-year contributions).
+    Returns None when the target is never reached.
+    """
+    if balance >= target:
+        return 0.0
+    if rate == 0:
+        return (target - balance) / annual_contribution if annual_contribution > 0 else None
+    # (1+r)^n = (target + C/r) / (B + C/r)
+    k = annual_contribution / rate
+    if balance + k == 0:
+        return None
+    ratio = (target + k) / (balance + k)
+    if ratio <= 0 or rate <= -1:
+        return None
+    n = math.log(ratio) / math.log(1 + rate)
+    return n if n >= 0 else None
+
+
 def calculate_fire_numbers(request: FIRERequest) -> FIREResponse:
     swr = request.safe_withdrawal_rate / 100.0
     annual_spend = request.annual_spend
@@ -233,29 +439,7 @@ def calculate_fire_numbers(request: FIRERequest) -> FIREResponse:
     current_net_worth = request.current_net_worth
     current_swr = (annual_spend / current_net_worth * 100) if current_net_worth > 0 else 0
     
-    # 3. Years to FIRE
-    # Solving for n in FV formula is hard with growing contributions.
-    # We will simulate loop until we hit fire_number.
-    # Assumption: User saves everything above spend? 
-    # Or do we strictly base it on current logic? 
-    # The Request doesn't include income, so we can't know savings rate for this specific calc.
-    # WE NEED SAVINGS RATE or CONTRIBUTION. 
-    # If we don't have it, we return -1 or estimate based on investment growth only?
-    # BUT, the FE usually has access to savings.
-    # For this function, let's assume we can't calculate years perfectly without Income data.
-    # OR, we might just project based on "Growth Only" if no contribution provided?
-    # Actually, let's assume the user is saving *something*. 
-    # Let's say we assume NO further contributions for a "Coast FIRE" check, OR we need more inputs.
-    
-    # For now, let's return 0 years if already there. 
-    # If we lack inputs, we'll return a placeholder message or update schema.
-    # Re-reading Plan: "Add FIRE Station... Inputs: SWR, Annual Spend. Display: Freedom Number, Time to Freedom"
-    # To get "Time to Freedom", we NEED current savings rate. 
-    # I'll update schema implicitly or just return "N/A" for years if not enough info, 
-    # BUT I can pass 'current_savings_rate' or 'monthly_contribution' in FIRERequest to make it useful.
-    # I'll stick to schema for now (no extra inputs there yet).
-    # I'll return -1 or calculate based on Compounding only (Coast FIRE).
-    
+    # 3. Years to FIRE: growth plus monthly contributions if given, else growth only (Coast FIRE)
     years_to_fire = 0.0
     if current_net_worth >= fire_number:
         years_to_fire = 0
@@ -272,7 +456,16 @@ def calculate_fire_numbers(request: FIRERequest) -> FIREResponse:
         # Inflation adjusted return usually used for FIRE.
         real_r = (1 + r) / (1 + (request.inflation / 100.0)) - 1
         
-        if real_r <= 0:
+        if request.monthly_contribution and request.monthly_contribution > 0:
+            # True years-to-FIRE: growth plus ongoing (real) contributions
+            n = _years_to_target(current_net_worth, request.monthly_contribution * 12, fire_number, real_r)
+            if n is None:
+                years_to_fire = 999
+                msg = "At this savings level and return, the FIRE number is out of reach."
+            else:
+                years_to_fire = n
+                msg = "Years to FIRE at your current savings"
+        elif real_r <= 0:
              years_to_fire = 999
              msg = "With 0% or negative real return, you'll never coast there."
         else:
@@ -291,10 +484,233 @@ def calculate_fire_numbers(request: FIRERequest) -> FIREResponse:
     )
 
 
-def calculate_history_forecast(request: ForecastRequest, history_points: List[Dict], account_types: Dict[int, str] = None) -> ForecastResponse:
+def _withdrawal_return_paths(request: WithdrawalRequest) -> np.ndarray:
+    """(n_paths, years) matrix of annual returns as fractions."""
+    years = request.years
+    if request.historical_returns:
+        # Historical-style: every start year is a path, wrapping around the series
+        seq = np.asarray(request.historical_returns, dtype=float) / 100.0
+        starts = np.arange(len(seq))
+        idx = (starts[:, None] + np.arange(years)[None, :]) % len(seq)
+        return seq[idx]
+    rng = np.random.default_rng(request.seed)
+    return rng.normal(request.return_rate / 100.0, request.volatility / 100.0, size=(request.n_paths, years))
+
+
+def simulate_withdrawals(request: WithdrawalRequest) -> WithdrawalResponse:
+    """
+    Decumulation engine: withdraw at the start of each year, then apply that
+    year's return. Vectorized across all paths; loops only over years.
+    """
+    swr = request.safe_withdrawal_rate / 100.0
+    inflation_rate = request.inflation / 100.0
+    years = request.years
+    
+    returns = _withdrawal_return_paths(request)
+    n_paths = returns.shape[0]
+    
+    initial_withdrawal = request.annual_spend if request.annual_spend is not None else request.starting_portfolio * swr
+    initial_rate = initial_withdrawal / request.starting_portfolio if request.starting_portfolio > 0 else 0.0
+    upper_rate = initial_rate * (1 + request.guardrail_band / 100.0)
+    lower_rate = initial_rate * (1 - request.guardrail_band / 100.0)
+    adjustment = request.guardrail_adjustment / 100.0
+    
+    balance = np.full(n_paths, float(request.starting_portfolio))
+    withdrawal = np.full(n_paths, float(initial_withdrawal))
+    depletion_year = np.zeros(n_paths, dtype=int) # 0 = survived
+    balance_history = np.empty((years + 1, n_paths))
+    balance_history[0] = balance
+    
+    with span("simulation"):
+        for t in range(years):
+            alive = depletion_year == 0
+        
+            # 1. Withdrawal for this year
+            if request.strategy == "fixed_percent":
+                withdrawal = balance * swr
+            elif t > 0:
+                withdrawal = withdrawal * (1 + inflation_rate)
+                if request.strategy == "guardrail":
+                    with np.errstate(divide="ignore", invalid="ignore"):
+                        current_rate = np.where(balance > 0, withdrawal / balance, np.inf)
+                    withdrawal = np.where(current_rate > upper_rate, withdrawal * (1 - adjustment), withdrawal)
+                    withdrawal = np.where(current_rate < lower_rate, withdrawal * (1 + adjustment), withdrawal)
+        
+            # 2. Paths that cannot fund the full withdrawal deplete this year
+            short = alive & (balance < withdrawal)
+            depletion_year[short] = t + 1
+            balance = np.where(alive & ~short, (balance - withdrawal) * (1 + returns[:, t]), 0.0)
+            balance = np.maximum(balance, 0.0)
+            balance_history[t + 1] = balance
+        
+    # 3. Aggregate
+    depleted = depletion_year > 0
+    survival = 100.0 * (1 - depleted.mean())
+    histogram = np.bincount(depletion_year[depleted] - 1, minlength=years)
+    median_depletion = float(np.median(depletion_year[depleted])) if depleted.any() else None
+    
+    p10, p50, p90 = np.percentile(balance_history, [10, 50, 90], axis=1)
+    percentiles = [
+        WithdrawalPercentile(year=i, p10=round(float(p10[i]), 2), p50=round(float(p50[i]), 2), p90=round(float(p90[i]), 2))
+        for i in range(years + 1)
+    ]
+    
+    return WithdrawalResponse(
+        survival_probability=round(survival, 2),
+        n_paths=n_paths,
+        initial_withdrawal=round(float(initial_withdrawal), 2),
+        depletion_histogram=histogram.tolist(),
+        median_depletion_year=median_depletion,
+        median_final_balance=round(float(p50[-1]), 2),
+        percentiles=percentiles,
+        message=f"{round(survival)}% of {n_paths} simulated retirements lasted {years} years.",
+    )
+
+
+class _TrendFit(NamedTuple):
+    """Result of a forecast regression. `slope` is per day (log-space if log_space)."""
+    model: str
+    slope: float
+    r_squared: float
+    sigma: float    # Residual std dev (model space)
+    n: float        # (Effective) number of points
+    x_mean: float
+    sxx: float      # Sum of squared x deviations
+    log_space: bool = False
+    note: str = ""  # Set when the requested model couldn't be fitted
+
+
+def _linear_stats(model: str, x: np.ndarray, y: np.ndarray, slope: float, intercept: float) -> _TrendFit:
+    residuals = y - (slope * x + intercept)
+    n = len(x)
+    ss_res = float(residuals @ residuals)
+    ss_tot = float(((y - y.mean()) ** 2).sum())
+    r_squared = max(0.0, 1 - ss_res / ss_tot) if ss_tot > 0 else 0.0
+    sigma = math.sqrt(ss_res / (n - 2)) if n > 2 else 0.0
+    x_mean = float(x.mean())
+    return _TrendFit(model, float(slope), r_squared, sigma, n, x_mean, float(((x - x_mean) ** 2).sum()))
+
+
+def _fit_linear(x: np.ndarray, y: np.ndarray) -> _TrendFit:
+    """Ordinary least squares over every point (the original forecast)."""
+    slope, intercept = np.polyfit(x, y, 1) # slope = growth per day
+    fit = _linear_stats("linear", x, y, slope, intercept)
+    # Correlation coeff
+    correlation_xy = np.corrcoef(x, y)[0, 1]
+    return fit._replace(r_squared=float(correlation_xy ** 2))
+
+
+def _fit_weighted(x: np.ndarray, y: np.ndarray, half_life_days: float) -> _TrendFit:
+    """Weighted least squares with exponentially decaying weight on older points."""
+    w = 0.5 ** ((x[-1] - x) / half_life_days)
+    sw = w.sum()
+    x_mean = (w @ x) / sw
+    y_mean = (w @ y) / sw
+    dx = x - x_mean
+    sxx_w = w @ (dx * dx)
+    slope = (w @ (dx * (y - y_mean))) / sxx_w if sxx_w > 0 else 0.0
+    residuals = y - y_mean - slope * dx
+    ss_res = w @ (residuals * residuals)
+    ss_tot = w @ ((y - y_mean) ** 2)
+    n_eff = sw ** 2 / (w @ w)
+    sigma = math.sqrt(ss_res / sw * n_eff / (n_eff - 2)) if n_eff > 2 else 0.0
+    r_squared = max(0.0, 1 - ss_res / ss_tot) if ss_tot > 0 else 0.0
+    return _TrendFit("weighted", float(slope), float(r_squared), sigma, n_eff, float(x_mean), float(sxx_w / sw * n_eff))
+
+
+def _fit_exponential(x: np.ndarray, y: np.ndarray) -> _TrendFit:
+    """Log-linear fit: constant percentage growth. Needs positive values."""
+    positive = y > 0
+    if positive.sum() < 2:
+        return _fit_linear(x, y)._replace(note="Exponential needs positive net worth; fell back to linear.")
+    xp, log_y = x[positive], np.log(y[positive])
+    slope, intercept = np.polyfit(xp, log_y, 1)
+    return _linear_stats("exponential", xp, log_y, slope, intercept)._replace(log_space=True)
+
+
+def _fit_theil_sen(x: np.ndarray, y: np.ndarray, max_pairs: int = 1_000_000) -> _TrendFit:
+    """
+    Theil-Sen: median of pairwise slopes, robust to one-off jumps.
+    Exact for small histories; beyond max_pairs a fixed-seed random sample of
+    pairs keeps it linear in n.
+    """
+    n = len(x)
+    if n * (n - 1) // 2 <= max_pairs:
+        i, j = np.triu_indices(n, k=1)
+    else:
+        rng = np.random.default_rng(0)
+        i = rng.integers(0, n, max_pairs)
+        j = rng.integers(0, n, max_pairs)
+    dx = x[j] - x[i]
+    valid = dx != 0
+    slope = float(np.median((y[j] - y[i])[valid] / dx[valid])) if valid.any() else 0.0
+    intercept = float(np.median(y - slope * x))
+    fit = _linear_stats("theil_sen", x, y, slope, intercept)
+    # Robust spread: scaled median absolute deviation of the residuals
+    residuals = y - (slope * x + intercept)
+    mad_sigma = 1.4826 * float(np.median(np.abs(residuals - np.median(residuals))))
+    return fit._replace(sigma=mad_sigma)
+
+
+def _fit_rolling(x: np.ndarray, y: np.ndarray, window_days: int) -> _TrendFit:
+    """Least squares over the most recent window only."""
+    recent = x >= x[-1] - window_days
+    if recent.sum() < 2:
+        recent[-2:] = True
+    slope, intercept = np.polyfit(x[recent], y[recent], 1)
+    return _linear_stats("rolling", x[recent], y[recent], slope, intercept)
+
+
+def _fit_seasonal(x: np.ndarray, y: np.ndarray) -> _TrendFit:
+    """Linear trend plus an annual sine/cosine cycle, so yearly patterns don't bias the slope."""
+    if len(x) < 5:
+        return _fit_linear(x, y)._replace(note="Seasonal needs at least 5 data points; fell back to linear.")
+    angle = 2 * np.pi * x / 365.25
+    design = np.column_stack([np.ones_like(angle), x, np.sin(angle), np.cos(angle)])
+    coef, *_ = np.linalg.lstsq(design, y, rcond=None)
+    residuals = y - design @ coef
+    n = len(x)
+    ss_res = float(residuals @ residuals)
+    ss_tot = float(((y - y.mean()) ** 2).sum())
+    x_mean = float(x.mean())
+    return _TrendFit(
+        "seasonal", float(coef[1]),
+        max(0.0, 1 - ss_res / ss_tot) if ss_tot > 0 else 0.0,
+        math.sqrt(ss_res / (n - 4)) if n > 4 else 0.0,
+        n, x_mean, float(((x - x_mean) ** 2).sum()),
+    )
+
+
+def _fit_trend(request: ForecastRequest, x: np.ndarray, y: np.ndarray) -> _TrendFit:
+    """Dispatch to the requested regression model."""
+    x = x.astype(float)
+    if len(x) < 2:
+        return _TrendFit(request.model, 0.0, 0.0, 0.0, 1, float(x[0]), 0.0)
+    if request.model == "weighted":
+        return _fit_weighted(x, y, request.half_life_days)
+    if request.model == "exponential":
+        return _fit_exponential(x, y)
+    if request.model == "theil_sen":
+        return _fit_theil_sen(x, y)
+    if request.model == "rolling":
+        return _fit_rolling(x, y, request.window_days)
+    if request.model == "seasonal":
+        return _fit_seasonal(x, y)
+    return _fit_linear(x, y)
+
+
+def calculate_history_forecast(
+    request: ForecastRequest,
+    history_points: List[Dict],
+    account_types: Dict[int, str] = None,
+    account_currencies: Dict[int, str] = None,
+    fx: Optional[FxTable] = None,
+) -> ForecastResponse:
     """
     history_points: List[ {'date': 'YYYY-MM-DD', 'amount': float} ]
     Must be sorted by date ideally, or we sort here.
+    With `fx` and `account_currencies`, foreign balances are converted to the
+    main currency at each replay date's rate.
     """
     if len(history_points) < 2:
         return ForecastResponse(
@@ -306,115 +722,545 @@ def calculate_history_forecast(request: ForecastRequest, history_points: List[Di
         )
 
     # 1. Prepare Data
-    # Convert dates to ordinals (integers)
-    # Group by date to get daily total net worth?
     # history_points is usually BalanceEntry which is per account. 
     # We need aggregated Net Worth per Date.
-    
-    # Sort and build DataFrame from sorted data for correct replay order
-    sorted_points = sorted(history_points, key=lambda x: x['date'])
-    df = pd.DataFrame(sorted_points)
-    
-    if account_types is None:
-        account_types = {}
-    
-    # Replay Logic - track each account's latest balance
-    all_account_ids = df['account_id'].unique()
-    account_states = {aid: 0.0 for aid in all_account_ids}
-    
-    timeline = []
-    grouped = df.groupby('date')
-    
-    for date_str, group in grouped:
-        for _, row in group.iterrows():
-            account_states[row['account_id']] = row['amount']
-        
-        # Calculate net worth: subtract liabilities
-        total_nw = 0.0
-        for aid, bal in account_states.items():
-            if account_types.get(aid) == 'Liability':
-                total_nw -= bal
-            else:
-                total_nw += bal
-        timeline.append({'date': datetime.strptime(date_str, "%Y-%m-%d"), 'value': total_nw})
-        
-    if not timeline:
+    replay_days, net_worth = net_worth_timeline(history_points, account_types, account_currencies, fx)
+    return forecast_from_timeline(request, replay_days, net_worth)
+
+
+def forecast_from_timeline(request: ForecastRequest, replay_days: np.ndarray, net_worth: np.ndarray) -> ForecastResponse:
+    """Trend fit and projection of an already replayed (day numbers, net worth) series."""
+    if not len(replay_days):
         return ForecastResponse(monthly_growth=0, annual_growth_rate=0, r_squared=0, forecast_data=[], message="No valid timeline.")
+    if len(replay_days) < 2:
+        return ForecastResponse(
+            monthly_growth=0,
+            annual_growth_rate=0,
+            r_squared=0,
+            forecast_data=[],
+            message="Not enough data history to forecast. Need at least 2 entries."
+        )
         
     # Regression
     # X = Days since start
-    start_date = timeline[0]['date']
+    X = replay_days - replay_days[0]
+    y = net_worth
     
-    X = np.array([(p['date'] - start_date).days for p in timeline])
-    y = np.array([p['value'] for p in timeline])
-    
-    # Linear Fit
-    if len(X) > 1:
-        # A = np.vstack([X, np.ones(len(X))]).T
-        # m, c = np.linalg.lstsq(A, y, rcond=None)[0]
-        
-        # Using simple polyfit
-        slope, intercept = np.polyfit(X, y, 1) # slope = growth per day
-        
-        # Stats
-        # Correlation coeff
-        correlation_matrix = np.corrcoef(X, y)
-        correlation_xy = correlation_matrix[0,1]
-        r_squared = correlation_xy**2
-        
-    else:
-        slope, intercept = 0, y[0]
-        r_squared = 0
+    with span("regression"):
+        fit = _fit_trend(request, X, y)
+    r_squared = fit.r_squared
 
     # Project Future
     # Current Value (Last known)
     current_val = y[-1]
     
     # Growth Rates
-    daily_growth = slope
-    monthly_growth = daily_growth * 30.44
-    annual_growth = monthly_growth * 12
-    
-    # Generate Forecast Data
-    annual_growth_rate_percent = 0.0
-    if current_val != 0:
-        annual_growth_rate_percent = (annual_growth / current_val) * 100
-        
-    forecast_data = []
-    current_age = request.current_age
-    
-    for i in range(request.years + 1):
-        # Future Value = Current + (slope * days)
-        # Days = i * 365.25
-        future_days = i * 365.25
-        # Note: We project from the END of the history line (intercept should be current_val effectively for visualization continuity, 
-        # BUT mathematically we should project the trend line).
-        # User wants "Reality Check". If trend line is lower than current actual, it shows they are over-performing trend recently. 
-        # Let's project from the Last Actual Point, adding the 'slope' growth? 
-        # Or project the pure regression line?
-        # Usually "Forecasting" implies continuing the Trend.
-        # Let's stick to: Future(t) = LastActual + (DailyGrowth * t)
+    if fit.log_space:
+        monthly_growth = current_val * math.expm1(fit.slope * 30.44)
+        annual_growth_rate_percent = math.expm1(fit.slope * 365.25) * 100
+    else:
+        daily_growth = fit.slope
+        monthly_growth = daily_growth * 30.44
+        annual_growth = monthly_growth * 12
         
-        future_nw = current_val + (daily_growth * future_days)
+        annual_growth_rate_percent = 0.0
+        if current_val != 0:
+            annual_growth_rate_percent = (annual_growth / current_val) * 100
         
-        # Apply inflation adjustment for buying power
-        inflation_rate = getattr(request, 'inflation', 2.5) / 100.0
-        buying_power_val = future_nw / ((1 + inflation_rate) ** i) if i > 0 else future_nw
+    # Generate Forecast Data
+    # Future(t) = LastActual + trend growth over t, i.e. we continue the
+    # fitted trend from the last actual point rather than the regression line.
+    year_idx = np.arange(request.years + 1)
+    future_days = year_idx * 365.25
+    if fit.log_space:
+        future_nw_arr = current_val * np.exp(fit.slope * future_days)
+    else:
+        future_nw_arr = current_val + fit.slope * future_days
+    
+    # Prediction interval widens with distance from the fitted data's centre
+    z = NormalDist().inv_cdf(0.5 + request.confidence / 200.0)
+    x_future = X[-1] + future_days
+    leverage = 1 + 1 / fit.n + ((x_future - fit.x_mean) ** 2 / fit.sxx if fit.sxx > 0 else 0)
+    half_width = z * fit.sigma * np.sqrt(leverage)
+    half_width[0] = 0.0
+    if fit.log_space:
+        lower_arr = future_nw_arr * np.exp(-half_width)
+        upper_arr = future_nw_arr * np.exp(half_width)
+    else:
+        lower_arr = future_nw_arr - half_width
+        upper_arr = future_nw_arr + half_width
+    
+    # Apply inflation adjustment for buying power
+    inflation_rate = getattr(request, 'inflation', 2.5) / 100.0
+    buying_power_arr = future_nw_arr / growth_factors(inflation_rate, len(year_idx))
         
-        forecast_data.append(YearProjection(
-            year=i,
-            age=current_age + i,
-            net_worth=round(float(future_nw), 2),
-            contribution=0,
-            interest_earned=0,
-            buying_power=round(float(buying_power_val), 2),
-            events_value=0
-        ))
+    with span("serialize"):
+        forecast_data = []
+        intervals = []
+        current_age = request.current_age
+    
+        for i in range(request.years + 1):
+            forecast_data.append(YearProjection(
+                year=i,
+                age=current_age + i,
+                net_worth=round(float(future_nw_arr[i]), 2),
+                contribution=0,
+                interest_earned=0,
+                buying_power=round(float(buying_power_arr[i]), 2),
+                events_value=0
+            ))
+            intervals.append(ForecastInterval(
+                year=i,
+                lower=round(float(lower_arr[i]), 2),
+                upper=round(float(upper_arr[i]), 2),
+            ))
         
     return ForecastResponse(
         monthly_growth=round(monthly_growth, 2),
         annual_growth_rate=round(annual_growth_rate_percent, 2),
         r_squared=round(r_squared, 4),
         forecast_data=forecast_data,
-        message=f"Based on {len(timeline)} historical data points."
+        message=" ".join(filter(None, [f"Based on {len(replay_days)} historical data points.", fit.note])),
+        model=fit.model,
+        intervals=intervals,
     )
+
+
+def net_worth_timeline(
+    history_points: List[Dict],
+    account_types: Dict[int, str] = None,
+    account_currencies: Dict[int, str] = None,
+    fx: Optional[FxTable] = None,
+):
+    """
+    Net worth on every date with an entry: (day numbers, values). Each
+    account contributes its latest balance as of the date, converted with
+    the as-of FX rate when `fx` is given; liabilities count negative.
+    """
+    # Replay Logic - each account's latest balance as of every date
+    with span("replay"):
+        dates, account_ids, matrix = _balance_matrix(history_points)
+        replay_days = to_day_numbers(dates)
+    return replay_days, signed_net_worth(replay_days, account_ids, matrix, account_types, account_currencies, fx)
+
+
+def signed_net_worth(
+    days: np.ndarray,
+    account_ids: np.ndarray,
+    matrix: np.ndarray,
+    account_types: Dict[int, str] = None,
+    account_currencies: Dict[int, str] = None,
+    fx: Optional[FxTable] = None,
+) -> np.ndarray:
+    """Net worth per row of a (days x accounts) balance matrix; liabilities count negative."""
+    if account_types is None:
+        account_types = {}
+    ids = account_ids.tolist()
+
+    # As-of FX rates for every replay date, one vectorized lookup per currency
+    if fx is not None and account_currencies:
+        matrix = fx.convert_columns(matrix, [account_currencies.get(aid) for aid in ids], days)
+
+    # Calculate net worth: subtract liabilities
+    sign = np.array([-1.0 if account_types.get(aid) == 'Liability' else 1.0 for aid in ids])
+    return matrix @ sign
+
+
+def _balance_matrix(history_points: List[Dict]):
+    """
+    Replay balance entries into a forward-filled (dates x accounts) matrix.
+
+    Returns (dates, account_ids, matrix): sorted unique ISO date strings, the
+    account id for each column, and each account's latest known balance as of
+    each date (0 before its first entry). When an account has several entries
+    on one date the last one in input order wins, like the row-by-row replay.
+    """
+    dates_raw = np.array([p['date'] for p in history_points])
+    accounts_raw = np.array([p['account_id'] for p in history_points])
+    amounts = np.array([p['amount'] for p in history_points], dtype=float)
+    
+    dates, date_idx = np.unique(dates_raw, return_inverse=True)
+    account_ids, acc_idx = np.unique(accounts_raw, return_inverse=True)
+    n_dates, n_accounts = len(dates), len(account_ids)
+    
+    # Keep the last entry per (date, account) cell
+    cell = date_idx * n_accounts + acc_idx
+    _, last_rev = np.unique(cell[::-1], return_index=True)
+    last = len(cell) - 1 - last_rev
+    
+    # Row index of the most recent entry at or before each date, per account
+    row_of = np.full((n_dates, n_accounts), -1)
+    row_of[date_idx[last], acc_idx[last]] = date_idx[last]
+    np.maximum.accumulate(row_of, axis=0, out=row_of)
+    
+    values = np.zeros((n_dates, n_accounts))
+    values[date_idx[last], acc_idx[last]] = amounts[last]
+    matrix = np.where(row_of >= 0, values[np.maximum(row_of, 0), np.arange(n_accounts)], 0.0)
+    return dates, account_ids, matrix
+
+
+def _column_trends(days: np.ndarray, series: np.ndarray):
+    """Least-squares slope (per day) and r^2 for every column at once."""
+    if len(days) < 2:
+        zeros = np.zeros(series.shape[1])
+        return zeros, zeros
+    dx = days - days.mean()
+    sxx = dx @ dx
+    centered = series - series.mean(axis=0)
+    sxy = dx @ centered
+    syy = (centered * centered).sum(axis=0)
+    slope = sxy / sxx
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r_squared = np.where(syy > 0, sxy * sxy / (sxx * syy), 0.0)
+    return slope, r_squared
+
+
+def _masked_trends(days: np.ndarray, series: np.ndarray, mask: np.ndarray):
+    """_column_trends where each column only uses the rows its mask selects."""
+    w = mask.astype(float)
+    n = w.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_x = (w * days[:, None]).sum(axis=0) / n
+        mean_y = (w * series).sum(axis=0) / n
+        dx = (days[:, None] - mean_x) * w
+        dy = (series - mean_y) * w
+        sxx = (dx * dx).sum(axis=0)
+        sxy = (dx * dy).sum(axis=0)
+        syy = (dy * dy).sum(axis=0)
+        slope = np.where((n >= 2) & (sxx > 0), sxy / sxx, 0.0)
+        r_squared = np.where((sxx > 0) & (syy > 0), sxy * sxy / (sxx * syy), 0.0)
+    return slope, r_squared
+
+
+def _months_at_return(current: np.ndarray, target: np.ndarray, monthly_contribution: float, annual_return: float) -> np.ndarray:
+    """Months until current grows to target at a monthly-compounded return plus contributions (NaN = never)."""
+    i = (1 + annual_return / 100.0) ** (1 / 12) - 1
+    c = monthly_contribution
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if abs(i) < 1e-12:
+            months = (target - current) / c if c > 0 else np.full_like(current, np.nan)
+        else:
+            months = np.log((target + c / i) / (current + c / i)) / np.log1p(i)
+    return np.where(np.isfinite(months) & (months >= 0), months, np.nan)
+
+
+def calculate_goals(
+    accounts: List[Dict],
+    days: np.ndarray,
+    account_ids: np.ndarray,
+    matrix: np.ndarray,
+    first_days: np.ndarray,
+    window_days: int = 365,
+    market_return: Optional[float] = None,
+    monthly_contribution: float = 0.0,
+    max_years: int = 100,
+) -> GoalsResponse:
+    """
+    Progress, recent trend and ETA for every account with a target_balance.
+
+    accounts: List[ {'id', 'name', 'currency', 'target_balance'} ]
+    days/account_ids/matrix/first_days: the replayed per-account timeline
+    (balances in each account's own currency). All goals are regressed
+    together over the last `window_days` of each account's history.
+    """
+    goals = [a for a in accounts if a.get('target_balance') is not None]
+    if not goals:
+        return GoalsResponse(goals=[], window_days=window_days, market_return=market_return, message="No accounts have a target balance.")
+    
+    # 1. Goal columns; accounts without entries get an empty column
+    cols = np.searchsorted(account_ids, [a['id'] for a in goals]) if len(account_ids) else np.zeros(len(goals), dtype=int)
+    has_data = np.array([
+        len(account_ids) > 0 and c < len(account_ids) and account_ids[c] == a['id']
+        for c, a in zip(cols, goals)
+    ], dtype=bool)
+    cols = np.where(has_data, cols, 0)
+    target = np.array([a['target_balance'] for a in goals], dtype=float)
+    if len(days):
+        series = matrix[:, cols]
+        current = np.where(has_data, series[-1], 0.0)
+        start = np.where(has_data, series[np.searchsorted(days, first_days[cols]), np.arange(len(goals))], 0.0)
+        last_day = int(days[-1])
+    else:
+        series = np.zeros((0, len(goals)))
+        current = start = np.zeros(len(goals))
+        last_day = int(np.datetime64('today', 'D').astype(np.int64))
+    
+    # 2. Trend over each account's recent window, all columns at once
+    with span("regression"):
+        window_start = np.maximum(first_days[cols], last_day - window_days) if len(days) else np.zeros(len(goals))
+        mask = (days[:, None] >= window_start[None, :]) & has_data[None, :]
+        slope, r_squared = _masked_trends(days.astype(float), series, mask)
+    
+    # 3. Progress and ETAs
+    saving = target >= current
+    reached = np.where(saving, current >= target, current <= target)
+    gap = target - current
+    with np.errstate(divide="ignore", invalid="ignore"):
+        progress = np.where(
+            saving,
+            np.where(target > 0, current / target, 1.0),
+            np.where(start > target, (start - current) / (start - target), 1.0),
+        )
+        eta_days = np.where(reached, 0.0, np.where(slope * gap > 0, gap / slope, np.nan))
+    horizon = max_years * 365.25
+    eta_days = np.where(eta_days <= horizon, eta_days, np.nan)
+    
+    market_months = np.full(len(goals), np.nan)
+    if market_return is not None:
+        market_months = np.where(saving, _months_at_return(current, target, monthly_contribution, market_return), np.nan)
+        market_months = np.where(reached, 0.0, market_months)
+        market_months = np.where(market_months <= max_years * 12, market_months, np.nan)
+    
+    def as_date(offset_days: float) -> Optional[str]:
+        return None if np.isnan(offset_days) else str(np.datetime64(last_day + int(math.ceil(offset_days)), 'D'))
+    
+    with span("serialize"):
+        results = [
+            GoalProgress(
+                account_id=a['id'],
+                name=a['name'],
+                currency=a.get('currency'),
+                direction="save" if saving[k] else "pay_down",
+                target_balance=round(float(target[k]), 2),
+                current_balance=round(float(current[k]), 2),
+                remaining=round(float(abs(gap[k])) if not reached[k] else 0.0, 2),
+                progress_pct=round(float(np.clip(progress[k], 0.0, 1.0)) * 100, 1),
+                reached=bool(reached[k]),
+                monthly_trend=round(float(slope[k] * 30.44), 2),
+                r_squared=round(float(r_squared[k]), 4),
+                eta_months=None if np.isnan(eta_days[k]) else round(float(eta_days[k] / 30.44), 1),
+                eta_date=as_date(eta_days[k]),
+                market_eta_months=None if np.isnan(market_months[k]) else round(float(market_months[k]), 1),
+                market_eta_date=None if np.isnan(market_months[k]) else as_date(market_months[k] * 30.44),
+            )
+            for k, a in enumerate(goals)
+        ]
+    
+    on_track = sum(1 for g in results if g.reached or g.eta_months is not None)
+    return GoalsResponse(
+        goals=results,
+        window_days=window_days,
+        market_return=market_return,
+        message=f"{on_track} of {len(results)} goals reached or on track at the recent trend.",
+    )
+
+
+def calculate_grouped_forecast(
+    request: GroupedForecastRequest,
+    history_points: List[Dict],
+    accounts: List[Dict],
+    fx: Optional[FxTable] = None,
+) -> GroupedForecastResponse:
+    """
+    Trend and projection per account, account type, subtype and person.
+
+    accounts: List[ {'id', 'name', 'type', 'subtype', 'currency', 'person_id', 'person_name'} ]
+    History is replayed once into a (dates x accounts) matrix; each grouping
+    is a signed 0/1 matrix product over it, and every resulting series is
+    regressed together.
+    """
+    empty_total = GroupForecast(
+        group_by="total", key="total", label="Net Worth", current_value=0,
+        monthly_growth=0, annual_growth_rate=0, r_squared=0, forecast=[],
+    )
+    if len(history_points) < 2:
+        return GroupedForecastResponse(
+            total=empty_total, groups=[],
+            message="Not enough data history to forecast. Need at least 2 entries."
+        )
+    
+    # 1. Replay once
+    with span("replay"):
+        dates, account_ids, matrix = _balance_matrix(history_points)
+    return grouped_forecast_from_matrix(request, to_day_numbers(dates), account_ids, matrix, accounts, fx)
+
+
+def grouped_forecast_from_matrix(
+    request: GroupedForecastRequest,
+    replay_days: np.ndarray,
+    account_ids: np.ndarray,
+    matrix: np.ndarray,
+    accounts: List[Dict],
+    fx: Optional[FxTable] = None,
+) -> GroupedForecastResponse:
+    """calculate_grouped_forecast over an already replayed (days x accounts) balance matrix."""
+    if len(replay_days) < 2:
+        return GroupedForecastResponse(
+            total=GroupForecast(
+                group_by="total", key="total", label="Net Worth", current_value=0,
+                monthly_growth=0, annual_growth_rate=0, r_squared=0, forecast=[],
+            ),
+            groups=[],
+            message="Not enough data history to forecast. Need at least 2 entries."
+        )
+    meta = {a['id']: a for a in accounts}
+    account_ids = account_ids.tolist()
+    days = (replay_days - replay_days[0]).astype(float)
+    if fx is not None:
+        matrix = fx.convert_columns(matrix, [meta.get(aid, {}).get('currency') for aid in account_ids], replay_days)
+    sign = np.array([-1.0 if meta.get(aid, {}).get('type') == 'Liability' else 1.0 for aid in account_ids])
+    signed = matrix * sign
+    
+    # 2. Grouping matrices (accounts x groups), one block per dimension
+    columns = [("total", "total", "Net Worth")]
+    blocks = [np.ones((len(account_ids), 1))]
+    for dim in request.group_by:
+        labels = {}
+        for aid in account_ids:
+            acc = meta.get(aid, {})
+            if dim == "account":
+                key, label = str(aid), acc.get('name') or f"Account {aid}"
+            elif dim == "type":
+                key = label = acc.get('type') or "General"
+            elif dim == "subtype":
+                key = label = acc.get('subtype') or "Other"
+            else:
+                pid = acc.get('person_id')
+                key = str(pid) if pid is not None else "none"
+                label = acc.get('person_name') or "Unassigned"
+            labels[aid] = (key, label)
+        keys = list(dict.fromkeys(labels.values()))
+        block = np.zeros((len(account_ids), len(keys)))
+        block[np.arange(len(account_ids)), [keys.index(labels[aid]) for aid in account_ids]] = 1.0
+        blocks.append(block)
+        columns.extend((dim, key, label) for key, label in keys)
+    series = signed @ np.hstack(blocks)
+    
+    # 3. Regress every series together
+    with span("regression"):
+        slope, r_squared = _column_trends(days, series)
+    current = series[-1]
+    
+    # 4. Project Future: LastActual + DailyGrowth * days
+    future_days = np.arange(request.years + 1) * 365.25
+    projection = current[None, :] + slope[None, :] * future_days[:, None]
+    monthly_growth = slope * 30.44
+    with np.errstate(divide="ignore", invalid="ignore"):
+        annual_rate = np.where(current != 0, monthly_growth * 12 / current * 100, 0.0)
+    
+    with span("serialize"):
+        results = [
+            GroupForecast(
+                group_by=dim, key=key, label=label,
+                current_value=round(float(current[c]), 2),
+                monthly_growth=round(float(monthly_growth[c]), 2),
+                annual_growth_rate=round(float(annual_rate[c]), 2),
+                r_squared=round(float(r_squared[c]), 4),
+                forecast=np.round(projection[:, c], 2).tolist(),
+            )
+            for c, (dim, key, label) in enumerate(columns)
+        ]
+    
+    return GroupedForecastResponse(
+        total=results[0],
+        groups=results[1:],
+        message=f"Based on {len(replay_days)} historical data points across {len(account_ids)} accounts."
+    )
+
+
+# --- Backtest ---
+
+class BacktestPlan(NamedTuple):
+    scenario_id: int
+    name: str
+    request: Optional[ProjectionRequest] # None when the saved snapshot has no usable plan
+    start_day: Optional[int] # Day number (days since epoch) the plan starts
+    message: str = ""
+
+
+def _iso_day(day) -> str:
+    return str(np.datetime64(int(day), 'D'))
+
+
+def calculate_backtest(
+    plans: List[BacktestPlan],
+    days: np.ndarray,
+    actual: np.ndarray,
+    start_from: str = "actual",
+) -> BacktestResponse:
+    """
+    Line every plan up against the tracker net-worth timeline (`days`,
+    `actual`). Each plan is projected from its start date, interpolated at
+    every tracker date inside its horizon, and drift / tracking error are
+    aggregated per plan year - one (plans x dates) grid for all plans.
+    """
+    results = {p.scenario_id: ScenarioBacktest(scenario_id=p.scenario_id, name=p.name, message=p.message) for p in plans}
+    runnable = [p for p in plans if p.request is not None and p.start_day is not None]
+    if not runnable or not len(days):
+        if not len(days):
+            for result in results.values():
+                result.message = result.message or "No tracker history to compare against."
+        return BacktestResponse(scenarios=list(results.values()), timeline_points=len(days))
+
+    # 1. Starting balance: tracker net worth as of the start date, if known
+    start = np.array([p.start_day for p in runnable])
+    requests = [p.request for p in runnable]
+    if start_from == "actual":
+        asof = np.searchsorted(days, start, side="right") - 1
+        requests = [
+            r.model_copy(update={"current_savings": float(actual[i])}) if i >= 0 else r
+            for r, i in zip(requests, asof)
+        ]
+
+    # 2. Plan balance paths, edge-padded into one (plans x steps) matrix
+    with span("projection"):
+        paths = [project_balance_path(r) for r in requests]
+    width = max(2, max(len(path) for path in paths))
+    path_matrix = np.array([np.pad(path, (0, width - len(path)), mode="edge") for path in paths])
+    steps = np.array([r.steps_per_year for r in requests])[:, None]
+    horizon = np.array([r.years for r in requests])[:, None] * 365.25
+
+    # 3. Interpolate every plan at every tracker date
+    elapsed = days[None, :] - start[:, None]
+    inside = (elapsed > 0) & (elapsed <= horizon)
+    position = np.clip(elapsed, 0, None) * steps / 365.25
+    lo = np.clip(np.floor(position).astype(int), 0, width - 2)
+    frac = np.clip(position - lo, 0.0, 1.0)
+    planned = (
+        np.take_along_axis(path_matrix, lo, axis=1) * (1 - frac)
+        + np.take_along_axis(path_matrix, lo + 1, axis=1) * frac
+    )
+    drift = actual[None, :] - planned
+    pct = np.divide(drift, np.abs(planned), out=np.zeros_like(drift), where=planned != 0)
+
+    # 4. Per plan-year aggregates via one bincount over (plan, year) keys
+    n_plans = len(runnable)
+    n_years = int(np.ceil(horizon.max() / 365.25)) + 1
+    year = np.ceil(elapsed / 365.25).astype(int)
+    plan_idx = np.broadcast_to(np.arange(n_plans)[:, None], elapsed.shape)
+    date_idx = np.broadcast_to(np.arange(len(days))[None, :], elapsed.shape)
+    key = (plan_idx * n_years + np.clip(year, 0, n_years - 1))[inside]
+    counts = np.bincount(key, minlength=n_plans * n_years).reshape(n_plans, n_years)
+    sq_pct = np.bincount(key, weights=pct[inside] ** 2, minlength=n_plans * n_years).reshape(n_plans, n_years)
+    last = np.full(n_plans * n_years, -1)
+    np.maximum.at(last, key, date_idx[inside])
+    last = last.reshape(n_plans, n_years)
+
+    # 5. Serialize
+    with span("serialize"):
+        for p, plan in enumerate(runnable):
+            result = results[plan.scenario_id]
+            result.start_date = _iso_day(plan.start_day)
+            result.start_balance = round(float(requests[p].current_savings), 2)
+            total = counts[p].sum()
+            if not total:
+                result.message = "No tracker entries after the plan's start date yet."
+                continue
+            for y in np.flatnonzero(counts[p]):
+                g = last[p, y]
+                result.years.append(BacktestYear(
+                    year=int(y),
+                    end_date=_iso_day(days[g]),
+                    planned=round(float(planned[p, g]), 2),
+                    actual=round(float(actual[g]), 2),
+                    drift=round(float(drift[p, g]), 2),
+                    drift_pct=round(float(pct[p, g]) * 100, 2),
+                    tracking_error=round(float(np.sqrt(sq_pct[p, y] / counts[p, y])) * 100, 2),
+                    points=int(counts[p, y]),
+                ))
+            final = result.years[-1]
+            result.tracking_error = round(float(np.sqrt(sq_pct[p].sum() / total)) * 100, 2)
+            result.final_drift = final.drift
+            result.final_drift_pct = final.drift_pct
+
+    return BacktestResponse(scenarios=list(results.values()), timeline_points=len(days))
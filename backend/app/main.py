@@ -1,38 +1,47 @@
 
 import sys
 import os
+import threading
+import time
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from .database import engine, Base
+from fastapi.responses import FileResponse, PlainTextResponse
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from .config import WORKERS
+from .database import engine, ensure_schema, schema_ready, watch_external_writes
+from .backtest import invalidate_networth_timeline
+from .fx import invalidate_fx_table
+from .static import StaticSite, serve_static
+from . import factors
+from . import metrics
+from . import profiling
+from . import snapshots
+from . import timeseries
 from . import models # Ensure models are registered
 from .routers import router as api_router
 from .routers_tracker import router as tracker_router
 from .routers_scenarios import router as scenarios_router
+from .routers_fx import router as fx_router
+from .routers_live import router as live_router
+from .routers_data import router as data_router
 
-# Create DB Tables
-Base.metadata.create_all(bind=engine)
-
-# Lightweight migration: add missing columns to existing tables
-with engine.connect() as conn:
-    from sqlalchemy import text, inspect
-    inspector = inspect(engine)
-    if "scenarios" in inspector.get_table_names():
-        columns = [col["name"] for col in inspector.get_columns("scenarios")]
-        if "data" not in columns:
-            conn.execute(text("ALTER TABLE scenarios ADD COLUMN data TEXT"))
-            conn.commit()
-    if "accounts" in inspector.get_table_names():
-        acc_cols = [col["name"] for col in inspector.get_columns("accounts")]
-        for col_name, col_type in [("subtype", "TEXT"), ("description", "TEXT"), ("target_balance", "REAL"), ("currency", "TEXT"), ("person_id", "INTEGER")]:
-            if col_name not in acc_cols:
-                conn.execute(text(f"ALTER TABLE accounts ADD COLUMN {col_name} {col_type}"))
-                conn.commit()
-
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema checks run off the startup path so the server binds immediately;
+    # get_db() waits on the same lock if a request arrives first.
+    threading.Thread(target=ensure_schema, daemon=True).start()
+    # With several workers the launcher runs the schedule once, not per worker
+    scheduler = snapshots.SnapshotScheduler()
+    if WORKERS == 1:
+        scheduler.start()
+    yield
+    scheduler.stop()
+
+app = FastAPI(lifespan=lifespan)
 
 # Allow CORS for local development
 origins = [
@@ -51,14 +60,84 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if metrics.ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+    metrics.install_sql_hooks(engine)
+    metrics.register_collector(factors.render_prometheus)
+    metrics.register_collector(snapshots.render_prometheus)
+    metrics.register_collector(timeseries.render_prometheus)
+
+if profiling.ENABLED:
+    app.add_middleware(profiling.ProfilingMiddleware)
+    profiling.install_sql_hooks(engine)
+
+if WORKERS > 1:
+    # Other workers write to the same file: drop this process's cached tracker data when they do
+    watch_external_writes([invalidate_fx_table, timeseries.invalidate_series_store, invalidate_networth_timeline])
+
+_STARTED = time.monotonic()
+
 @app.get("/api/status")
 def read_status():
     return {"status": "ok", "message": "Backend is online"}
 
+@app.get("/api/health")
+def read_health():
+    """Liveness: this worker process is up and serving requests."""
+    return {
+        "status": "ok",
+        "pid": os.getpid(),
+        "workers": WORKERS,
+        "uptime_seconds": round(time.monotonic() - _STARTED, 1),
+    }
+
+@app.get("/api/ready")
+def read_ready(response: Response):
+    """Readiness: schema migrated and the database answers. 503 until both hold."""
+    checks = {"schema": schema_ready(), "database": False}
+    detail = None
+    if checks["schema"]:
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            checks["database"] = True
+        except SQLAlchemyError as e:
+            detail = str(e.orig if getattr(e, "orig", None) else e)
+    if all(checks.values()):
+        return {"status": "ready", "checks": checks}
+    response.status_code = 503
+    return {"status": "starting" if not checks["schema"] else "unavailable", "checks": checks, "detail": detail}
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    """Prometheus text exposition (empty unless FINANCIALIZE_METRICS=1)."""
+    if not metrics.ENABLED:
+        return PlainTextResponse("# metrics disabled; set FINANCIALIZE_METRICS=1\n")
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/profiles")
+def list_profiles():
+    """Saved profile files, newest first (404 unless FINANCIALIZE_PROFILING=1)."""
+    if not profiling.ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    return {"directory": profiling.PROFILE_DIR, "files": profiling.list_profiles()}
+
+@app.get("/api/profiles/{filename}")
+def download_profile(filename: str):
+    if not profiling.ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    path = profiling.profile_path(filename)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, filename=filename)
+
 # Include API Routes
 app.include_router(api_router, prefix="/api")
 app.include_router(tracker_router, prefix="/api")
 app.include_router(scenarios_router, prefix="/api")
+app.include_router(fx_router, prefix="/api")
+app.include_router(live_router, prefix="/api")
+app.include_router(data_router, prefix="/api")
 
 # --- Serve built frontend in production (PyInstaller bundle) ---
 def _get_static_dir() -> Path | None:
@@ -75,16 +154,15 @@ def _get_static_dir() -> Path | None:
 
 _static = _get_static_dir()
 if _static:
-    # Serve static assets (JS, CSS, images) under /assets
-    app.mount("/assets", StaticFiles(directory=str(_static / "assets")), name="static-assets")
-
-    # Catch-all: serve index.html for any non-API route (SPA client-side routing)
-    @app.get("/{full_path:path}")
-    async def serve_spa(full_path: str):
-        file_path = _static / full_path
-        if full_path and file_path.is_file():
-            return FileResponse(str(file_path))
-        return FileResponse(str(_static / "index.html"))
+    _site = StaticSite(_static)
+
+    # Hashed assets, root files and the SPA catch-all (index.html for client-side routes)
+    @app.api_route("/{full_path:path}", methods=["GET", "HEAD"])
+    async def serve_spa(full_path: str, request: Request):
+        entry = _site.lookup(full_path)
+        if entry is None:
+            raise HTTPException(status_code=404, detail="Not Found")
+        return serve_static(entry, request)
 else:
     @app.get("/")
     def read_root():
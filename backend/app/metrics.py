@@ -0,0 +1,230 @@
+"""
+Metrics
+-------
+Per-route latency histograms, per-request SQL query counts/durations and
+named timing spans inside the financial logic. Exposed in Prometheus text
+format at /api/metrics and per response as a ``Server-Timing`` header.
+
+Enabled with FINANCIALIZE_METRICS=1. When disabled the middleware and SQL
+hooks are never installed and ``span()`` returns a shared no-op, so the only
+cost left in the hot path is one global check per span.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from . import config
+
+ENABLED = config.METRICS_ENABLED
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...], buckets: Tuple[float, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series: Dict[Tuple[str, ...], List[float]] = {}  # [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[idx] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {k: list(v) for k, v in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            label_str = ",".join(f'{n}="{v}"' for n, v in zip(self.label_names, labels))
+            prefix = label_str + "," if label_str else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            cumulative += series[len(self.buckets)]
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {cumulative}')
+            braces = f"{{{label_str}}}" if label_str else ""
+            lines.append(f"{self.name}_sum{braces} {series[-1]}")
+            lines.append(f"{self.name}_count{braces} {cumulative}")
+        return lines
+
+
+REQUEST_LATENCY = Histogram(
+    "financialize_request_duration_seconds", "HTTP request latency by route.",
+    ("method", "route", "status"), LATENCY_BUCKETS,
+)
+REQUEST_SQL_QUERIES = Histogram(
+    "financialize_request_sql_queries", "SQL statements executed per request.",
+    ("route",), COUNT_BUCKETS,
+)
+REQUEST_SQL_DURATION = Histogram(
+    "financialize_request_sql_duration_seconds", "Total SQL time per request.",
+    ("route",), LATENCY_BUCKETS,
+)
+SPAN_DURATION = Histogram(
+    "financialize_span_duration_seconds", "Time spent in named hot-path sections.",
+    ("span",), LATENCY_BUCKETS,
+)
+_HISTOGRAMS = [REQUEST_LATENCY, REQUEST_SQL_QUERIES, REQUEST_SQL_DURATION, SPAN_DURATION]
+
+
+class RequestStats:
+    __slots__ = ("sql_count", "sql_seconds", "spans")
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.spans: List[Tuple[str, float]] = []
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("financialize_request_stats", default=None)
+
+
+# --- Spans ---
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        SPAN_DURATION.observe((self.name,), elapsed)
+        stats = _current.get()
+        if stats is not None:
+            stats.spans.append((self.name, elapsed))
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str):
+    """Time a block: ``with span("replay"): ...``. Free when metrics are off."""
+    if not ENABLED:
+        return _NOOP_SPAN
+    return _Span(name)
+
+
+# --- SQL hooks ---
+
+def install_sql_hooks(engine):
+    """Count and time every statement, attributing it to the current request."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("financialize_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["financialize_query_start"].pop()
+        stats = _current.get()
+        if stats is not None:
+            stats.sql_count += 1
+            stats.sql_seconds += elapsed
+
+
+# --- ASGI middleware ---
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    # Unmatched paths (SPA deep links, 404s) share one label to bound cardinality
+    if not path:
+        return "other"
+    # Routes from included routers report their path without the /api prefix
+    if scope["path"].startswith("/api/") and not path.startswith("/api/"):
+        path = "/api" + path
+    return path
+
+
+def _server_timing(total: float, stats: RequestStats) -> str:
+    parts = [f"app;dur={total * 1000:.2f}"]
+    if stats.sql_count:
+        parts.append(f'db;dur={stats.sql_seconds * 1000:.2f};desc="{stats.sql_count} queries"')
+    for name, elapsed in stats.spans:
+        parts.append(f"{name};dur={elapsed * 1000:.2f}")
+    return ", ".join(parts)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: records latency and adds a Server-Timing header."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        status_holder = [500]
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", _server_timing(time.perf_counter() - start, stats).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = _route_label(scope)
+            REQUEST_LATENCY.observe((scope["method"], route, str(status_holder[0])), elapsed)
+            REQUEST_SQL_QUERIES.observe((route,), stats.sql_count)
+            REQUEST_SQL_DURATION.observe((route,), stats.sql_seconds)
+            _current.reset(token)
+
+
+_COLLECTORS: List[Callable[[], List[str]]] = []
+
+
+def register_collector(collector: Callable[[], List[str]]):
+    """Add a function returning extra exposition lines (counters, gauges)."""
+    _COLLECTORS.append(collector)
+
+
+def render_prometheus() -> str:
+    lines = []
+    for histogram in _HISTOGRAMS:
+        lines.extend(histogram.render())
+    for collector in _COLLECTORS:
+        lines.extend(collector())
+    return "\n".join(lines) + "\n"
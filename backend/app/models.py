@@ -1,5 +1,5 @@
 
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Boolean, Text
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Boolean, Text, Index
 from sqlalchemy.orm import relationship
 from .database import Base
 
@@ -11,7 +11,7 @@ class Person(Base):
     age = Column(Integer, nullable=True)
     color = Column(String, default="#818cf8")  # avatar/accent color
 
-    accounts = relationship("Account", back_populates="person")
+    accounts = relationship("Account", back_populates="person", passive_deletes=True)
 
 class UserScenario(Base):
     __tablename__ = "scenarios"
@@ -20,16 +20,17 @@ class UserScenario(Base):
     name = Column(String, default="Default Plan")
     current_savings = Column(Float, default=0.0)
     data = Column(Text, nullable=True)  # JSON snapshot of full client state
+    created_at = Column(String, nullable=True)  # YYYY-MM-DD, start date for backtests
     
     # Relationships (legacy — kept for backward compat)
-    incomes = relationship("IncomeItem", back_populates="scenario", cascade="all, delete-orphan")
-    expenses = relationship("ExpenseItem", back_populates="scenario", cascade="all, delete-orphan")
+    incomes = relationship("IncomeItem", back_populates="scenario", cascade="all, delete-orphan", passive_deletes=True)
+    expenses = relationship("ExpenseItem", back_populates="scenario", cascade="all, delete-orphan", passive_deletes=True)
 
 class IncomeItem(Base):
     __tablename__ = "incomes"
 
     id = Column(Integer, primary_key=True, index=True)
-    scenario_id = Column(Integer, ForeignKey("scenarios.id"))
+    scenario_id = Column(Integer, ForeignKey("scenarios.id", ondelete="CASCADE"))
     name = Column(String)
     amount = Column(Float)
     
@@ -39,7 +40,7 @@ class ExpenseItem(Base):
     __tablename__ = "expenses"
 
     id = Column(Integer, primary_key=True, index=True)
-    scenario_id = Column(Integer, ForeignKey("scenarios.id"))
+    scenario_id = Column(Integer, ForeignKey("scenarios.id", ondelete="CASCADE"))
     name = Column(String)
     percentage = Column(Float) # Allocation percentage (0-100)
     is_fixed = Column(Boolean, default=False)
@@ -56,18 +57,45 @@ class Account(Base):
     description = Column(String, nullable=True)
     target_balance = Column(Float, nullable=True)  # Optional goal for this account
     currency = Column(String, nullable=True)  # e.g. 'USD', 'EUR' — null means main currency
-    person_id = Column(Integer, ForeignKey("persons.id"), nullable=True)
+    person_id = Column(Integer, ForeignKey("persons.id", ondelete="SET NULL"), nullable=True)
+    interest_rate = Column(Float, nullable=True)  # Annual %, for liabilities
+    minimum_payment = Column(Float, nullable=True)  # Monthly, in the account's currency
     
-    entries = relationship("BalanceEntry", back_populates="account", cascade="all, delete-orphan")
+    # Deletes cascade in SQLite (ON DELETE CASCADE), not by loading every entry
+    entries = relationship("BalanceEntry", back_populates="account", cascade="all, delete-orphan", passive_deletes=True)
     person = relationship("Person", back_populates="accounts")
 
 class BalanceEntry(Base):
     __tablename__ = "balance_entries"
 
     id = Column(Integer, primary_key=True, index=True)
-    account_id = Column(Integer, ForeignKey("accounts.id"))
+    account_id = Column(Integer, ForeignKey("accounts.id", ondelete="CASCADE"))
     date = Column(String) # ISO Date YYYY-MM-DD
     amount = Column(Float)
     note = Column(String, nullable=True)
 
     account = relationship("Account", back_populates="entries")
+
+    # Serves the cascade from accounts and per-account latest-entry lookups
+    __table_args__ = (Index("ix_balance_entries_account_date", "account_id", "date"),)
+
+class BalanceRollup(Base):
+    """Last balance entry per account per week/month (derived; see rollups.py)."""
+    __tablename__ = "balance_rollups"
+
+    tier = Column(String, primary_key=True)  # 'week' or 'month'
+    account_id = Column(Integer, ForeignKey("accounts.id", ondelete="CASCADE"), primary_key=True)
+    bucket = Column(String, primary_key=True)  # ISO date the week (Monday) or month starts
+    entry_id = Column(Integer, nullable=False)  # The balance entry this row mirrors
+    date = Column(String, nullable=False)
+    amount = Column(Float, nullable=False)
+
+class FxRate(Base):
+    __tablename__ = "fx_rates"
+
+    id = Column(Integer, primary_key=True, index=True)
+    currency = Column(String, nullable=False)  # e.g. 'EUR'
+    date = Column(String, nullable=False)  # ISO Date YYYY-MM-DD
+    rate = Column(Float, nullable=False)  # Units of main currency per 1 unit of `currency`
+
+    __table_args__ = (Index("ix_fx_rates_currency_date", "currency", "date", unique=True),)
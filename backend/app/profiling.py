@@ -0,0 +1,272 @@
+"""
+On-demand profiling
+-------------------
+Lets a user capture where time goes on *their* database without a debugger.
+Enabled with FINANCIALIZE_PROFILING=1; then any endpoint decorated with
+``@profiled`` can be profiled per request:
+
+    POST /api/scenarios/forecast?profile=sample     (or header X-Profile: sample)
+    POST /api/scenarios/forecast?profile=cprofile
+
+``sample`` runs a stack sampler on the handler's thread and writes a
+speedscope file plus collapsed stacks (flamegraph.pl / speedscope input).
+``cprofile`` writes a .pstats dump. Statements slower than
+FINANCIALIZE_SLOW_SQL_MS are recorded with their EXPLAIN QUERY PLAN. The
+response carries an ``X-Profile-Files`` header naming the saved files,
+which are listed and downloadable under /api/profiles.
+
+When disabled, ``@profiled`` returns the handler unchanged.
+"""
+
+import cProfile
+import functools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from sqlalchemy import event
+
+from . import config
+from .database import DATA_DIR
+
+ENABLED = config.PROFILING_ENABLED
+PROFILE_DIR = os.path.join(DATA_DIR, "profiles")
+MODES = ("sample", "cprofile")
+
+
+class ProfileRequest:
+    __slots__ = ("mode", "files", "slow_sql")
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.files: List[str] = []
+        self.slow_sql: List[Dict] = []
+
+
+_current: ContextVar[Optional[ProfileRequest]] = ContextVar("financialize_profile_request", default=None)
+
+
+# --- Stack sampler ---
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval from a helper thread."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+def _frame_label(frame: Tuple[str, str, int]) -> str:
+    name, filename, line = frame
+    return f"{name} ({os.path.basename(filename)}:{line})".replace(";", ":")
+
+
+def to_collapsed(stacks: Counter) -> str:
+    """Brendan Gregg's folded format: 'root;child;leaf count' per line."""
+    return "\n".join(
+        ";".join(_frame_label(f) for f in stack) + f" {count}"
+        for stack, count in stacks.most_common()
+    ) + "\n"
+
+
+def to_speedscope(stacks: Counter, name: str, interval_ms: float) -> Dict:
+    frame_index: Dict[Tuple[str, str, int], int] = {}
+    frames = []
+    samples = []
+    weights = []
+    for stack, count in stacks.items():
+        indices = []
+        for frame in stack:
+            if frame not in frame_index:
+                frame_index[frame] = len(frames)
+                frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+            indices.append(frame_index[frame])
+        samples.append(indices)
+        weights.append(count * interval_ms)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights,
+        }],
+        "name": name,
+        "exporter": "financialize",
+    }
+
+
+# --- Output ---
+
+def _save(base: str, suffix: str, content: str) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    filename = f"{base}{suffix}"
+    with open(os.path.join(PROFILE_DIR, filename), "w", encoding="utf-8") as f:
+        f.write(content)
+    return filename
+
+
+def _profile_basename(handler_name: str) -> str:
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{handler_name}"
+
+
+def list_profiles() -> List[str]:
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    return sorted(os.listdir(PROFILE_DIR), reverse=True)
+
+
+_SAFE_NAME = re.compile(r"^[\w.\-]+$")
+
+
+def profile_path(filename: str) -> Optional[str]:
+    """Absolute path of a saved profile, or None for unknown/unsafe names."""
+    if not _SAFE_NAME.match(filename):
+        return None
+    path = os.path.join(PROFILE_DIR, filename)
+    return path if os.path.isfile(path) else None
+
+
+# --- Handler decorator ---
+
+def profiled(handler):
+    """Profile a (sync) endpoint when the current request asks for it."""
+    if not ENABLED:
+        return handler
+
+    @functools.wraps(handler)
+    def wrapper(*args, **kwargs):
+        profile_request = _current.get()
+        if profile_request is None:
+            return handler(*args, **kwargs)
+
+        base = _profile_basename(handler.__name__)
+        start = time.perf_counter()
+        if profile_request.mode == "cprofile":
+            profiler = cProfile.Profile()
+            result = profiler.runcall(handler, *args, **kwargs)
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            profiler.dump_stats(os.path.join(PROFILE_DIR, f"{base}.pstats"))
+            profile_request.files.append(f"{base}.pstats")
+        else:
+            interval_ms = config.PROFILE_SAMPLE_INTERVAL_MS
+            with StackSampler(threading.get_ident(), interval_ms / 1000.0) as sampler:
+                result = handler(*args, **kwargs)
+            profile_request.files.append(_save(base, ".speedscope.json", json.dumps(to_speedscope(sampler.stacks, handler.__name__, interval_ms))))
+            profile_request.files.append(_save(base, ".folded", to_collapsed(sampler.stacks)))
+        elapsed = time.perf_counter() - start
+
+        report = {"handler": handler.__name__, "mode": profile_request.mode, "duration_ms": round(elapsed * 1000, 2), "slow_sql": profile_request.slow_sql}
+        profile_request.files.append(_save(base, ".sql.json", json.dumps(report, indent=2)))
+        return result
+
+    return wrapper
+
+
+# --- Slow SQL ---
+
+def install_sql_hooks(engine):
+    """Inside profiled requests, capture slow statements with their query plan."""
+    threshold = config.SLOW_SQL_MS / 1000.0
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            conn.info.setdefault("financialize_profile_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        profile_request = _current.get()
+        starts = conn.info.get("financialize_profile_start")
+        if profile_request is None or not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        if elapsed < threshold:
+            return
+        entry = {"statement": statement, "duration_ms": round(elapsed * 1000, 2), "executemany": executemany}
+        if not executemany and statement.lstrip().upper().startswith("SELECT"):
+            # Raw DBAPI cursor so the EXPLAIN itself doesn't re-enter these hooks
+            plan_cursor = cursor.connection.cursor()
+            try:
+                plan_cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters or ())
+                entry["plan"] = [row[-1] for row in plan_cursor.fetchall()]
+            finally:
+                plan_cursor.close()
+        profile_request.slow_sql.append(entry)
+
+
+# --- ASGI middleware ---
+
+def _requested_mode(scope) -> Optional[str]:
+    for name, value in scope.get("headers", []):
+        if name == b"x-profile":
+            mode = value.decode("latin-1").strip().lower()
+            return "sample" if mode in ("1", "true") else mode
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    if "profile" in query:
+        mode = query["profile"][-1].strip().lower()
+        return "sample" if mode in ("", "1", "true") else mode
+    return None
+
+
+class ProfilingMiddleware:
+    """Marks requests that asked for profiling and reports the saved files."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        mode = _requested_mode(scope) if scope["type"] == "http" else None
+        if mode not in MODES:
+            await self.app(scope, receive, send)
+            return
+
+        profile_request = ProfileRequest(mode)
+        token = _current.set(profile_request)
+
+        async def send_with_files(message):
+            if message["type"] == "http.response.start" and profile_request.files:
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-files", ",".join(profile_request.files).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_files)
+        finally:
+            _current.reset(token)
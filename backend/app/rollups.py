@@ -0,0 +1,99 @@
+"""
+Balance Rollups
+---------------
+Weekly and monthly tiers of balance_entries: the last entry per account per
+bucket, kept in balance_rollups for /tracker/history (a daily logger's
+month tier is ~30× smaller); raw entries stay untouched and queryable.
+Trend fits downsample the same way in memory (timeseries.py).
+
+- Entry writes refresh just the buckets they touch (refresh_buckets).
+- Imports and migrations rebuild everything with one window query per tier.
+- select_tier picks the coarsest tier that still leaves MIN_BUCKETS points
+  across the span a fit or chart needs.
+"""
+
+from datetime import date, timedelta
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from . import models
+
+TIERS = ("week", "month")
+RESOLUTIONS = ("auto", "raw") + TIERS
+MIN_BUCKETS = 36  # Fewer points than this and the fit falls back to a finer tier
+_BUCKET_DAYS = {"week": 7, "month": 30.44}
+
+# SQL expressions for a date's bucket start, matching bucket_bounds()
+_BUCKET_SQL = {
+    "week": "date(date, 'weekday 0', '-6 days')",
+    "month": "substr(date, 1, 7) || '-01'",
+}
+
+
+def bucket_bounds(tier: str, day: str) -> Tuple[str, str]:
+    """[start, end) ISO dates of the bucket containing `day`."""
+    d = date.fromisoformat(day[:10])
+    if tier == "week":
+        start = d - timedelta(days=d.weekday())
+        end = start + timedelta(days=7)
+    else:
+        start = d.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+    return start.isoformat(), end.isoformat()
+
+
+def refresh_buckets(db: Session, account_id: int, dates: Iterable[str]):
+    """Recompute the buckets holding `dates` for one account (call before commit)."""
+    table = models.BalanceRollup.__table__
+    for tier in TIERS:
+        for start, end in {bucket_bounds(tier, d) for d in dates if d}:
+            db.execute(table.delete().where(
+                (table.c.tier == tier) & (table.c.account_id == account_id) & (table.c.bucket == start)
+            ))
+            db.execute(text(
+                "INSERT INTO balance_rollups (tier, account_id, bucket, entry_id, date, amount) "
+                "SELECT :tier, account_id, :start, id, date, amount FROM balance_entries "
+                "WHERE account_id = :account_id AND date >= :start AND date < :end "
+                "ORDER BY date DESC, id DESC LIMIT 1"
+            ), {"tier": tier, "start": start, "end": end, "account_id": account_id})
+
+
+def rebuild_rollups(conn):
+    """Recompute every tier from balance_entries in one pass per tier."""
+    conn.execute(text("DELETE FROM balance_rollups"))
+    for tier in TIERS:
+        bucket = _BUCKET_SQL[tier]
+        conn.execute(text(
+            "INSERT INTO balance_rollups (tier, account_id, bucket, entry_id, date, amount) "
+            f"SELECT '{tier}', account_id, bucket, id, date, amount FROM ("
+            f"  SELECT id, account_id, date, amount, {bucket} AS bucket,"
+            f"         ROW_NUMBER() OVER (PARTITION BY account_id, {bucket} ORDER BY date DESC, id DESC) AS rn"
+            "  FROM balance_entries WHERE account_id IS NOT NULL"
+            ") WHERE rn = 1 AND bucket IS NOT NULL"
+        ))
+
+
+def history_span_days(db: Session, account_id: Optional[int] = None) -> int:
+    """Days between the first and last entry (of one account, if given), read from the (small) month tier."""
+    query = db.query(func.min(models.BalanceRollup.date), func.max(models.BalanceRollup.date)).filter(
+        models.BalanceRollup.tier == "month"
+    )
+    if account_id:
+        query = query.filter(models.BalanceRollup.account_id == account_id)
+    first, last = query.one()
+    if not first:
+        return 0
+    return (date.fromisoformat(last[:10]) - date.fromisoformat(first[:10])).days
+
+
+def select_tier(resolution: str, span_days: float) -> str:
+    """'raw', 'week' or 'month': the requested tier, or the coarsest with MIN_BUCKETS over the span."""
+    if resolution != "auto":
+        return resolution
+    for tier in reversed(TIERS):
+        if span_days / _BUCKET_DAYS[tier] >= MIN_BUCKETS:
+            return tier
+    return "raw"
+
@@ -0,0 +1,121 @@
+import tempfile
+from datetime import date
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.exc import IntegrityError
+
+from . import schemas, snapshots
+from .archive import COMPRESSIONS, ArchiveError, export_stream, import_archive
+from .config import SNAPSHOT_INTERVAL_HOURS, SNAPSHOT_KEEP
+from .backtest import invalidate_networth_timeline
+from .database import ensure_schema
+from .fx import invalidate_fx_table
+from .timeseries import invalidate_series_store
+
+router = APIRouter(
+    tags=["data"]
+)
+
+# Uploads above this spill from memory to a temp file
+_SPOOL_BYTES = 8 * 1024 * 1024
+_EXTENSIONS = {"none": ".ndjson", "gzip": ".ndjson.gz", "zstd": ".ndjson.zst"}
+_MEDIA_TYPES = {"none": "application/x-ndjson", "gzip": "application/gzip", "zstd": "application/zstd"}
+
+@router.get("/export")
+def export_data(compress: str = "gzip"):
+    """Stream every table as one NDJSON archive (compress: none, gzip or zstd)."""
+    if compress not in COMPRESSIONS:
+        raise HTTPException(status_code=400, detail=f"compress must be one of {', '.join(COMPRESSIONS)}")
+    ensure_schema()
+    stream = export_stream(compress)
+    try:
+        # Surface a missing optional compressor as a 400 before streaming starts
+        first = next(stream)
+    except ArchiveError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def body():
+        yield first
+        yield from stream
+
+    filename = f"financialize-{date.today().isoformat()}{_EXTENSIONS[compress]}"
+    return StreamingResponse(
+        body(),
+        media_type=_MEDIA_TYPES[compress],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.post("/import", response_model=schemas.ImportResponse)
+async def import_data(request: Request):
+    """
+    Replace all data with an archive from /export. The raw request body is the
+    archive file (compressed or not); it is spooled, then loaded in one
+    transaction, so a bad file leaves the database untouched.
+    """
+    ensure_schema()
+    with tempfile.SpooledTemporaryFile(max_size=_SPOOL_BYTES) as upload:
+        async for chunk in request.stream():
+            upload.write(chunk)
+        upload.seek(0)
+        try:
+            counts = await run_in_threadpool(import_archive, upload)
+        except ArchiveError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except IntegrityError as e:
+            raise HTTPException(status_code=400, detail=f"Archive violates a constraint: {e.orig}")
+
+    invalidate_fx_table()
+    invalidate_series_store()
+    invalidate_networth_timeline()
+    return schemas.ImportResponse(tables=counts, rows=sum(counts.values()))
+
+# --- Snapshots ---
+
+@router.get("/snapshots", response_model=schemas.SnapshotListResponse)
+def get_snapshots():
+    return schemas.SnapshotListResponse(
+        directory=snapshots.SNAPSHOT_DIR,
+        interval_hours=SNAPSHOT_INTERVAL_HOURS,
+        keep=SNAPSHOT_KEEP,
+        snapshots=snapshots.list_snapshots(),
+        stats=snapshots.backup_stats(),
+    )
+
+@router.post("/snapshots", response_model=schemas.SnapshotResult)
+def create_snapshot():
+    """Take a manual snapshot now, without pausing other requests for long."""
+    try:
+        return snapshots.create_snapshot("manual")
+    except snapshots.SnapshotBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.post("/snapshots/{name}/restore", response_model=schemas.RestoreResponse)
+def restore_snapshot(name: str):
+    if snapshots.snapshot_path(name) is None:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    try:
+        result = snapshots.restore_snapshot(name)
+    except snapshots.SnapshotBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except snapshots.SnapshotError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    invalidate_fx_table()
+    invalidate_series_store()
+    invalidate_networth_timeline()
+    return result
+
+@router.get("/snapshots/{name}")
+def download_snapshot(name: str):
+    path = snapshots.snapshot_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return FileResponse(path, filename=name, media_type="application/vnd.sqlite3")
+
+@router.delete("/snapshots/{name}")
+def delete_snapshot(name: str):
+    if snapshots.snapshot_path(name) is None:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    snapshots.delete_snapshot(name)
+    return {"ok": True}
@@ -0,0 +1,83 @@
+import csv
+import io
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from . import models, schemas
+from .database import get_db
+from .backtest import invalidate_networth_timeline
+from .fx import invalidate_fx_table
+
+router = APIRouter(
+    prefix="/fx",
+    tags=["fx"]
+)
+
+@router.get("/rates", response_model=List[schemas.FxRateResponse])
+def list_rates(currency: Optional[str] = None, db: Session = Depends(get_db)):
+    query = db.query(models.FxRate)
+    if currency:
+        query = query.filter(models.FxRate.currency == currency.upper())
+    return query.order_by(models.FxRate.currency, models.FxRate.date).all()
+
+@router.post("/import", response_model=schemas.FxImportResponse)
+def import_rates(payload: schemas.FxImportRequest, db: Session = Depends(get_db)):
+    """
+    Import rates from CSV text with columns: date,currency,rate
+    (rate = units of main currency per 1 unit of currency). A header row is
+    optional. Existing (currency, date) rates are overwritten.
+    """
+    parsed = {}
+    for line_no, row in enumerate(csv.reader(io.StringIO(payload.csv)), start=1):
+        if not row or not "".join(row).strip():
+            continue
+        if line_no == 1 and row[0].strip().lower() == "date":
+            continue
+        if len(row) < 3:
+            raise HTTPException(status_code=400, detail=f"Line {line_no}: expected date,currency,rate")
+        date_str, currency, rate_str = (c.strip() for c in row[:3])
+        try:
+            # Only Y-M-D, stored zero-padded: fromisoformat also takes compact/week forms
+            date_str = datetime.strptime(date_str, "%Y-%m-%d").date().isoformat()
+            rate = float(rate_str)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Line {line_no}: invalid date or rate")
+        if rate <= 0 or not currency:
+            raise HTTPException(status_code=400, detail=f"Line {line_no}: rate must be positive and currency set")
+        parsed[(currency.upper(), date_str)] = rate
+
+    if not parsed:
+        return schemas.FxImportResponse(imported=0, currencies=[])
+
+    currencies = sorted({c for c, _ in parsed})
+    existing = {
+        (r.currency, r.date): r
+        for r in db.query(models.FxRate).filter(models.FxRate.currency.in_(currencies)).all()
+    }
+    new_rows = []
+    for (currency, date_str), rate in parsed.items():
+        row = existing.get((currency, date_str))
+        if row:
+            row.rate = rate
+        else:
+            new_rows.append({"currency": currency, "date": date_str, "rate": rate})
+    if new_rows:
+        db.execute(insert(models.FxRate), new_rows)
+    db.commit()
+    invalidate_fx_table()
+    invalidate_networth_timeline()
+    return schemas.FxImportResponse(imported=len(parsed), currencies=currencies)
+
+@router.delete("/rates")
+def delete_rates(currency: Optional[str] = None, db: Session = Depends(get_db)):
+    query = db.query(models.FxRate)
+    if currency:
+        query = query.filter(models.FxRate.currency == currency.upper())
+    query.delete(synchronize_session=False)
+    db.commit()
+    invalidate_fx_table()
+    invalidate_networth_timeline()
+    return {"ok": True}
@@ -0,0 +1,128 @@
+"""
+Live Projection Sessions
+------------------------
+A websocket alternative to POST /scenarios/calculate for slider drags. The
+server keeps the session's last ProjectionRequest, so the client only sends
+the fields that changed:
+
+    -> {"type": "init",   "seq": 1, "request": {...full ProjectionRequest...}}
+    -> {"type": "update", "seq": 2, "delta": {"market_return": 6.5}}
+    <- {"type": "result", "seq": 2, "series": {"net_worth": [...], ...},
+        "milestones": [...], "final_net_worth": ..., "final_buying_power": ...}
+    <- {"type": "error",  "seq": 2, "detail": ...}
+
+Bursts of deltas are coalesced (FINANCIALIZE_LIVE_DEBOUNCE_MS) and a result
+that is superseded while computing is dropped instead of sent. ``series``
+holds only the columns that changed since the last push, and ``milestones``
+is omitted when unchanged.
+"""
+
+import asyncio
+import json
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+
+from . import config
+from .logic import ProjectionResult, run_projection
+from .schemas import ProjectionRequest
+
+router = APIRouter(
+    prefix="/scenarios",
+    tags=["live"]
+)
+
+DEBOUNCE_SECONDS = config.LIVE_DEBOUNCE_MS / 1000.0
+LIVE_SERIES = ("year", "age", "net_worth", "contribution", "interest_earned", "buying_power", "events_value")
+
+
+class LiveSession:
+    """Per-connection state: merged request params and the last pushed output."""
+
+    def __init__(self):
+        self.params = {}
+        self.seq = 0
+        self.dirty = asyncio.Event()
+        self._sent_series = {}
+        self._sent_milestones = None
+
+    def apply(self, message: dict):
+        kind = message.get("type")
+        if kind == "init":
+            self.params = dict(message.get("request") or {})
+            self._sent_series = {}
+            self._sent_milestones = None
+        elif kind == "update":
+            self.params.update(message.get("delta") or {})
+        else:
+            raise ValueError(f"Unknown message type: {kind!r}")
+        self.seq = message.get("seq", self.seq + 1)
+        self.dirty.set()
+
+    def result_message(self, seq: int, result: ProjectionResult) -> dict:
+        all_columns = result.columns()
+        columns = {name: all_columns[name] for name in LIVE_SERIES}
+        message = {
+            "type": "result",
+            "seq": seq,
+            "series": {name: values for name, values in columns.items() if self._sent_series.get(name) != values},
+            "final_net_worth": columns["net_worth"][-1],
+            "final_buying_power": columns["buying_power"][-1],
+        }
+        self._sent_series = columns
+
+        milestone_dicts = result.milestone_dicts()
+        if milestone_dicts != self._sent_milestones:
+            message["milestones"] = milestone_dicts
+            self._sent_milestones = milestone_dicts
+        return message
+
+
+async def _compute_loop(websocket: WebSocket, session: LiveSession):
+    while True:
+        await session.dirty.wait()
+        # 1. Debounce: let a burst of deltas land before computing
+        await asyncio.sleep(DEBOUNCE_SECONDS)
+        session.dirty.clear()
+        seq = session.seq
+
+        # 2. Validate the merged state once per computation, not per delta
+        try:
+            request = ProjectionRequest.model_validate(session.params)
+        except ValidationError as e:
+            await websocket.send_json({"type": "error", "seq": seq, "detail": json.loads(e.json(include_url=False))})
+            continue
+
+        # 3. Compute off the event loop
+        try:
+            result = await run_in_threadpool(run_projection, request)
+        except Exception as e:
+            await websocket.send_json({"type": "error", "seq": seq, "detail": str(e)})
+            continue
+
+        # 4. Drop results superseded while computing; the newer state runs next
+        if session.dirty.is_set():
+            continue
+        await websocket.send_json(session.result_message(seq, result))
+
+
+@router.websocket("/live")
+async def live_projection(websocket: WebSocket):
+    await websocket.accept()
+    session = LiveSession()
+    compute = asyncio.create_task(_compute_loop(websocket, session))
+    try:
+        while True:
+            try:
+                session.apply(await websocket.receive_json())
+            except (ValueError, AttributeError) as e:
+                await websocket.send_json({"type": "error", "seq": session.seq, "detail": str(e)})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        compute.cancel()
+        try:
+            await compute
+        except (asyncio.CancelledError, WebSocketDisconnect, RuntimeError):
+            pass
@@ -1,9 +1,13 @@
 
+from datetime import date
+
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
 from . import models, schemas
+from .backtest import run_backtest
 from .database import get_db
+from .profiling import profiled
 
 router = APIRouter(
     prefix="/scenarios",
@@ -23,7 +27,7 @@ def get_scenario(scenario_id: int, db: Session = Depends(get_db)):
 
 @router.post("/saved", response_model=schemas.ScenarioResponse)
 def create_scenario(payload: schemas.ScenarioCreate, db: Session = Depends(get_db)):
-    scenario = models.UserScenario(name=payload.name, data=payload.data)
+    scenario = models.UserScenario(name=payload.name, data=payload.data, created_at=date.today().isoformat())
     db.add(scenario)
     db.commit()
     db.refresh(scenario)
@@ -48,3 +52,9 @@ def delete_scenario(scenario_id: int, db: Session = Depends(get_db)):
     db.delete(scenario)
     db.commit()
     return {"ok": True}
+
+@router.post("/backtest", response_model=schemas.BacktestResponse)
+@profiled
+def backtest_scenarios(request: schemas.BacktestRequest, db: Session = Depends(get_db)):
+    """Plan vs. reality for every (or the selected) saved scenario in one pass."""
+    return run_backtest(request, db)
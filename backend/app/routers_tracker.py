@@ -1,9 +1,17 @@
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from . import models, schemas
-from .database import get_db
+from .database import ensure_schema, get_db, recreate_tables
+from .backtest import get_account_timeline, invalidate_networth_timeline, scenario_plan
+from .fx import get_fx_table
+from .logic import calculate_goals
+from .profiling import profiled
+from .rollups import RESOLUTIONS, history_span_days, refresh_buckets, select_tier
+from .timeseries import (
+    get_series_store, invalidate_series_store, record_account_deleted, record_entry, record_entry_deleted,
+)
 
 router = APIRouter(
     prefix="/tracker",
@@ -41,8 +49,7 @@ def delete_person(person_id: int, db: Session = Depends(get_db)):
     person = db.query(models.Person).filter(models.Person.id == person_id).first()
     if not person:
         raise HTTPException(status_code=404, detail="Person not found")
-    # Unlink accounts before deleting
-    db.query(models.Account).filter(models.Account.person_id == person_id).update({"person_id": None})
+    # Accounts are unlinked by ON DELETE SET NULL
     db.delete(person)
     db.commit()
     return {"ok": True}
@@ -50,28 +57,44 @@ def delete_person(person_id: int, db: Session = Depends(get_db)):
 # --- Accounts ---
 
 @router.get("/accounts", response_model=List[schemas.AccountResponse])
+@profiled
 def get_accounts(db: Session = Depends(get_db)):
     accounts = db.query(models.Account).all()
+    fx = get_fx_table(db)
+    store = get_series_store(db)
     result = []
     for acc in accounts:
-        latest_entry = db.query(models.BalanceEntry).filter(models.BalanceEntry.account_id == acc.id).order_by(models.BalanceEntry.date.desc()).first()
+        latest = store.latest(acc.id)
         acc_data = schemas.AccountResponse.from_orm(acc)
-        acc_data.current_balance = latest_entry.amount if latest_entry else 0.0
+        if latest is not None:
+            date, amount = latest
+            acc_data.current_balance = amount
+            acc_data.converted_balance = fx.convert(amount, acc.currency, date)
+        else:
+            acc_data.current_balance = 0.0
+            acc_data.converted_balance = 0.0
         if acc.person:
             acc_data.person_name = acc.person.name
         result.append(acc_data)
     return result
 
+def _require_person(person_id, db: Session):
+    if person_id is not None and db.get(models.Person, person_id) is None:
+        raise HTTPException(status_code=404, detail="Person not found")
+
 @router.post("/accounts", response_model=schemas.AccountResponse)
 def create_account(account: schemas.AccountCreate, db: Session = Depends(get_db)):
+    _require_person(account.person_id, db)
     db_account = models.Account(
         name=account.name, type=account.type,
         subtype=account.subtype, description=account.description,
         target_balance=account.target_balance, currency=account.currency,
-        person_id=account.person_id
+        person_id=account.person_id, interest_rate=account.interest_rate,
+        minimum_payment=account.minimum_payment
     )
     db.add(db_account)
     db.commit()
+    invalidate_networth_timeline()
     db.refresh(db_account)
     resp = schemas.AccountResponse.from_orm(db_account)
     if db_account.person:
@@ -83,6 +106,7 @@ def update_account(account_id: int, update: schemas.AccountCreate, db: Session =
     account = db.query(models.Account).filter(models.Account.id == account_id).first()
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
+    _require_person(update.person_id, db)
     account.name = update.name
     account.type = update.type
     account.subtype = update.subtype
@@ -90,7 +114,10 @@ def update_account(account_id: int, update: schemas.AccountCreate, db: Session =
     account.target_balance = update.target_balance
     account.currency = update.currency
     account.person_id = update.person_id
+    account.interest_rate = update.interest_rate
+    account.minimum_payment = update.minimum_payment
     db.commit()
+    invalidate_networth_timeline()
     db.refresh(account)
     resp = schemas.AccountResponse.from_orm(account)
     if account.person:
@@ -102,14 +129,56 @@ def delete_account(account_id: int, db: Session = Depends(get_db)):
     account = db.query(models.Account).filter(models.Account.id == account_id).first()
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
+    # One DELETE: entries go with it via ON DELETE CASCADE (passive_deletes)
     db.delete(account)
     db.commit()
+    record_account_deleted(account_id)
+    invalidate_networth_timeline()
     return {"ok": True}
 
+# --- Goals ---
+
+@router.get("/goals", response_model=schemas.GoalsResponse)
+@profiled
+def get_goals(
+    window_days: int = Query(365, ge=7),
+    market_return: Optional[float] = None,
+    monthly_contribution: float = Query(0.0, ge=0),
+    scenario_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Progress and ETA for every account with a target_balance. The market ETA
+    uses `market_return` (percent), or the market return of saved scenario
+    `scenario_id`.
+    """
+    if market_return is None and scenario_id is not None:
+        scenario = db.get(models.UserScenario, scenario_id)
+        if scenario is None:
+            raise HTTPException(status_code=404, detail="Scenario not found")
+        plan = scenario_plan(scenario, 12, None)
+        if plan.request is None:
+            raise HTTPException(status_code=400, detail=plan.message)
+        market_return = plan.request.market_return
+
+    timeline = get_account_timeline(db)
+    accounts = [
+        {"id": aid, "name": name, "currency": currency, "target_balance": target}
+        for aid, name, currency, target in db.query(
+            models.Account.id, models.Account.name, models.Account.currency, models.Account.target_balance
+        ).filter(models.Account.target_balance.isnot(None)).order_by(models.Account.id)
+    ]
+    return calculate_goals(
+        accounts, timeline.days, timeline.account_ids, timeline.matrix, timeline.first_days,
+        window_days=window_days, market_return=market_return, monthly_contribution=monthly_contribution,
+    )
+
 # --- Balance Entries ---
 
 @router.post("/entries", response_model=schemas.BalanceEntryResponse)
 def add_entry(entry: schemas.BalanceEntryCreate, db: Session = Depends(get_db)):
+    if db.get(models.Account, entry.account_id) is None:
+        raise HTTPException(status_code=404, detail="Account not found")
     db_entry = models.BalanceEntry(
         account_id=entry.account_id,
         date=entry.date,
@@ -117,13 +186,29 @@ def add_entry(entry: schemas.BalanceEntryCreate, db: Session = Depends(get_db)):
         note=entry.note
     )
     db.add(db_entry)
+    db.flush()
+    refresh_buckets(db, db_entry.account_id, [db_entry.date])
     db.commit()
+    record_entry(db_entry.account_id, db_entry.id, db_entry.date, db_entry.amount)
+    invalidate_networth_timeline()
     db.refresh(db_entry)
     return db_entry
 
 @router.get("/history", response_model=List[schemas.BalanceEntryResponse])
-def get_history(account_id: int = None, db: Session = Depends(get_db)):
+@profiled
+def get_history(account_id: int = None, resolution: str = "raw", db: Session = Depends(get_db)):
+    """
+    Balance entries, newest first. resolution=week|month returns only the
+    last entry per account per bucket (auto: coarsest tier that keeps the
+    chart detailed), read from the rollup tables.
+    """
+    if resolution not in RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"resolution must be one of {', '.join(RESOLUTIONS)}")
+    tier = select_tier(resolution, history_span_days(db, account_id))
     query = db.query(models.BalanceEntry)
+    if tier != "raw":
+        rollup = models.BalanceRollup
+        query = query.join(rollup, rollup.entry_id == models.BalanceEntry.id).filter(rollup.tier == tier)
     if account_id:
         query = query.filter(models.BalanceEntry.account_id == account_id)
     return query.order_by(models.BalanceEntry.date.desc()).all()
@@ -133,10 +218,15 @@ def update_entry(entry_id: int, update: schemas.BalanceEntryCreate, db: Session
     entry = db.query(models.BalanceEntry).filter(models.BalanceEntry.id == entry_id).first()
     if not entry:
         raise HTTPException(status_code=404, detail="Entry not found")
+    old_date = entry.date
     entry.date = update.date
     entry.amount = update.amount
     entry.note = update.note
+    db.flush()
+    refresh_buckets(db, entry.account_id, [old_date, entry.date])
     db.commit()
+    record_entry(entry.account_id, entry.id, entry.date, entry.amount)
+    invalidate_networth_timeline()
     db.refresh(entry)
     return entry
 
@@ -146,17 +236,22 @@ def delete_entry(entry_id: int, db: Session = Depends(get_db)):
     if not entry:
         raise HTTPException(status_code=404, detail="Entry not found")
     db.delete(entry)
+    db.flush()
+    refresh_buckets(db, entry.account_id, [entry.date])
     db.commit()
+    record_entry_deleted(entry.account_id, entry_id)
+    invalidate_networth_timeline()
     return {"ok": True}
 
 @router.delete("/reset-all")
-def reset_all_data(db: Session = Depends(get_db)):
+def reset_all_data():
     """Wipe all user data from the database (factory reset)."""
-    db.query(models.BalanceEntry).delete()
-    db.query(models.Account).delete()
-    db.query(models.Person).delete()
-    db.query(models.IncomeItem).delete()
-    db.query(models.ExpenseItem).delete()
-    db.query(models.UserScenario).delete()
-    db.commit()
+    ensure_schema()
+    recreate_tables([
+        models.BalanceEntry.__table__, models.Account.__table__, models.Person.__table__,
+        models.IncomeItem.__table__, models.ExpenseItem.__table__, models.UserScenario.__table__,
+        models.BalanceRollup.__table__,
+    ])
+    invalidate_series_store()
+    invalidate_networth_timeline()
     return {"ok": True}
@@ -1,6 +1,6 @@
 
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Optional
 
 # --- Shared Base Models ---
 class IncomeBase(BaseModel):
@@ -18,9 +18,25 @@ class LifeEvent(BaseModel):
     amount: float # Positive = Income/Windfall, Negative = Expense/Cost
     is_recurring: bool = False
     duration: int = 1 # If recurring, for how many years?
+    month: Optional[int] = Field(None, ge=1, le=12) # Month within the year (sub-annual engine only); None = year end
 
 # --- API Request Models ---
 
+MilestoneMetric = Literal["net_worth", "buying_power", "contribution", "interest_earned", "events_value"]
+
+class MilestoneRule(BaseModel):
+    """A milestone is the first year `metric` reaches a threshold."""
+    name: str # "{currency}" is replaced with the request currency
+    message: str = ""
+    metric: MilestoneMetric = "net_worth"
+    threshold: float = 0.0 # Fixed amount
+    spend_multiple: Optional[float] = None # Adds annual spend × multiple (25 = FI number)
+    inflation_adjusted: bool = False # Grow the threshold with inflation each year
+    compare_to: Optional[MilestoneMetric] = None # Compare against another series instead (must be > 0)
+    strict: bool = False # '>' instead of '>='
+    min_year: int = Field(0, ge=0)
+    from_below: bool = False # Only counts if the rule is not already met in year 0
+
 class ProjectionRequest(BaseModel):
     """Payload sent by Frontend to calculate future"""
     current_savings: float
@@ -33,6 +49,8 @@ class ProjectionRequest(BaseModel):
     inflation: float = 2.5 # Percent
     current_age: int = 30
     currency: str = "$"
+    steps_per_year: int = Field(1, ge=1, le=365) # 1 = annual compounding, 12 = monthly
+    milestone_rules: Optional[List[MilestoneRule]] = None # None = built-in milestones
 
 class ReversePlanRequest(BaseModel):
     """Payload to calculate required monthly savings to hit a target"""
@@ -54,6 +72,7 @@ class FIRERequest(BaseModel):
     safe_withdrawal_rate: float = 4.0 # Percent
     return_rate: float = 7.0
     inflation: float = 2.5
+    monthly_contribution: Optional[float] = None # If set, years_to_fire includes ongoing savings
 
 class FIREResponse(BaseModel):
     fire_number: float
@@ -61,6 +80,38 @@ class FIREResponse(BaseModel):
     years_to_fire: float # Estimate
     message: str
 
+class WithdrawalRequest(BaseModel):
+    """Payload to stress-test a retirement portfolio under withdrawals"""
+    starting_portfolio: float
+    annual_spend: Optional[float] = None # Defaults to starting_portfolio * SWR
+    safe_withdrawal_rate: float = 4.0 # Percent
+    strategy: Literal["inflation_adjusted", "fixed_percent", "guardrail"] = "inflation_adjusted"
+    guardrail_band: float = 20.0 # Percent drift from the initial rate that triggers an adjustment
+    guardrail_adjustment: float = 10.0 # Percent cut/raise applied when a guardrail is hit
+    years: int = Field(30, ge=1, le=100)
+    return_rate: float = 7.0 # Mean nominal return, percent
+    volatility: float = 15.0 # Std dev of annual return, percent
+    inflation: float = 2.5
+    n_paths: int = Field(1000, ge=1, le=100000)
+    seed: Optional[int] = None
+    historical_returns: Optional[List[float]] = None # Annual % returns; every start year becomes a path
+
+class WithdrawalPercentile(BaseModel):
+    year: int
+    p10: float
+    p50: float
+    p90: float
+
+class WithdrawalResponse(BaseModel):
+    survival_probability: float # Percent of paths that never ran out
+    n_paths: int
+    initial_withdrawal: float
+    depletion_histogram: List[int] # Index i = paths depleted during year i + 1
+    median_depletion_year: Optional[float] = None # Among depleted paths
+    median_final_balance: float
+    percentiles: List[WithdrawalPercentile]
+    message: str
+
 # --- API Response Models ---
 class YearProjection(BaseModel):
     year: int
@@ -110,6 +161,8 @@ class AccountBase(BaseModel):
     target_balance: Optional[float] = None
     currency: Optional[str] = None
     person_id: Optional[int] = None
+    interest_rate: Optional[float] = None # Annual percent (liabilities: debt payoff engine)
+    minimum_payment: Optional[float] = None # Monthly, in the account's currency
 
 class AccountCreate(AccountBase):
     pass
@@ -117,6 +170,7 @@ class AccountCreate(AccountBase):
 class AccountResponse(AccountBase):
     id: int
     current_balance: Optional[float] = 0.0
+    converted_balance: Optional[float] = None # current_balance in main currency (server FX table)
     person_name: Optional[str] = None
 
     class Config:
@@ -137,6 +191,31 @@ class BalanceEntryResponse(BalanceEntryBase):
     class Config:
         from_attributes = True
 
+# --- Goals ---
+
+class GoalProgress(BaseModel):
+    account_id: int
+    name: str
+    currency: Optional[str] = None # Goal amounts are in the account's own currency
+    direction: Literal["save", "pay_down"] # pay_down: target below the current balance
+    target_balance: float
+    current_balance: float
+    remaining: float # Distance left to the target
+    progress_pct: float
+    reached: bool
+    monthly_trend: float # Recent least-squares slope, per month
+    r_squared: float
+    eta_months: Optional[float] = None # At the recent trend; None = trend heads away or is flat
+    eta_date: Optional[str] = None
+    market_eta_months: Optional[float] = None # Growing at the market return plus contributions
+    market_eta_date: Optional[str] = None
+
+class GoalsResponse(BaseModel):
+    goals: List[GoalProgress]
+    window_days: int
+    market_return: Optional[float] = None
+    message: str
+
 # --- Scenarios ---
 
 class ScenarioCreate(BaseModel):
@@ -147,16 +226,57 @@ class ScenarioResponse(BaseModel):
     id: int
     name: str
     data: Optional[str] = None
+    created_at: Optional[str] = None # YYYY-MM-DD; backtests replay the plan from here
 
     class Config:
         from_attributes = True
 
+class BacktestRequest(BaseModel):
+    scenario_ids: Optional[List[int]] = None # None = every saved scenario
+    start_from: Literal["actual", "plan"] = "actual" # Tracker net worth on the start date, or the plan's own starting savings
+    steps_per_year: int = Field(12, ge=1, le=365)
+
+class BacktestYear(BaseModel):
+    year: int # 1 = first year after the start date
+    end_date: str # Last tracker date in this year
+    planned: float
+    actual: float
+    drift: float # actual - planned at end_date
+    drift_pct: float
+    tracking_error: float # RMS % deviation over the year's tracker dates
+    points: int
+
+class ScenarioBacktest(BaseModel):
+    scenario_id: int
+    name: str
+    start_date: Optional[str] = None
+    start_balance: float = 0.0
+    years: List[BacktestYear] = []
+    tracking_error: float = 0.0 # RMS % deviation over the whole backtest
+    final_drift: float = 0.0
+    final_drift_pct: float = 0.0
+    message: str = ""
+
+class BacktestResponse(BaseModel):
+    scenarios: List[ScenarioBacktest]
+    timeline_points: int
+
 # --- Forecast ---
 class ForecastRequest(BaseModel):
     years: int = 30
     current_age: int = 30
     inflation: float = 2.5
     currency: str = "$"
+    model: Literal["linear", "weighted", "exponential", "theil_sen", "rolling", "seasonal"] = "linear"
+    half_life_days: float = Field(365.0, gt=0) # weighted: age at which a point counts half
+    window_days: int = Field(365, ge=1) # rolling: how much recent history to fit
+    confidence: float = Field(95.0, gt=0, lt=100) # Prediction interval, percent
+    resolution: Literal["auto", "raw", "week", "month"] = "auto" # History tier; auto = coarsest that fits the fit window
+
+class ForecastInterval(BaseModel):
+    year: int
+    lower: float
+    upper: float
     
 class ForecastResponse(BaseModel):
     monthly_growth: float
@@ -164,3 +284,139 @@ class ForecastResponse(BaseModel):
     r_squared: float # Confidence
     forecast_data: List[YearProjection]
     message: str
+    model: str = "linear"
+    intervals: List[ForecastInterval] = []
+    resolution: str = "raw" # History tier the fit read
+
+
+class GroupedForecastRequest(BaseModel):
+    years: int = 30
+    inflation: float = 2.5
+    group_by: List[Literal["account", "type", "subtype", "person"]] = ["account", "type", "subtype", "person"]
+    resolution: Literal["auto", "raw", "week", "month"] = "auto"
+
+class GroupForecast(BaseModel):
+    group_by: str # "total", "account", "type", "subtype" or "person"
+    key: str
+    label: str
+    current_value: float # Net-worth contribution (liabilities negative)
+    monthly_growth: float
+    annual_growth_rate: float
+    r_squared: float
+    forecast: List[float] # Projected value per year, year 0 = current
+
+class GroupedForecastResponse(BaseModel):
+    total: GroupForecast
+    groups: List[GroupForecast]
+    message: str
+    resolution: str = "raw" # History tier the fit read
+
+
+# --- FX ---
+
+class FxRateResponse(BaseModel):
+    id: int
+    currency: str
+    date: str
+    rate: float
+
+    class Config:
+        from_attributes = True
+
+class FxImportRequest(BaseModel):
+    csv: str # "date,currency,rate" rows
+
+class FxImportResponse(BaseModel):
+    imported: int
+    currencies: List[str]
+
+# --- Data Archive ---
+
+class ImportResponse(BaseModel):
+    tables: Dict[str, int] # Rows loaded per table
+    rows: int
+
+# --- Snapshots ---
+
+class SnapshotInfo(BaseModel):
+    name: str
+    kind: str # "auto", "manual" or "pre-restore"
+    created_at: str
+    bytes: int
+
+class SnapshotResult(BaseModel):
+    name: str
+    kind: str
+    bytes: int
+    pages: int
+    seconds: float
+    mb_per_s: float # Backup throughput
+    steps: int
+    restarts: int # Copies restarted by concurrent writes
+    max_step_ms: float # Longest a concurrent write could have waited
+
+class SnapshotStats(BaseModel):
+    last: Optional[SnapshotResult] = None
+    backups: int
+    bytes: int
+    seconds: float
+
+class SnapshotListResponse(BaseModel):
+    directory: str
+    interval_hours: float
+    keep: int
+    snapshots: List[SnapshotInfo]
+    stats: SnapshotStats
+
+class RestoreResponse(BaseModel):
+    restored: str
+    safety_snapshot: str # Pre-restore copy of the data that was replaced
+    seconds: float
+
+# --- Debt Payoff ---
+
+DebtStrategy = Literal["avalanche", "snowball", "minimum"]
+
+class DebtInput(BaseModel):
+    name: str
+    balance: float = Field(ge=0) # Amount owed
+    interest_rate: float = Field(0.0, ge=0) # Annual percent
+    minimum_payment: Optional[float] = Field(None, ge=0) # Monthly; None = interest + 1% of balance
+    account_id: Optional[int] = None
+
+class DebtLumpSum(BaseModel):
+    month: int = Field(ge=1) # 1 = the coming month
+    amount: float = Field(gt=0)
+
+class DebtPayoffRequest(BaseModel):
+    debts: Optional[List[DebtInput]] = None # None = the tracker's Liability accounts
+    extra_payment: float = Field(0.0, ge=0) # Monthly, on top of the minimums
+    lump_sums: List[DebtLumpSum] = []
+    strategies: List[DebtStrategy] = ["avalanche", "snowball", "minimum"]
+    max_years: int = Field(30, ge=1, le=100)
+    projection: Optional[ProjectionRequest] = None # Also project each strategy with freed cash flow invested
+
+class DebtResult(BaseModel):
+    name: str
+    account_id: Optional[int] = None
+    payoff_month: Optional[int] = None # None = not paid off within the horizon
+    interest_paid: float
+    total_paid: float
+
+class DebtStrategyResult(BaseModel):
+    strategy: DebtStrategy
+    months_to_debt_free: Optional[int] = None
+    total_interest: float
+    total_paid: float
+    debts: List[DebtResult]
+    freed_cash_flow: List[float] # Per year (1-based), money no longer needed for debt
+    events: List[LifeEvent] # freed_cash_flow as projection events
+    final_net_worth: Optional[float] = None # With `projection` in the request
+
+class DebtPayoffResponse(BaseModel):
+    monthly_outlay: float # Minimums + extra payment
+    strategies: List[DebtStrategyResult]
+    recommended: Optional[DebtStrategy] = None # Least interest, then fastest
+    interest_saved: Optional[float] = None # Recommended vs. minimum payments only
+    projection: Optional[List[YearProjection]] = None # Recommended strategy
+    message: str
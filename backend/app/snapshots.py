@@ -0,0 +1,294 @@
+"""
+Database Snapshots
+------------------
+Consistent copies of financialize.db taken with SQLite's online backup API
+while the app keeps serving requests.
+
+- The copy runs in steps of SNAPSHOT_STEP_PAGES pages with a short pause
+  between steps, so a concurrent write waits at most one step.
+- A write from another connection restarts the copy; after a few restarts
+  it finishes in a single step instead of chasing a busy database.
+- Snapshots are written to a .partial file and renamed, so a crash never
+  leaves a torn snapshot behind.
+- A scheduler thread takes an "auto" snapshot every SNAPSHOT_INTERVAL_HOURS
+  and keeps the newest SNAPSHOT_KEEP of them; "manual" and "pre-restore"
+  snapshots are kept until deleted.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .config import SNAPSHOT_INTERVAL_HOURS, SNAPSHOT_KEEP, SNAPSHOT_STEP_PAGES, SNAPSHOT_STEP_PAUSE_MS
+from .database import DATA_DIR, DB_PATH, engine, ensure_schema, reset_schema_state
+
+SNAPSHOT_DIR = os.path.join(DATA_DIR, "backups")
+KINDS = ("auto", "manual", "pre-restore")
+MAX_RESTARTS = 3
+
+_NAME = re.compile(r"^financialize-(\d{8}-\d{6})-(auto|manual|pre-restore)\.db$")
+_lock = threading.Lock()  # One backup or restore at a time
+_last: Optional[Dict] = None
+_totals = {"backups": 0, "bytes": 0, "seconds": 0.0}
+
+
+class SnapshotError(Exception):
+    """Snapshot missing or unusable."""
+
+
+class SnapshotBusy(SnapshotError):
+    """Another backup or restore is running."""
+
+
+class _Restarted(Exception):
+    pass
+
+
+def _copy(source: sqlite3.Connection, dest: sqlite3.Connection, pages: int, pause: float) -> Dict:
+    """Run one backup pass and return step timings. Raises _Restarted when writes keep interrupting it."""
+    stats = {"steps": 0, "restarts": 0, "max_step_ms": 0.0}
+    state = {"remaining": None, "resumed": time.perf_counter()}
+
+    def progress(status, remaining, total):
+        step_ms = (time.perf_counter() - state["resumed"]) * 1000
+        stats["steps"] += 1
+        stats["max_step_ms"] = max(stats["max_step_ms"], step_ms)
+        if state["remaining"] is not None and remaining > state["remaining"]:
+            stats["restarts"] += 1
+            if stats["restarts"] >= MAX_RESTARTS:
+                raise _Restarted()
+        state["remaining"] = remaining
+        if remaining and pause:
+            time.sleep(pause)  # Released the source lock: let writers in
+        state["resumed"] = time.perf_counter()
+
+    source.backup(dest, pages=pages, progress=progress)
+    return stats
+
+
+def _snapshot_name(kind: str) -> str:
+    name = f"financialize-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{kind}.db"
+    # Two snapshots within a second: wait out the clash rather than overwrite
+    while os.path.exists(os.path.join(SNAPSHOT_DIR, name)):
+        time.sleep(0.05)
+        name = f"financialize-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{kind}.db"
+    return name
+
+
+def _backup(kind: str) -> Dict:
+    global _last
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    name = _snapshot_name(kind)
+    path = os.path.join(SNAPSHOT_DIR, name)
+    partial = path + ".partial"
+
+    start = time.perf_counter()
+    source = sqlite3.connect(DB_PATH, timeout=30)
+    try:
+        # 1. Incremental copy; fall back to one step if writers keep restarting it
+        dest = sqlite3.connect(partial)
+        try:
+            try:
+                stats = _copy(source, dest, SNAPSHOT_STEP_PAGES, SNAPSHOT_STEP_PAUSE_MS / 1000)
+            except _Restarted:
+                stats = _copy(source, dest, -1, 0)
+                stats["restarts"] = MAX_RESTARTS
+            pages = dest.execute("PRAGMA page_count").fetchone()[0]
+        finally:
+            dest.close()
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    finally:
+        source.close()
+
+    # 2. Publish atomically
+    os.replace(partial, path)
+    seconds = time.perf_counter() - start
+    size = os.path.getsize(path)
+    result = {
+        "name": name,
+        "kind": kind,
+        "bytes": size,
+        "pages": pages,
+        "seconds": round(seconds, 4),
+        "mb_per_s": round(size / 1e6 / seconds, 2) if seconds else 0.0,
+        **stats,
+        "max_step_ms": round(stats["max_step_ms"], 2),
+    }
+    _last = result
+    _totals["backups"] += 1
+    _totals["bytes"] += size
+    _totals["seconds"] += seconds
+    return result
+
+
+def create_snapshot(kind: str = "manual") -> Dict:
+    """Take a snapshot now; rotates old auto snapshots afterwards."""
+    if kind not in KINDS:
+        raise ValueError(f"kind must be one of {', '.join(KINDS)}")
+    ensure_schema()
+    if not _lock.acquire(blocking=False):
+        raise SnapshotBusy("Another backup or restore is in progress")
+    try:
+        result = _backup(kind)
+    finally:
+        _lock.release()
+    rotate()
+    return result
+
+
+def list_snapshots() -> List[Dict]:
+    """Snapshots on disk, newest first."""
+    if not os.path.isdir(SNAPSHOT_DIR):
+        return []
+    snapshots = []
+    for name in os.listdir(SNAPSHOT_DIR):
+        match = _NAME.match(name)
+        if not match:
+            continue
+        created = datetime.strptime(match.group(1), "%Y%m%d-%H%M%S")
+        snapshots.append({
+            "name": name,
+            "kind": match.group(2),
+            "created_at": created.isoformat(),
+            "bytes": os.path.getsize(os.path.join(SNAPSHOT_DIR, name)),
+        })
+    snapshots.sort(key=lambda s: s["created_at"], reverse=True)
+    return snapshots
+
+
+def snapshot_path(name: str) -> Optional[str]:
+    """Absolute path of a snapshot, or None for unknown/unsafe names."""
+    if not _NAME.match(name):
+        return None
+    path = os.path.join(SNAPSHOT_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+def delete_snapshot(name: str):
+    path = snapshot_path(name)
+    if path is None:
+        raise SnapshotError(f"Snapshot {name!r} not found")
+    os.remove(path)
+
+
+def rotate() -> List[str]:
+    """Delete auto snapshots beyond the newest SNAPSHOT_KEEP."""
+    autos = [s["name"] for s in list_snapshots() if s["kind"] == "auto"]
+    removed = autos[SNAPSHOT_KEEP:]
+    for name in removed:
+        os.remove(os.path.join(SNAPSHOT_DIR, name))
+    return removed
+
+
+def restore_snapshot(name: str) -> Dict:
+    """
+    Copy a snapshot back over the live database. The current data is saved
+    as a pre-restore snapshot first, so a restore can itself be undone.
+    """
+    path = snapshot_path(name)
+    if path is None:
+        raise SnapshotError(f"Snapshot {name!r} not found")
+    ensure_schema()
+    if not _lock.acquire(blocking=False):
+        raise SnapshotBusy("Another backup or restore is in progress")
+    try:
+        # 1. Refuse corrupt snapshots before touching the live database
+        source = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            try:
+                check = source.execute("PRAGMA quick_check").fetchone()[0]
+            except sqlite3.DatabaseError as e:
+                raise SnapshotError(f"Snapshot {name!r} is not a readable database: {e}")
+            if check != "ok":
+                raise SnapshotError(f"Snapshot {name!r} is corrupt: {check}")
+
+            # 2. Safety copy, then a single-step copy into the live file
+            safety = _backup("pre-restore")
+            start = time.perf_counter()
+            dest = sqlite3.connect(DB_PATH, timeout=30)
+            try:
+                source.backup(dest)
+            finally:
+                dest.close()
+            seconds = time.perf_counter() - start
+        finally:
+            source.close()
+
+        # 3. Pooled connections may cache the old schema; older snapshots get migrated
+        engine.dispose()
+        reset_schema_state()
+        ensure_schema()
+    finally:
+        _lock.release()
+    return {"restored": name, "safety_snapshot": safety["name"], "seconds": round(seconds, 4)}
+
+
+def backup_stats() -> Dict:
+    return {"last": _last, **_totals, "seconds": round(_totals["seconds"], 4)}
+
+
+def render_prometheus() -> List[str]:
+    lines = [
+        "# HELP financialize_snapshots_total Snapshots taken since startup.",
+        "# TYPE financialize_snapshots_total counter",
+        f"financialize_snapshots_total {_totals['backups']}",
+        "# HELP financialize_snapshot_bytes_total Bytes written by snapshots since startup.",
+        "# TYPE financialize_snapshot_bytes_total counter",
+        f"financialize_snapshot_bytes_total {_totals['bytes']}",
+        "# HELP financialize_snapshot_seconds_total Time spent taking snapshots.",
+        "# TYPE financialize_snapshot_seconds_total counter",
+        f"financialize_snapshot_seconds_total {_totals['seconds']:.6f}",
+    ]
+    if _last:
+        lines += [
+            "# HELP financialize_snapshot_max_step_ms Longest single backup step of the last snapshot.",
+            "# TYPE financialize_snapshot_max_step_ms gauge",
+            f"financialize_snapshot_max_step_ms {_last['max_step_ms']}",
+        ]
+    return lines
+
+
+# --- Scheduler ---
+
+class SnapshotScheduler:
+    """Daemon thread taking auto snapshots when the newest one is older than the interval."""
+
+    def __init__(self, interval_hours: float = SNAPSHOT_INTERVAL_HOURS):
+        self.interval = interval_hours * 3600
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="snapshot-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _due_in(self) -> float:
+        autos = [s for s in list_snapshots() if s["kind"] == "auto"]
+        if not autos:
+            return 0.0
+        age = (datetime.now() - datetime.fromisoformat(autos[0]["created_at"])).total_seconds()
+        return max(0.0, self.interval - age)
+
+    def _run(self):
+        while not self._stop.is_set():
+            wait = self._due_in()
+            if wait == 0.0:
+                try:
+                    create_snapshot("auto")
+                except (SnapshotError, sqlite3.Error, OSError):
+                    wait = 60.0  # Busy or disk trouble: retry shortly
+                else:
+                    wait = self.interval
+            self._stop.wait(wait)
@@ -0,0 +1,120 @@
+"""
+Static Frontend Serving
+-----------------------
+Serves the built SPA (frontend/dist) from a manifest built once at startup,
+so requests don't touch the filesystem except to stream the file itself.
+
+- Hashed Vite output under assets/ is cached forever (immutable).
+- index.html and other root files are revalidated with an ETag (304s).
+- Precompressed .br / .gz siblings written by build.py are served when the
+  client accepts them.
+"""
+
+import hashlib
+import mimetypes
+import os
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional
+
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))  # Preference order
+
+
+class Variant(NamedTuple):
+    path: str
+    stat: os.stat_result
+    etag: str
+
+
+class StaticEntry(NamedTuple):
+    media_type: str
+    cache_control: str
+    variants: Dict[str, Variant]  # "identity", "br", "gzip"
+
+
+def _etag(stat: os.stat_result) -> str:
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def build_manifest(dist: Path) -> Dict[str, StaticEntry]:
+    """Map URL paths (relative to dist, '/'-separated) to their served variants."""
+    manifest = {}
+    for root, _, files in os.walk(dist):
+        names = set(files)
+        for name in files:
+            if name.endswith((".br", ".gz")) and name[:-3] in names:
+                continue  # Served as a variant of the original
+            path = os.path.join(root, name)
+            rel = Path(path).relative_to(dist).as_posix()
+            stat = os.stat(path)
+
+            if rel == "index.html":
+                # Content hash: the shell changes on every build but may keep its size
+                with open(path, "rb") as f:
+                    etag = f'"{hashlib.sha1(f.read()).hexdigest()[:16]}"'
+            else:
+                etag = _etag(stat)
+            variants = {"identity": Variant(path, stat, etag)}
+            for encoding, ext in ENCODINGS:
+                if name + ext in names:
+                    encoded = path + ext
+                    variants[encoding] = Variant(encoded, os.stat(encoded), etag[:-1] + f'-{encoding}"')
+
+            media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            cache_control = IMMUTABLE if rel.startswith("assets/") else REVALIDATE
+            manifest[rel] = StaticEntry(media_type, cache_control, variants)
+    return manifest
+
+
+def _accepted(request: Request, encoding: str) -> bool:
+    accept = request.headers.get("accept-encoding", "")
+    for part in accept.split(","):
+        token, _, params = part.strip().partition(";")
+        if token.strip() == encoding:
+            return params.replace(" ", "") not in ("q=0", "q=0.0")
+    return False
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [t.strip().removeprefix("W/") for t in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+def serve_static(entry: StaticEntry, request: Request) -> Response:
+    encoding = next(
+        (enc for enc, _ in ENCODINGS if enc in entry.variants and _accepted(request, enc)),
+        "identity",
+    )
+    variant = entry.variants[encoding]
+    headers = {"cache-control": entry.cache_control, "etag": variant.etag}
+    if len(entry.variants) > 1:
+        headers["vary"] = "Accept-Encoding"
+    if _not_modified(request, variant.etag):
+        return Response(status_code=304, headers=headers)
+    if encoding != "identity":
+        headers["content-encoding"] = encoding
+    return FileResponse(variant.path, headers=headers, media_type=entry.media_type, stat_result=variant.stat)
+
+
+class StaticSite:
+    """The SPA: known files from the manifest, index.html for client-side routes."""
+
+    def __init__(self, dist: Path):
+        self.manifest = build_manifest(dist)
+        self.index = self.manifest.get("index.html")
+
+    def lookup(self, full_path: str) -> Optional[StaticEntry]:
+        entry = self.manifest.get(full_path)
+        if entry is not None:
+            return entry
+        # Missing hashed assets are stale references, not app routes
+        if full_path.startswith("assets/"):
+            return None
+        return self.index
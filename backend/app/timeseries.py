@@ -0,0 +1,252 @@
+"""
+Tracker Time-Series Store
+-------------------------
+Balance entries held in memory as compact NumPy arrays, per account:
+sorted int32 day numbers, float64 amounts and int64 entry ids (for the
+"last entry on a day wins" tie-break). Analytics read these arrays instead
+of building ORM objects or per-row dicts.
+
+The store is an immutable snapshot: entry writes swap in a new snapshot that
+shares every untouched account's arrays, so readers never see a half-applied
+write and never need the lock. Bulk changes (import, restore, reset) drop it
+and it reloads on next use.
+"""
+
+import threading
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from .fx import to_day_numbers
+
+_ENTRY_DTYPE = np.dtype([("account_id", np.int64), ("day", np.int32), ("id", np.int64), ("amount", np.float64)])
+_LOAD_SQL = (
+    "SELECT account_id, CAST(julianday(date) - 2440587.5 AS INTEGER), id, amount FROM balance_entries "
+    "WHERE account_id IS NOT NULL AND julianday(date) IS NOT NULL AND amount IS NOT NULL "
+    "ORDER BY account_id, date, id"
+)
+
+
+class AccountSeries(NamedTuple):
+    days: np.ndarray  # int32 days since epoch, ascending
+    amounts: np.ndarray  # float64
+    ids: np.ndarray  # int64 entry ids; ascending within a day
+
+
+class AccountTimeline(NamedTuple):
+    """Every account's balance on every entry date."""
+    days: np.ndarray  # Sorted day numbers (int64)
+    account_ids: np.ndarray  # Column account ids, ascending
+    matrix: np.ndarray  # (days x accounts), forward-filled, 0 before an account's first entry
+    first_days: np.ndarray  # Day of each account's first entry
+
+
+def _bucket_keys(days: np.ndarray, tier: str) -> np.ndarray:
+    if tier == "week":
+        return (days.astype(np.int64) + 3) // 7  # Day 0 is a Thursday: Monday-start weeks
+    return days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+
+
+def _downsample(series: AccountSeries, tier: str) -> AccountSeries:
+    """Keep the last entry per week/month bucket (same rows as the rollup tables)."""
+    if tier == "raw" or len(series.days) == 0:
+        return series
+    keys = _bucket_keys(series.days, tier)
+    last = np.flatnonzero(np.append(keys[1:] != keys[:-1], True))
+    return AccountSeries(series.days[last], series.amounts[last], series.ids[last])
+
+
+class SeriesStore:
+    def __init__(self, accounts: Dict[int, AccountSeries]):
+        self._accounts = accounts
+        self._timelines: Dict[str, AccountTimeline] = {}
+
+    @classmethod
+    def from_array(cls, rows: np.ndarray) -> "SeriesStore":
+        """rows: _ENTRY_DTYPE records sorted by (account_id, day, id)."""
+        accounts = {}
+        if len(rows):
+            ids, starts = np.unique(rows["account_id"], return_index=True)
+            ends = np.append(starts[1:], len(rows))
+            days = np.ascontiguousarray(rows["day"])
+            amounts = np.ascontiguousarray(rows["amount"])
+            entry_ids = np.ascontiguousarray(rows["id"])
+            for aid, start, end in zip(ids.tolist(), starts.tolist(), ends.tolist()):
+                accounts[aid] = AccountSeries(days[start:end], amounts[start:end], entry_ids[start:end])
+        return cls(accounts)
+
+    def __len__(self) -> int:
+        return sum(len(s.days) for s in self._accounts.values())
+
+    @property
+    def nbytes(self) -> int:
+        # Series of one load share buffers; count each buffer once
+        seen = {}
+        for series in self._accounts.values():
+            for arr in series:
+                base = arr.base if arr.base is not None else arr
+                seen[id(base)] = base.nbytes
+        return sum(seen.values())
+
+    def account_ids(self) -> np.ndarray:
+        return np.array(sorted(self._accounts), dtype=np.int64)
+
+    def series(self, account_id: int, tier: str = "raw") -> Optional[AccountSeries]:
+        series = self._accounts.get(account_id)
+        return _downsample(series, tier) if series is not None else None
+
+    def latest(self, account_id: int) -> Optional[Tuple[str, float]]:
+        """(ISO date, amount) of the account's newest entry."""
+        series = self._accounts.get(account_id)
+        if series is None or not len(series.days):
+            return None
+        return str(series.days[-1].astype("datetime64[D]")), float(series.amounts[-1])
+
+    def span_days(self) -> int:
+        if not self._accounts:
+            return 0
+        first = min(int(s.days[0]) for s in self._accounts.values())
+        last = max(int(s.days[-1]) for s in self._accounts.values())
+        return last - first
+
+    def timeline(self, tier: str = "raw") -> AccountTimeline:
+        """Forward-filled balance matrix, built once per tier for this snapshot."""
+        cached = self._timelines.get(tier)
+        if cached is not None:
+            return cached
+        account_ids = self.account_ids()
+        columns = [_downsample(self._accounts[aid], tier) for aid in account_ids.tolist()]
+        if columns:
+            days = np.unique(np.concatenate([c.days for c in columns])).astype(np.int64)
+        else:
+            days = np.array([], dtype=np.int64)
+        values = np.zeros((len(days), len(columns)))
+        for j, col in enumerate(columns):
+            idx = np.searchsorted(col.days, days, side="right") - 1
+            values[:, j] = np.where(idx >= 0, col.amounts[np.maximum(idx, 0)], 0.0)
+        first_days = np.array([c.days[0] for c in columns], dtype=np.int64)
+        timeline = AccountTimeline(days, account_ids, values, first_days)
+        self._timelines[tier] = timeline
+        return timeline
+
+    # --- Copy-on-write updates ---
+
+    def with_entry(self, account_id: int, entry_id: int, day: int, amount: float) -> "SeriesStore":
+        """New snapshot with the entry added, or moved/changed if it exists."""
+        series = self._accounts.get(account_id) or AccountSeries(
+            np.array([], dtype=np.int32), np.array([], dtype=np.float64), np.array([], dtype=np.int64)
+        )
+        keep = series.ids != entry_id
+        days, amounts, ids = series.days[keep], series.amounts[keep], series.ids[keep]
+        # Position by (day, id): after same-day entries with smaller ids
+        pos = np.searchsorted(days, day, side="left")
+        pos += int(np.searchsorted(ids[pos:np.searchsorted(days, day, side="right")], entry_id))
+        accounts = dict(self._accounts)
+        accounts[account_id] = AccountSeries(
+            np.insert(days, pos, day).astype(np.int32),
+            np.insert(amounts, pos, amount),
+            np.insert(ids, pos, entry_id),
+        )
+        return SeriesStore(accounts)
+
+    def without_entry(self, account_id: int, entry_id: int) -> "SeriesStore":
+        series = self._accounts.get(account_id)
+        if series is None:
+            return self
+        keep = series.ids != entry_id
+        accounts = dict(self._accounts)
+        if keep.any():
+            accounts[account_id] = AccountSeries(series.days[keep], series.amounts[keep], series.ids[keep])
+        else:
+            del accounts[account_id]
+        return SeriesStore(accounts)
+
+    def without_account(self, account_id: int) -> "SeriesStore":
+        if account_id not in self._accounts:
+            return self
+        accounts = dict(self._accounts)
+        del accounts[account_id]
+        return SeriesStore(accounts)
+
+
+_store: Optional[SeriesStore] = None
+_generation = 0
+_lock = threading.Lock()
+
+
+def get_series_store(db: Session) -> SeriesStore:
+    """The shared store, loaded from balance_entries on first use."""
+    store = _store
+    if store is not None:
+        return store
+
+    generation = _generation
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.execute(_LOAD_SQL)
+        # Straight from the cursor into one structured array: no per-row objects kept
+        rows = np.fromiter(cursor, dtype=_ENTRY_DTYPE)
+    finally:
+        cursor.close()
+    store = SeriesStore.from_array(rows)
+
+    # Don't install a load that raced with a write
+    with _lock:
+        if generation == _generation:
+            _install(store)
+    return store
+
+
+def _install(store: Optional[SeriesStore]):
+    global _store
+    _store = store
+
+
+def _apply(update):
+    """Run a copy-on-write update if loaded; otherwise make any in-flight load stale."""
+    global _generation
+    with _lock:
+        _generation += 1
+        if _store is not None:
+            _install(update(_store))
+
+
+def record_entry(account_id: int, entry_id: int, date: str, amount: float):
+    """Call after committing a new or edited balance entry."""
+    try:
+        day = int(to_day_numbers([date[:10]])[0])
+    except ValueError:
+        # Unparseable dates are skipped, as by the initial load
+        record_entry_deleted(account_id, entry_id)
+        return
+    _apply(lambda store: store.with_entry(account_id, entry_id, day, amount))
+
+
+def record_entry_deleted(account_id: int, entry_id: int):
+    _apply(lambda store: store.without_entry(account_id, entry_id))
+
+
+def record_account_deleted(account_id: int):
+    _apply(lambda store: store.without_account(account_id))
+
+
+def invalidate_series_store():
+    """Drop the store after bulk changes (import, restore, reset); it reloads on next use."""
+    global _generation
+    with _lock:
+        _generation += 1
+        _install(None)
+
+
+def render_prometheus():
+    store = _store
+    entries, nbytes = (len(store), store.nbytes) if store is not None else (0, 0)
+    return [
+        "# HELP financialize_series_store_entries Balance entries held in the in-memory series store.",
+        "# TYPE financialize_series_store_entries gauge",
+        f"financialize_series_store_entries {entries}",
+        "# HELP financialize_series_store_bytes Memory held by the series store arrays.",
+        "# TYPE financialize_series_store_bytes gauge",
+        f"financialize_series_store_bytes {nbytes}",
+    ]
@@ -0,0 +1,56 @@
+import pytest
+
+import generators
+
+
+def _ok(response):
+    assert response.status_code == 200, response.text
+    return response
+
+
+@pytest.mark.parametrize("steps_per_year", [1, 12])
+def bench_api_calculate(benchmark, api_client, steps_per_year):
+    payload = generators.projection_request(50, 10, steps_per_year).model_dump()
+    benchmark(lambda: _ok(api_client.post("/api/scenarios/calculate", json=payload)))
+
+
+def bench_api_coach(benchmark, api_client):
+    payload = generators.projection_request(30, 5).model_dump()
+    benchmark(lambda: _ok(api_client.post("/api/coach/analyze", json=payload)))
+
+
+def bench_api_fire(benchmark, api_client):
+    payload = {"current_net_worth": 150_000, "annual_spend": 45_000}
+    benchmark(lambda: _ok(api_client.post("/api/scenarios/fire", json=payload)))
+
+
+@pytest.mark.parametrize("resolution", ["raw", "auto"])
+def bench_api_forecast(benchmark, api_client, resolution):
+    payload = {"years": 30, "resolution": resolution}
+    benchmark(lambda: _ok(api_client.post("/api/scenarios/forecast", json=payload)))
+
+
+@pytest.mark.parametrize("resolution", ["raw", "auto"])
+def bench_api_grouped_forecast(benchmark, api_client, resolution):
+    payload = {"years": 30, "resolution": resolution}
+    benchmark(lambda: _ok(api_client.post("/api/scenarios/forecast/grouped", json=payload)))
+
+
+def bench_api_accounts(benchmark, api_client):
+    benchmark(lambda: _ok(api_client.get("/api/tracker/accounts")))
+
+
+def bench_api_history(benchmark, api_client):
+    benchmark(lambda: _ok(api_client.get("/api/tracker/history")))
+
+
+def bench_api_backtest(benchmark, api_client):
+    # Saved plans go through scenario_plan, then the shared net-worth timeline
+    def run():
+        scenarios = _ok(api_client.post("/api/scenarios/backtest", json={})).json()["scenarios"]
+        assert scenarios and all(s["start_date"] and s["years"] for s in scenarios), scenarios
+    benchmark(run)
+
+
+def bench_api_goals_with_scenario(benchmark, api_client):
+    benchmark(lambda: _ok(api_client.get("/api/tracker/goals", params={"scenario_id": 1})))
@@ -0,0 +1,186 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+import generators
+from app.logic import (
+    calculate_projections, run_projection, calculate_required_savings, calculate_fire_numbers, find_milestone_years,
+    simulate_withdrawals, calculate_history_forecast, calculate_grouped_forecast,
+    calculate_backtest, net_worth_timeline, BacktestPlan, calculate_goals, _balance_matrix,
+)
+from app.debt import calculate_debt_payoff
+from app.fx import to_day_numbers
+from app.timeseries import SeriesStore, _ENTRY_DTYPE
+from app.schemas import ProjectionResponse, MilestoneRule, FIRERequest, WithdrawalRequest, ForecastRequest, GroupedForecastRequest, DebtPayoffRequest
+
+
+# --- Projections ---
+
+@pytest.mark.parametrize("years", [30, 50])
+@pytest.mark.parametrize("n_events", [0, 10, 100])
+@pytest.mark.parametrize("steps_per_year", [1, 12])
+def bench_calculate_projections(benchmark, years, n_events, steps_per_year):
+    request = generators.projection_request(years, n_events, steps_per_year)
+    benchmark(calculate_projections, request)
+
+
+def _models_edge(request):
+    # Before: per-year models, re-validated by the response_model on the way out
+    projections, milestones = calculate_projections(request)
+    response = ProjectionResponse(
+        data=projections, final_net_worth=projections[-1].net_worth,
+        final_buying_power=projections[-1].buying_power, milestones=milestones,
+    )
+    return ProjectionResponse.model_validate(response.model_dump())
+
+
+def _result_edge(request):
+    # Now: arrays, validated once at the edge
+    return ProjectionResponse.model_validate(run_projection(request).to_response())
+
+
+PROJECTION_OUTPUTS = {"models_edge": _models_edge, "result_edge": _result_edge, "result_internal": run_projection}
+
+
+@pytest.mark.parametrize("output", list(PROJECTION_OUTPUTS))
+@pytest.mark.parametrize("years", [30, 100])
+def bench_projection_output(benchmark, output, years):
+    """Projection plus output handling; peak traced allocation lands in extra_info."""
+    request = generators.projection_request(years, 10)
+    fn = PROJECTION_OUTPUTS[output]
+    tracemalloc.start()
+    fn(request)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    benchmark.extra_info["peak_bytes"] = peak
+    benchmark(fn, request)
+
+
+@pytest.mark.parametrize("n_rules", [5, 50])
+@pytest.mark.parametrize("n_scenarios", [1, 1_000])
+def bench_find_milestone_years(benchmark, n_rules, n_scenarios):
+    rng = np.random.default_rng(0)
+    net_worth = np.cumsum(rng.normal(20_000, 30_000, (n_scenarios, 51)), axis=1)
+    series = {
+        "net_worth": net_worth,
+        "buying_power": net_worth,
+        "contribution": np.full_like(net_worth, 12_000),
+        "interest_earned": net_worth * 0.07,
+        "events_value": np.zeros_like(net_worth),
+    }
+    rules = [MilestoneRule(name=f"{k}", threshold=k * 25_000, inflation_adjusted=k % 2 == 0) for k in range(n_rules)]
+    benchmark(find_milestone_years, series, rules, rng.uniform(20_000, 60_000, n_scenarios), 0.025)
+
+
+@pytest.mark.parametrize("years", [10, 30, 50])
+def bench_calculate_required_savings(benchmark, years):
+    benchmark(calculate_required_savings, 25_000, 2_000_000, years, 2.0, 7.0, 2.5)
+
+
+# --- FIRE ---
+
+@pytest.mark.parametrize("monthly_contribution", [None, 2_000])
+def bench_calculate_fire_numbers(benchmark, monthly_contribution):
+    request = FIRERequest(current_net_worth=150_000, annual_spend=45_000, monthly_contribution=monthly_contribution)
+    benchmark(calculate_fire_numbers, request)
+
+
+@pytest.mark.parametrize("strategy", ["inflation_adjusted", "fixed_percent", "guardrail"])
+@pytest.mark.parametrize("n_paths", [1_000, 10_000])
+def bench_simulate_withdrawals(benchmark, strategy, n_paths):
+    request = WithdrawalRequest(starting_portfolio=1_000_000, strategy=strategy, n_paths=n_paths, seed=0)
+    benchmark(simulate_withdrawals, request)
+
+
+# --- Forecast ---
+
+@pytest.mark.parametrize("n_entries,n_accounts", [(1_000, 5), (10_000, 20), (100_000, 50)])
+def bench_history_forecast(benchmark, n_entries, n_accounts):
+    account_list, history = generators.tracker_dataset(n_entries, n_accounts)
+    benchmark(calculate_history_forecast, ForecastRequest(), history, generators.account_types(account_list))
+
+
+@pytest.mark.parametrize("model", ["linear", "weighted", "exponential", "theil_sen", "rolling", "seasonal"])
+def bench_history_forecast_models_100k(benchmark, model):
+    account_list, history = generators.tracker_dataset(100_000, 50)
+    benchmark(calculate_history_forecast, ForecastRequest(model=model), history, generators.account_types(account_list))
+
+
+@pytest.mark.parametrize("model,amounts,reason", [
+    ("exponential", [-500.0, -300.0, -100.0], "Exponential needs positive net worth"),
+    ("seasonal", [100.0, 200.0, 300.0], "Seasonal needs at least 5 data points"),
+])
+def bench_history_forecast_model_fallback(benchmark, model, amounts, reason):
+    # Models that can't be fitted fall back to linear and say so
+    history = [{"date": f"2024-0{i + 1}-01", "amount": a, "account_id": 1} for i, a in enumerate(amounts)]
+    result = benchmark(calculate_history_forecast, ForecastRequest(model=model), history, {1: "Cash"})
+    assert result.model == "linear"
+    assert reason in result.message, result.message
+
+
+@pytest.mark.parametrize("n_entries,n_accounts", [(10_000, 20), (100_000, 50)])
+def bench_grouped_forecast(benchmark, n_entries, n_accounts):
+    account_list, history = generators.tracker_dataset(n_entries, n_accounts)
+    benchmark(calculate_grouped_forecast, GroupedForecastRequest(), history, account_list)
+
+
+# --- Backtest ---
+
+@pytest.mark.parametrize("n_scenarios", [10, 200])
+@pytest.mark.parametrize("n_entries,n_accounts", [(10_000, 20), (100_000, 50)])
+def bench_backtest(benchmark, n_scenarios, n_entries, n_accounts):
+    account_list, history = generators.tracker_dataset(n_entries, n_accounts)
+    days, actual = net_worth_timeline(history, generators.account_types(account_list))
+    starts = to_day_numbers([f"{2016 + i % 9}-0{1 + i % 9}-15" for i in range(n_scenarios)])
+    plans = [
+        BacktestPlan(i, f"Plan {i}", generators.projection_request(10, 3, 12, seed=i), int(start))
+        for i, start in enumerate(starts)
+    ]
+    benchmark(calculate_backtest, plans, days, actual)
+
+
+# --- Debt payoff ---
+
+@pytest.mark.parametrize("n_debts", [3, 20])
+@pytest.mark.parametrize("with_projection", [False, True])
+def bench_debt_payoff(benchmark, n_debts, with_projection):
+    request = DebtPayoffRequest(
+        extra_payment=300,
+        max_years=30,
+        projection=generators.projection_request(30, 5, 12) if with_projection else None,
+    )
+    benchmark(calculate_debt_payoff, request, generators.debts(n_debts))
+
+
+# --- Goals ---
+
+@pytest.mark.parametrize("n_entries,n_accounts", [(10_000, 20), (100_000, 50)])
+def bench_goals(benchmark, n_entries, n_accounts):
+    account_list, history = generators.tracker_dataset(n_entries, n_accounts)
+    dates, account_ids, matrix = _balance_matrix(history)
+    days = to_day_numbers(dates)
+    first = {}
+    for p in history:
+        first[p["account_id"]] = min(first.get(p["account_id"], p["date"]), p["date"])
+    first_days = to_day_numbers([first[aid] for aid in account_ids.tolist()])
+    goals = [{**a, "target_balance": 100_000.0 * (1 + a["id"] % 5)} for a in account_list]
+    benchmark(calculate_goals, goals, days, account_ids, matrix, first_days, 365, 7.0, 500.0)
+
+
+# --- Series store ---
+
+def _store_rows(history):
+    rows = np.array(
+        [(p["account_id"], 0, i, p["amount"]) for i, p in enumerate(history, 1)], dtype=_ENTRY_DTYPE
+    )
+    rows["day"] = to_day_numbers([p["date"] for p in history])
+    return rows[np.lexsort((rows["id"], rows["day"], rows["account_id"]))]
+
+
+@pytest.mark.parametrize("tier", ["raw", "month"])
+@pytest.mark.parametrize("n_entries,n_accounts", [(10_000, 20), (100_000, 50)])
+def bench_series_store_timeline(benchmark, n_entries, n_accounts, tier):
+    _, history = generators.tracker_dataset(n_entries, n_accounts)
+    rows = _store_rows(history)
+    benchmark(lambda: SeriesStore.from_array(rows).timeline(tier))
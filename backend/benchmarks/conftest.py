@@ -0,0 +1,63 @@
+"""
+Benchmark suite for logic.py and the HTTP API (pytest-benchmark).
+
+Run from /backend:
+
+    python -m pytest benchmarks                        # run + save JSON to .benchmarks/
+    python -m pytest benchmarks --benchmark-compare    # compare against the last saved run
+    python -m pytest benchmarks -k forecast            # a subset
+
+Each run is saved as JSON under .benchmarks/, so results from different
+commits can be compared locally (see `pytest-benchmark compare`).
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+import generators
+from app import models
+from app.database import Base, get_db
+from app.main import app
+from app.rollups import rebuild_rollups
+from app.timeseries import invalidate_series_store
+
+API_ACCOUNTS = 20
+API_ENTRIES = 20_000
+API_SCENARIOS = 5
+
+
+@pytest.fixture(scope="session")
+def api_client(tmp_path_factory):
+    """TestClient against a temp SQLite DB seeded with a synthetic tracker history."""
+    db_path = tmp_path_factory.mktemp("bench-db") / "financialize.db"
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    account_list, history = generators.tracker_dataset(API_ENTRIES, API_ACCOUNTS)
+    with Session() as db:
+        db.execute(insert(models.Person), [{"id": i, "name": f"Person {i}"} for i in (1, 2)])
+        db.execute(insert(models.Account), [
+            {k: a[k] for k in ("id", "name", "type", "subtype", "currency", "person_id")} for a in account_list
+        ])
+        db.execute(insert(models.BalanceEntry), history)
+        db.execute(insert(models.UserScenario), generators.saved_scenarios(API_SCENARIOS))
+        rebuild_rollups(db)
+        db.commit()
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    invalidate_series_store()  # Load from this DB, not one seen earlier in the process
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        engine.dispose()
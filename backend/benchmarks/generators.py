@@ -0,0 +1,127 @@
+"""
+Synthetic data generators for the benchmark suite.
+
+Every generator is seeded so runs on different commits see identical inputs.
+"""
+
+import json
+import random
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+from app.schemas import DebtInput, ProjectionRequest
+
+ACCOUNT_TYPES = ["Cash", "Investment", "Investment", "Liability", "General"]
+SUBTYPES = ["Checking", "Savings", "Brokerage", "401k", "Mortgage", None]
+
+
+def projection_request(years: int = 30, n_events: int = 5, steps_per_year: int = 1, seed: int = 0) -> ProjectionRequest:
+    """A typical household with `n_events` one-off and recurring life events."""
+    rng = random.Random(seed)
+    events = []
+    for i in range(n_events):
+        recurring = rng.random() < 0.4
+        events.append({
+            "name": f"Event {i}",
+            "year": rng.randint(1, max(1, years)),
+            "amount": rng.choice([-1, 1]) * rng.uniform(1_000, 50_000),
+            "is_recurring": recurring,
+            "duration": rng.randint(2, 10) if recurring else 1,
+        })
+    return ProjectionRequest(
+        current_savings=25_000,
+        incomes=[{"name": "Salary", "amount": 6_000}, {"name": "Side", "amount": 800}],
+        expenses=[{"name": "Living", "percentage": 55}, {"name": "Fun", "percentage": 15}],
+        events=events,
+        years=years,
+        steps_per_year=steps_per_year,
+    )
+
+
+def debts(n_debts: int, seed: int = 0) -> List[DebtInput]:
+    """Cards, loans and a mortgage-sized balance mix; half use the default minimum."""
+    rng = random.Random(seed)
+    return [
+        DebtInput(
+            name=f"Debt {i}",
+            balance=rng.uniform(500, 250_000 if i % 10 == 0 else 40_000),
+            interest_rate=rng.uniform(0, 28),
+            minimum_payment=rng.uniform(50, 600) if i % 2 else None,
+        )
+        for i in range(n_debts)
+    ]
+
+
+def accounts(n_accounts: int, n_persons: int = 2, seed: int = 0) -> List[Dict]:
+    """Account metadata dicts as the forecast functions expect them."""
+    rng = random.Random(seed)
+    return [
+        {
+            "id": i,
+            "name": f"Account {i}",
+            "type": ACCOUNT_TYPES[i % len(ACCOUNT_TYPES)],
+            "subtype": rng.choice(SUBTYPES),
+            "currency": None,
+            "person_id": (i % n_persons) + 1 if n_persons else None,
+            "person_name": f"Person {(i % n_persons) + 1}" if n_persons else None,
+        }
+        for i in range(1, n_accounts + 1)
+    ]
+
+
+def balance_history(n_entries: int, n_accounts: int, years: int = 10, seed: int = 0) -> List[Dict]:
+    """
+    `n_entries` balance entries spread over `n_accounts` and `years`, each
+    account following a noisy upward random walk.
+    """
+    rng = random.Random(seed)
+    start = date(2026 - years, 1, 1)
+    span = years * 365
+    per_account = max(1, n_entries // n_accounts)
+    points = []
+    for aid in range(1, n_accounts + 1):
+        balance = rng.uniform(1_000, 80_000)
+        days = sorted(rng.randrange(span) for _ in range(per_account))
+        for day in days:
+            balance = max(0.0, balance * (1 + rng.gauss(0.0004, 0.01)))
+            points.append({
+                "date": (start + timedelta(days=day)).isoformat(),
+                "amount": round(balance, 2),
+                "account_id": aid,
+            })
+    rng.shuffle(points)
+    return points[:n_entries]
+
+
+def account_types(account_list: List[Dict]) -> Dict[int, str]:
+    return {a["id"]: a["type"] for a in account_list}
+
+
+def tracker_dataset(n_entries: int, n_accounts: int, years: int = 10, seed: int = 0) -> Tuple[List[Dict], List[Dict]]:
+    """(accounts, history) pair sharing ids."""
+    return accounts(n_accounts, seed=seed), balance_history(n_entries, n_accounts, years, seed=seed)
+
+
+def saved_scenarios(n_scenarios: int, years: int = 10, seed: int = 0) -> List[Dict]:
+    """UserScenario rows whose `data` is the frontend's saved-state snapshot, started inside the tracker history."""
+    rng = random.Random(seed)
+    start = date(2026 - years, 1, 1)
+    rows = []
+    for i in range(1, n_scenarios + 1):
+        snapshot = {
+            "simulationParams": {
+                "currentSavings": rng.uniform(10_000, 200_000),
+                "years": rng.randint(10, 40),
+                "marketReturn": rng.uniform(4, 9),
+                "annualRaise": 2.0,
+                "inflation": 2.5,
+                "currentAge": rng.randint(25, 50),
+            },
+            "incomes": [{"name": "Salary", "amount": rng.uniform(3_000, 9_000)}],
+            "expenses": [{"name": "Living", "percentage": rng.uniform(40, 70)}, {"id": "savings", "name": "Savings", "percentage": 20}],
+            "events": [],
+            "currency": "$",
+        }
+        created = start + timedelta(days=rng.randrange(years * 365 // 2))
+        rows.append({"id": i, "name": f"Plan {i}", "data": json.dumps(snapshot), "created_at": created.isoformat()})
+    return rows
@@ -0,0 +1,178 @@
+"""
+Server-Mode Load Test
+---------------------
+Starts ``launcher.py --server`` with increasing worker counts against a
+seeded temp database, hammers one endpoint from concurrent clients for a
+fixed time, and reports throughput and latency per worker count.
+
+CPU-bound endpoints (projections, forecasts) should scale with workers up to
+the number of cores; a single worker serializes them behind the GIL. Run from
+/backend:
+
+    python benchmarks/loadtest.py                          # 1, 2, ... up to the CPU count
+    python benchmarks/loadtest.py --workers 1,4 --endpoint forecast --duration 20
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import generators  # noqa: E402
+
+SEED_ACCOUNTS = 20
+SEED_ENTRIES = 20_000
+
+ENDPOINTS = {
+    "calculate": ("/api/scenarios/calculate", lambda: generators.projection_request(60, 20, steps_per_year=12).model_dump()),
+    "forecast": ("/api/scenarios/forecast", lambda: {"model": "theil_sen", "resolution": "raw"}),
+    "grouped": ("/api/scenarios/forecast/grouped", lambda: {"group_by": ["account", "type", "person"]}),
+}
+
+
+def _env(workers: int) -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(BACKEND) + os.pathsep + env.get("PYTHONPATH", "")
+    env["FINANCIALIZE_WORKERS"] = str(workers)
+    env["FINANCIALIZE_SNAPSHOT_INTERVAL_HOURS"] = "0"
+    return env
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def seed_database(data_dir: str):
+    """Synthetic tracker history, written straight into data_dir/financialize.db."""
+    from sqlalchemy import create_engine, insert
+    from app import models
+    from app.database import Base
+
+    engine = create_engine(f"sqlite:///{os.path.join(data_dir, 'financialize.db')}")
+    Base.metadata.create_all(bind=engine)
+    account_list, history = generators.tracker_dataset(SEED_ENTRIES, SEED_ACCOUNTS)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Person), [{"id": i, "name": f"Person {i}"} for i in (1, 2)])
+        conn.execute(insert(models.Account), [
+            {k: a[k] for k in ("id", "name", "type", "subtype", "currency", "person_id")} for a in account_list
+        ])
+        conn.execute(insert(models.BalanceEntry), history)
+    engine.dispose()
+
+
+def wait_ready(port: int, timeout: float = 60.0):
+    """Poll /api/ready until it answers 200."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/api/ready")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("Server did not become ready within timeout")
+
+
+def run_clients(port: int, path: str, body: bytes, concurrency: int, duration: float) -> list[float]:
+    """Each client sends requests back-to-back on one keep-alive connection; returns latencies."""
+    latencies: list[float] = []
+    errors = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+    headers = {"Content-Type": "application/json"}
+
+    def client():
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        own = []
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            conn.request("POST", path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+                break
+            own.append(time.perf_counter() - start)
+        conn.close()
+        with lock:
+            latencies.extend(own)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if errors:
+        raise RuntimeError(f"Requests failed with status {errors[0]}")
+    return latencies
+
+
+def measure(workers: int, endpoint: str, concurrency: int, duration: float, data_dir: str) -> dict:
+    path, payload = ENDPOINTS[endpoint]
+    body = json.dumps(payload()).encode()
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, str(BACKEND / "launcher.py"), "--server", "--workers", str(workers), "--port", str(port)],
+        cwd=data_dir, env=_env(workers), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_ready(port)
+        # Warm every worker's caches before timing
+        run_clients(port, path, body, workers * 2, 1.0)
+        latencies = run_clients(port, path, body, concurrency, duration)
+    finally:
+        proc.terminate()
+        proc.wait()
+    latencies.sort()
+    return {
+        "workers": workers,
+        "requests": len(latencies),
+        "rps": len(latencies) / duration,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+    }
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    default_workers = sorted({1, 2, max(1, cpus // 2), cpus} - {0})
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default=",".join(map(str, default_workers)), help="Comma-separated worker counts")
+    parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="calculate")
+    parser.add_argument("--concurrency", type=int, default=None, help="Concurrent clients (default: 2x the most workers)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per worker count")
+    args = parser.parse_args()
+
+    counts = [int(w) for w in args.workers.split(",")]
+    concurrency = args.concurrency or 2 * max(counts)
+    print(f"{args.endpoint}: {concurrency} clients, {args.duration:.0f}s per run, {cpus} CPUs")
+    print(f"{'workers':>8} {'req/s':>9} {'speedup':>8} {'p50 ms':>8} {'p95 ms':>8}")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        seed_database(data_dir)
+        baseline = None
+        for workers in counts:
+            result = measure(workers, args.endpoint, concurrency, args.duration, data_dir)
+            baseline = baseline or result["rps"]
+            print(f"{workers:>8} {result['rps']:>9.1f} {result['rps'] / baseline:>7.2f}x "
+                  f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Startup Benchmark
+-----------------
+Measures how long the backend takes from process start to its first HTTP
+response, and which imports dominate (via ``python -X importtime``).
+
+Each run uses a fresh temp directory, so it also covers first-launch schema
+creation. Run from /backend:
+
+    python benchmarks/startup.py                 # 5 runs, default target
+    python benchmarks/startup.py --runs 10 --target 1.0
+
+Exits with status 1 if the median time-to-first-response misses the target.
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+DEFAULT_TARGET_SECONDS = 1.5
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(BACKEND) + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def import_profile(top: int = 15) -> list[tuple[int, str]]:
+    """Cumulative import time (us) of the slowest modules when importing app.main."""
+    with tempfile.TemporaryDirectory() as tmp:
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import app.main"],
+            cwd=tmp, env=_env(), capture_output=True, text=True,
+        )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.rstrip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def time_to_first_response(timeout: float = 30.0) -> float:
+    """Seconds from spawning uvicorn until /api/status answers."""
+    port = _free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=tmp, env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            while time.perf_counter() - start < timeout:
+                try:
+                    with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/status", timeout=1):
+                        return time.perf_counter() - start
+                except OSError:
+                    time.sleep(0.01)
+            raise RuntimeError("Server did not respond within timeout")
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target", type=float, default=DEFAULT_TARGET_SECONDS, help="Median time-to-first-response target (s)")
+    args = parser.parse_args()
+
+    print("Slowest imports (cumulative):")
+    for micros, name in import_profile():
+        print(f"  {micros / 1000:8.1f} ms  {name}")
+
+    times = [time_to_first_response() for _ in range(args.runs)]
+    median = statistics.median(times)
+    print(f"\nTime to first response over {args.runs} runs: "
+          f"median {median:.3f}s, min {min(times):.3f}s, max {max(times):.3f}s (target {args.target:.2f}s)")
+    sys.exit(0 if median <= args.target else 1)
+
+
+if __name__ == "__main__":
+    main()
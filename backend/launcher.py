@@ -3,18 +3,29 @@ Financialize Launcher
 ---------------------
 Entry point for the packaged application.
 Finds a free port, starts the FastAPI server, and opens the default browser.
+
+Server mode (``--server``) runs several worker processes instead, for a
+shared household/advisor instance: a long forecast in one worker no longer
+stalls everyone else's requests.
+
+    financialize --server --workers 4 --host 0.0.0.0 --port 8000
 """
 
+import argparse
+import multiprocessing
 import sys
 import os
 import socket
 import webbrowser
 import threading
 import uvicorn
+from uvicorn.protocols.http.auto import AutoHTTPProtocol
 
 # Import the FastAPI app object directly so PyInstaller can trace
 # the full dependency tree (fastapi, sqlalchemy, pydantic, etc.)
 from app.main import app as fastapi_app
+from app.database import enable_wal, ensure_schema
+from app.snapshots import SnapshotScheduler
 
 
 def find_free_port(start: int = 8000, end: int = 8100) -> int:
@@ -36,8 +47,71 @@ def open_browser(port: int, delay: float = 1.5):
     webbrowser.open(f"http://localhost:{port}")
 
 
+class NoDelayHTTPProtocol(AutoHTTPProtocol):
+    """
+    uvicorn's default HTTP protocol with TCP_NODELAY forced on. Multi-worker
+    uvicorn shares a socket created without an explicit protocol, so asyncio
+    skips its usual TCP_NODELAY and every response stalls ~40 ms in Nagle's
+    algorithm waiting for a delayed ACK.
+    """
+
+    def connection_made(self, transport):
+        sock = transport.get_extra_info("socket")
+        if sock is not None:
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            except OSError:
+                pass
+        super().connection_made(transport)
+
+
+def run_server(host: str, port: int, workers: int):
+    """Serve with `workers` processes sharing one SQLite database."""
+    if workers == 1:
+        print(f"Serving Financialize on http://{host}:{port} (1 worker)")
+        uvicorn.run(fastapi_app, host=host, port=port, log_level="warning")
+        return
+
+    # 1. Migrate once and switch to WAL before any worker opens the database
+    ensure_schema()
+    journal_mode = enable_wal()
+
+    # 2. Workers read this at import: it turns on cross-worker cache invalidation
+    os.environ["FINANCIALIZE_WORKERS"] = str(workers)
+
+    # 3. Auto snapshots run here, once, rather than in every worker
+    scheduler = SnapshotScheduler()
+    scheduler.start()
+    print(f"Serving Financialize on http://{host}:{port} ({workers} workers, journal_mode={journal_mode})")
+    try:
+        # Workers are separate processes, so they need the import string
+        uvicorn.run(
+            "app.main:app", host=host, port=port, workers=workers,
+            http=NoDelayHTTPProtocol, log_level="warning",
+        )
+    finally:
+        scheduler.stop()
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run Financialize.")
+    parser.add_argument("--server", action="store_true", help="Shared server: several workers, no browser")
+    parser.add_argument(
+        "--workers", type=int, default=int(os.environ.get("FINANCIALIZE_WORKERS", os.cpu_count() or 1)),
+        help="Worker processes in server mode (default: FINANCIALIZE_WORKERS or the CPU count)",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (0.0.0.0 to serve the network)")
+    parser.add_argument("--port", type=int, default=None, help="Port (default: 8000 in server mode, else a free one)")
+    return parser.parse_args(argv)
+
+
 def main():
-    port = find_free_port()
+    args = parse_args()
+    if args.server:
+        run_server(args.host, args.port or 8000, max(1, args.workers))
+        return
+
+    port = args.port or find_free_port()
     print(f"Starting Financialize on http://localhost:{port}")
 
     # Open browser in a background thread
@@ -47,11 +121,13 @@ def main():
     # Pass the app object directly instead of a string import path
     uvicorn.run(
         fastapi_app,
-        host="127.0.0.1",
+        host=args.host,
         port=port,
         log_level="warning",
     )
 
 
 if __name__ == "__main__":
+    # Frozen builds re-run this executable to start each worker process
+    multiprocessing.freeze_support()
     main()
@@ -6,12 +6,14 @@ executable using PyInstaller.  Works on both Windows and macOS/Linux.
 
 Prerequisites (run once):
     pip install pyinstaller
+    pip install brotli   (optional: also precompress assets as .br)
     npm install          (in /frontend)
 
 Usage:
     python build.py
 """
 
+import gzip
 import subprocess
 import sys
 import shutil
@@ -55,6 +57,37 @@ def run(cmd: list[str], cwd: Path | None = None):
         sys.exit(1)
 
 
+COMPRESSIBLE = {".js", ".css", ".html", ".svg", ".json", ".txt", ".map", ".ico", ".wasm"}
+MIN_COMPRESS_BYTES = 1024
+
+
+def precompress(dist: Path):
+    """
+    Write .gz (and .br, when the brotli package is installed) next to every
+    compressible file in the frontend build. The backend serves these to
+    clients that accept them instead of compressing per request.
+    """
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+        print("  brotli not installed; writing .gz only (pip install brotli for .br)")
+
+    for path in dist.rglob("*"):
+        if not path.is_file() or path.suffix not in COMPRESSIBLE:
+            continue
+        raw = path.read_bytes()
+        if len(raw) < MIN_COMPRESS_BYTES:
+            continue
+        variants = {".gz": gzip.compress(raw, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants[".br"] = brotli.compress(raw, quality=11)
+        for ext, data in variants.items():
+            # Only keep variants that actually save bytes
+            if len(data) < len(raw):
+                path.with_name(path.name + ext).write_bytes(data)
+
+
 def main():
     # 1. Build frontend
     step("Building React frontend")
@@ -66,6 +99,9 @@ def main():
         print("ERROR: frontend/dist not found after build")
         sys.exit(1)
 
+    step("Precompressing frontend assets")
+    precompress(frontend_dist)
+
     # 2. Install PyInstaller if missing
     step("Ensuring PyInstaller is installed")
     run([str(VENV_PYTHON), "-m", "pip", "install", "--quiet", "pyinstaller"])
@@ -122,7 +158,8 @@ def main():
         "--hidden-import", "sqlalchemy.dialects.sqlite",
         # --- Data libs ---
         "--hidden-import", "numpy",
-        "--hidden-import", "pandas",
+        # pandas is not used at runtime; keep it out even if the venv has it
+        "--exclude-module", "pandas",
         # --- App modules (traced via direct import, but be explicit) ---
         "--hidden-import", "app.main",
         "--hidden-import", "app.database",
@@ -132,11 +169,15 @@ def main():
         "--hidden-import", "app.routers",
         "--hidden-import", "app.routers_tracker",
         "--hidden-import", "app.routers_scenarios",
+        "--hidden-import", "app.routers_fx",
+        "--hidden-import", "app.routers_live",
         # --- Collect all submodules for packages PyInstaller struggles with ---
         "--collect-submodules", "uvicorn",
         "--collect-submodules", "fastapi",
         "--collect-submodules", "starlette",
         "--collect-submodules", "pydantic",
+        # uvicorn's websocket protocol backend for /api/scenarios/live
+        "--collect-submodules", "websockets",
         str(BACKEND / "launcher.py"),
     ]
 
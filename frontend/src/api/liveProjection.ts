@@ -0,0 +1,113 @@
+import { API_BASE_URL } from './client'
+
+// Websocket session for /api/scenarios/live: sends only changed request fields
+// and merges the changed output series the server pushes back.
+
+export type LiveProjectionRow = {
+    year: number
+    age: number
+    net_worth: number
+    contribution: number
+    interest_earned: number
+    buying_power: number
+    events_value: number
+}
+
+export type LiveMilestone = {
+    name: string
+    year: number
+    net_worth: number
+    message: string
+}
+
+type ResultMessage = {
+    type: 'result'
+    seq: number
+    series: Partial<Record<keyof LiveProjectionRow, number[]>>
+    milestones?: LiveMilestone[]
+}
+
+type ErrorMessage = {
+    type: 'error'
+    seq: number
+    detail: unknown
+}
+
+const SERIES: (keyof LiveProjectionRow)[] = ['year', 'age', 'net_worth', 'contribution', 'interest_earned', 'buying_power', 'events_value']
+
+function liveUrl(): string {
+    const base = API_BASE_URL || window.location.origin
+    return `${base.replace(/^http/, 'ws')}/api/scenarios/live`
+}
+
+export class LiveProjectionSession {
+    private ws: WebSocket
+    private seq = 0
+    private lastSent: Record<string, string> | null = null
+    private series: Partial<Record<keyof LiveProjectionRow, number[]>> = {}
+    private milestones: LiveMilestone[] = []
+
+    constructor(
+        private onResult: (rows: LiveProjectionRow[], milestones: LiveMilestone[]) => void,
+        private onError?: (detail: unknown) => void
+    ) {
+        this.ws = new WebSocket(liveUrl())
+        this.ws.onmessage = (event) => this.handleMessage(JSON.parse(event.data))
+        this.ws.onclose = () => { this.lastSent = null }
+    }
+
+    get isOpen(): boolean {
+        return this.ws.readyState === WebSocket.OPEN
+    }
+
+    // Returns false when the socket isn't usable so the caller can fall back to POST.
+    // An unchanged request replays the last result instead of sending an empty update.
+    send(request: Record<string, unknown>): boolean {
+        if (!this.isOpen) return false
+        const encoded: Record<string, string> = {}
+        for (const [key, value] of Object.entries(request)) encoded[key] = JSON.stringify(value)
+
+        if (this.lastSent === null) {
+            this.seq += 1
+            this.ws.send(JSON.stringify({ type: 'init', seq: this.seq, request }))
+        } else {
+            const delta: Record<string, unknown> = {}
+            for (const key of Object.keys(encoded)) {
+                if (encoded[key] !== this.lastSent[key]) delta[key] = request[key]
+            }
+            if (Object.keys(delta).length === 0) {
+                // Nothing to send; a result still in flight will arrive on its own
+                if (this.series.year) this.emit()
+                return true
+            }
+            this.seq += 1
+            this.ws.send(JSON.stringify({ type: 'update', seq: this.seq, delta }))
+        }
+        this.lastSent = encoded
+        return true
+    }
+
+    close() {
+        this.ws.close()
+    }
+
+    private handleMessage(message: ResultMessage | ErrorMessage) {
+        if (message.type === 'error') {
+            this.onError?.(message.detail)
+            return
+        }
+        this.series = { ...this.series, ...message.series }
+        if (message.milestones) this.milestones = message.milestones
+        this.emit()
+    }
+
+    private emit() {
+        const years = this.series.year ?? []
+        const rows = years.map((_, i) => {
+            const row = {} as LiveProjectionRow
+            for (const name of SERIES) row[name] = this.series[name]?.[i] ?? 0
+            return row
+        })
+        this.onResult(rows, this.milestones)
+    }
+}
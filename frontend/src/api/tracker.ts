@@ -20,9 +20,13 @@ export type Account = {
     currency?: string
     person_id?: number
     person_name?: string
+    interest_rate?: number
+    minimum_payment?: number
     current_balance: number
 }
 
+export type HistoryResolution = 'raw' | 'week' | 'month' | 'auto'
+
 export type BalanceEntry = {
     id: number
     account_id: number
@@ -79,9 +83,9 @@ export const fileApi = {
         return response.data
     },
 
-    getHistory: async (account_id?: number): Promise<BalanceEntry[]> => {
-        const url = account_id ? `/tracker/history?account_id=${account_id}` : '/tracker/history'
-        const response = await api.get(url)
+    // resolution: 'week' | 'month' | 'auto' returns one entry per account per bucket (for charts)
+    getHistory: async (account_id?: number, resolution: HistoryResolution = 'raw'): Promise<BalanceEntry[]> => {
+        const response = await api.get('/tracker/history', { params: { account_id, resolution } })
         return response.data
     },
 
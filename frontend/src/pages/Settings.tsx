@@ -7,7 +7,7 @@ import { useShallow } from 'zustand/react/shallow'
 import { Coins, Trash2, AlertTriangle, Download, Upload, Sun, Moon, Monitor, Save, FolderOpen, GraduationCap, Users, Plus, X } from "lucide-react"
 import { Input } from "@/components/ui/input"
 import { Badge } from "@/components/ui/badge"
-import { apiClient } from "@/api/client"
+import { apiClient, API_BASE_URL } from "@/api/client"
 
 export function Settings() {
     const { currency, setCurrency, resetData, theme, setTheme, showCoach, setShowCoach, incomes, expenses, simulationParams, planningTargets, events, fetchAccounts, fetchHistory, persons, fetchPersons, createPerson, deletePerson, actualExpenses, exchangeRates, setExchangeRate, removeExchangeRate } = useFinancialStore(
@@ -152,9 +152,36 @@ export function Settings() {
         }
     }
 
+    const handleArchiveExport = () => {
+        // Streamed straight to disk by the browser; no client-side assembly
+        window.location.href = `${API_BASE_URL}/api/export?compress=gzip`
+    }
+
+    const handleArchiveImport = async (file: File) => {
+        if (!confirm('This will replace all accounts, history, persons and saved scenarios in the database. Continue?')) return
+        try {
+            const res = await apiClient.post('/import', file, {
+                headers: { 'Content-Type': 'application/octet-stream' },
+                timeout: 0
+            })
+            fetchAccounts()
+            fetchHistory()
+            fetchPersons()
+            alert(`Import successful! Restored ${res.data.rows} rows.`)
+        } catch (err: any) {
+            console.error('Archive import failed', err)
+            alert(err?.response?.data?.detail || 'Archive import failed.')
+        }
+    }
+
     const handleImport = async (e: React.ChangeEvent<HTMLInputElement>) => {
         const file = e.target.files?.[0]
         if (!file) return
+        if (!file.name.endsWith('.json')) {
+            await handleArchiveImport(file)
+            if (fileInputRef.current) fileInputRef.current.value = ''
+            return
+        }
         try {
             const text = await file.text()
             const data = JSON.parse(text)
@@ -447,19 +474,22 @@ export function Settings() {
                 <Card className="md:col-span-2">
                     <CardHeader>
                         <CardTitle className="flex items-center gap-2"><Download className="h-5 w-5" /> Data Backup</CardTitle>
-                        <CardDescription>Export or import all your financial data as a JSON file.</CardDescription>
+                        <CardDescription>Export or import all your financial data as a JSON file, or the whole database as a compressed archive.</CardDescription>
                     </CardHeader>
                     <CardContent className="flex flex-wrap gap-4">
                         <Button onClick={handleExport} variant="outline" className="gap-2">
                             <Download className="h-4 w-4" /> Export Backup
                         </Button>
+                        <Button onClick={handleArchiveExport} variant="outline" className="gap-2">
+                            <Download className="h-4 w-4" /> Export Database Archive
+                        </Button>
                         <div>
-                            <input ref={fileInputRef} type="file" accept=".json" onChange={handleImport} className="hidden" />
+                            <input ref={fileInputRef} type="file" accept=".json,.ndjson,.gz,.zst" onChange={handleImport} className="hidden" />
                             <Button onClick={() => fileInputRef.current?.click()} variant="outline" className="gap-2">
                                 <Upload className="h-4 w-4" /> Import Backup
                             </Button>
                         </div>
-                        <p className="w-full text-xs text-muted-foreground">Exports include all income sources, expenses, simulation settings, accounts, and balance history.</p>
+                        <p className="w-full text-xs text-muted-foreground">Exports include all income sources, expenses, simulation settings, accounts, and balance history. Database archives (.ndjson.gz) hold every account, entry, person, FX rate and saved scenario, and import in one step.</p>
                     </CardContent>
                 </Card>
 
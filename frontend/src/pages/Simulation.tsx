@@ -1,5 +1,5 @@
 
-import { useEffect, useState, useMemo } from 'react'
+import { useEffect, useState, useMemo, useRef } from 'react'
 import { Card, CardContent, CardHeader, CardTitle, CardDescription } from "@/components/ui/card"
 import { Slider } from "@/components/ui/slider"
 import { Badge } from "@/components/ui/badge"
@@ -10,6 +10,7 @@ import { Input } from "@/components/ui/input"
 import { Button } from "@/components/ui/button"
 import { Loader2, Trash2, TrendingUp, PiggyBank, Percent, Calendar } from "lucide-react"
 import { apiClient } from "@/api/client"
+import { LiveProjectionSession } from "@/api/liveProjection"
 import { FinancialTooltip } from "@/components/features/FinancialTooltip"
 import { AreaChart, Area, XAxis, YAxis, Tooltip, ResponsiveContainer, CartesianGrid } from 'recharts'
 
@@ -86,6 +87,27 @@ export function Simulation() {
     const [newEventDuration, setNewEventDuration] = useState('1')
 
 
+    // Live websocket session for assumption projections; POST is the fallback
+    const liveSession = useRef<LiveProjectionSession | null>(null)
+    const forecastModeRef = useRef(forecastMode)
+    useEffect(() => {
+        forecastModeRef.current = forecastMode
+    }, [forecastMode])
+
+    useEffect(() => {
+        const session = new LiveProjectionSession((rows, liveMilestones) => {
+            // Ignore late pushes after switching to the history forecast
+            if (forecastModeRef.current !== 'assumptions') return
+            setGraphData(rows)
+            setMilestones(liveMilestones)
+        }, (detail) => console.error("Live projection error", detail))
+        liveSession.current = session
+        return () => {
+            session.close()
+            liveSession.current = null
+        }
+    }, [])
+
     // Debounce logic could be here, but for local dev, fetch on every change is OK if lightweight.
     // Actually, let's use a simple effect.
 
@@ -127,6 +149,12 @@ export function Simulation() {
                         currency: currency
                     }
 
+                    // Live session sends only the changed fields; results arrive via its callback
+                    if (liveSession.current?.send(payload)) {
+                        setForecastStats(null)
+                        return
+                    }
+
                     const response = await apiClient.post('/scenarios/calculate', payload)
                     const result = response.data
                     setGraphData(result.data)
@@ -140,10 +168,11 @@ export function Simulation() {
             }
         }
 
-        // Debounce basic
+        // Debounce basic (the live session is debounced server-side)
+        const useLive = forecastMode === 'assumptions' && liveSession.current?.isOpen
         const timer = setTimeout(() => {
             fetchData()
-        }, 500)
+        }, useLive ? 50 : 500)
 
         return () => clearTimeout(timer)
 